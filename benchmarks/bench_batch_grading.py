@@ -0,0 +1,73 @@
+"""
+Measures batch grading of answer submissions, in one process and with a process pool.
+
+A temporary data directory gets a question bank, a set of profiles and a JSONL file of
+random (profile_id, question_id, answer) submissions, which is then graded with
+grade_submissions. Every profile is saved once per run.
+
+Usage:
+  python benchmarks/bench_batch_grading.py [--submissions 500000] [--profiles 1000] [--workers 4]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from batch_grading import grade_submissions
+from storage import JsonStorage
+from user_profile import Profile
+
+def make_data(data_dir, args, rng):
+  questions = []
+  for question_id in range(1, args.questions + 1):
+    if question_id % 2:
+      questions.append({"type": "quiz", "id": question_id, "question_text": f"Question {question_id}?", "status": True, "answer_index": rng.randrange(4), "options": ["A", "B", "C", "D"]})
+    else:
+      questions.append({"type": "freeform", "id": question_id, "question_text": f"Question {question_id}?", "status": True, "answer": f"answer number {question_id}"})
+
+  questions_file = os.path.join(data_dir, "questions.json")
+  with open(questions_file, 'w') as file:
+    json.dump(questions, file)
+  storage = JsonStorage(questions_file, data_dir)
+  for profile_id in range(1, args.profiles + 1):
+    storage.save_profile(Profile.from_dict({"id": profile_id, "name": f"Student {profile_id}", "questions_stats": []}))
+
+  submissions_file = os.path.join(data_dir, "submissions.jsonl")
+  with open(submissions_file, 'w') as file:
+    for _ in range(args.submissions):
+      question = rng.choice(questions)
+      if question["type"] == "quiz":
+        answer = rng.randint(1, 4)
+      else:
+        answer = question["answer"] if rng.random() < 0.7 else f"answer numbr {question['id']}"
+      file.write(json.dumps({"profile_id": rng.randint(1, args.profiles), "question_id": question["id"], "answer": answer}) + "\n")
+
+  return partial(JsonStorage, questions_file, data_dir), submissions_file
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--submissions", type=int, default=500000)
+  parser.add_argument("--profiles", type=int, default=1000)
+  parser.add_argument("--questions", type=int, default=2000)
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    storage_factory, submissions_file = make_data(data_dir, args, random.Random(args.seed))
+
+    print(f"{args.submissions} submissions from {args.profiles} profiles on {args.questions} questions")
+    for workers in sorted({1, args.workers}):
+      start = time.perf_counter()
+      profiles, errors = grade_submissions(submissions_file, storage_factory, workers=workers)
+      elapsed = time.perf_counter() - start
+      print(f"{workers} worker(s): {elapsed:.2f} s, {args.submissions / elapsed:,.0f} submissions/s, {len(profiles)} profiles saved, {len(errors)} errors")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,74 @@
+"""
+Measures free-form grading throughput.
+
+"Uncached" normalizes both the response and the stored answer with re.sub on every
+attempt, like the old ask_freeform_question. "Exact" grades with the grading module and
+fuzzy matching turned off, so stored answers are normalized once and cached. "Fuzzy"
+also forgives up to GRADING_MAX_EDIT_DISTANCE typos, which is where most wrong
+responses spend their time in the bounded edit distance.
+
+Usage:
+  python benchmarks/bench_grading.py [--questions 1000] [--responses 200000]
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from grading import grade_answer, grade_many
+
+def random_words(rng, count):
+  return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(count))
+
+def make_responses(questions, num_responses, rng):
+  responses = []
+  for _ in range(num_responses):
+    question = rng.choice(questions)
+    response = question["answer"]
+    roll = rng.random()
+    if roll < 0.3:
+      response = "  " + response.upper() + " "
+    elif roll < 0.5:
+      position = rng.randrange(len(response))
+      response = response[:position] + rng.choice(string.ascii_lowercase) + response[position + 1:]
+    elif roll < 0.8:
+      response = random_words(rng, rng.randint(1, 3))
+    responses.append((question, response))
+  return responses
+
+def grade_uncached(question, response):
+  normalized_response = re.sub(r'\s+', ' ', response.strip()).lower()
+  return normalized_response == re.sub(r'\s+', ' ', question["answer"]).lower()
+
+def timed(function):
+  start = time.perf_counter()
+  result = function()
+  return time.perf_counter() - start, result
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=1000)
+  parser.add_argument("--responses", type=int, default=200000)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  questions = [{"type": "freeform", "answer": random_words(rng, rng.randint(1, 3))} for _ in range(args.questions)]
+  responses = make_responses(questions, args.responses, rng)
+
+  uncached, _ = timed(lambda: [grade_uncached(question, response) for question, response in responses])
+  exact, exact_results = timed(lambda: [grade_answer(response, question["answer"], max_distance=0) for question, response in responses])
+  fuzzy, fuzzy_results = timed(lambda: grade_many(responses))
+
+  print(f"{args.responses} responses to {args.questions} free-form questions")
+  print(f"Uncached: {args.responses / uncached:,.0f} responses/s")
+  print(f"Exact:    {args.responses / exact:,.0f} responses/s ({sum(exact_results) / len(exact_results):.0%} correct)")
+  print(f"Fuzzy:    {args.responses / fuzzy:,.0f} responses/s ({sum(fuzzy_results) / len(fuzzy_results):.0%} correct)")
+
+if __name__ == "__main__":
+  main()
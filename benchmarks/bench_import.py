@@ -0,0 +1,63 @@
+"""
+Times the bulk question import and export and checks the import stays under a time budget.
+
+Usage:
+  python benchmarks/bench_import.py [--questions 1000000] [--format jsonl] [--budget 60]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from controller import IdAllocator
+from question_io import import_questions, export_questions
+from storage import JsonStorage, SqliteStorage
+
+def generate_rows(num_questions, rng):
+  for i in range(num_questions):
+    if rng.random() < 0.5:
+      yield {"type": "quiz", "question_text": f"Question {i}", "status": True, "answer_index": 1, "options": ["A", "B", "C"]}
+    else:
+      yield {"type": "freeform", "question_text": f"Question {i}", "status": True, "answer": f"Answer {i}"}
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=1000000)
+  parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+  parser.add_argument("--storage", choices=["json", "sqlite"], default="json")
+  parser.add_argument("--budget", type=float, default=60.0, help="maximum import time in seconds")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    source_file = os.path.join(data_dir, f"source.{args.format}")
+    export_questions(source_file, generate_rows(args.questions, random.Random(args.seed)))
+
+    if args.storage == "json":
+      storage = JsonStorage(os.path.join(data_dir, "questions.json"), data_dir)
+    else:
+      storage = SqliteStorage(os.path.join(data_dir, "learning_tool.db"))
+    id_allocator = IdAllocator(os.path.join(data_dir, "last_id_questions.txt"))
+
+    start = time.perf_counter()
+    imported, _, errors = import_questions(source_file, storage, id_allocator)
+    import_time = time.perf_counter() - start
+
+    export_file = os.path.join(data_dir, f"export.{args.format}")
+    start = time.perf_counter()
+    exported = export_questions(export_file, storage.load_questions())
+    export_time = time.perf_counter() - start
+
+  print(f"Imported {imported} questions ({len(errors)} errors) from {args.format} into {args.storage} storage in {import_time:.1f} s ({imported / import_time:,.0f} questions/s)")
+  print(f"Exported {exported} questions in {export_time:.1f} s")
+  if import_time > args.budget:
+    print(f"FAIL: import took longer than the {args.budget:.0f} s budget")
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,58 @@
+"""
+Measures listing profiles for the selection menu at TerminalUI startup.
+
+"Parse all" is the old startup path, which parsed the full statistics of every profile
+with load_profiles. "Index" lists them with list_profiles, which reads the profile index
+and only stats the profile files; "index rebuild" is the first run without an index.
+
+Usage:
+  python benchmarks/bench_profile_index.py [--profiles 10000] [--questions 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from storage import JsonStorage, atomic_write_json
+
+def write_profiles(profiles_folder, num_profiles, num_questions, rng):
+  for profile_id in range(1, num_profiles + 1):
+    stats = [
+      {"id": question_id, "times_shown": 1, "correct_answers": rng.randrange(2), "selection_probability": rng.random()}
+      for question_id in range(1, num_questions + 1)
+    ]
+    atomic_write_json(os.path.join(profiles_folder, f"{profile_id}.json"), {"id": profile_id, "name": f"Profile {profile_id}", "questions_stats": stats})
+
+def timed(function):
+  start = time.perf_counter()
+  result = function()
+  return time.perf_counter() - start, result
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--profiles", type=int, default=10000)
+  parser.add_argument("--questions", type=int, default=200)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as profiles_folder:
+    write_profiles(profiles_folder, args.profiles, args.questions, random.Random(args.seed))
+    storage = JsonStorage(profiles_folder=profiles_folder)
+
+    parse_all, _ = timed(storage.load_profiles)
+    rebuild, _ = timed(storage.list_profiles)
+    index, profiles = timed(storage.list_profiles)
+    open_one, _ = timed(lambda: storage.load_profile(storage.read_profile(profiles[-1]["id"])))
+
+  print(f"{args.profiles} profiles with {args.questions} answered questions each")
+  print(f"Parse all:     {parse_all * 1e3:.1f} ms")
+  print(f"Index rebuild: {rebuild * 1e3:.1f} ms")
+  print(f"Index:         {index * 1e3:.1f} ms ({parse_all / index:.1f}x)")
+  print(f"Open chosen:   {open_one * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+  main()
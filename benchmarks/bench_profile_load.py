@@ -0,0 +1,77 @@
+"""
+Measures loading a profile's statistics from a JSON profile file and from a binary stats
+snapshot.
+
+"Full load" builds the profile's ProfileStats, which the practice menu needs. "Single
+stat" reads one question's statistics, which the JSON file can only do by parsing all of
+it while the memory-mapped snapshot binary searches its fixed-width records.
+
+Usage:
+  python benchmarks/bench_profile_load.py [--questions 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from binary_stats import BinaryStatsFile
+from storage import JsonStorage
+from user_profile import Profile
+
+def make_profile(num_questions, rng):
+  stats = []
+  for i in range(1, num_questions + 1):
+    times_shown = rng.randrange(10)
+    correct_answers = rng.randrange(times_shown + 1)
+    stats.append({"id": i, "times_shown": times_shown, "correct_answers": correct_answers, "selection_probability": rng.random()})
+  return Profile.from_dict({"id": 1, "name": "Benchmark", "questions_stats": stats})
+
+def time_per_call(function, repeat):
+  start = time.perf_counter()
+  for _ in range(repeat):
+    function()
+  return (time.perf_counter() - start) / repeat
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=100000)
+  parser.add_argument("--repeat", type=int, default=20)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  profile = make_profile(args.questions, rng)
+  question_id = rng.randrange(args.questions) + 1
+
+  with tempfile.TemporaryDirectory() as json_dir, tempfile.TemporaryDirectory() as binary_dir:
+    json_storage = JsonStorage(profiles_folder=json_dir)
+    binary_storage = JsonStorage(profiles_folder=binary_dir, stats_format="binary")
+    json_storage.save_profile(profile)
+    binary_storage.save_profile(profile)
+
+    def load(storage):
+      return storage.load_profile(storage.load_profiles()[0])
+
+    json_load = time_per_call(lambda: load(json_storage), args.repeat)
+    binary_load = time_per_call(lambda: load(binary_storage), args.repeat)
+    json_single = time_per_call(lambda: load(json_storage).get_question_stats(question_id), args.repeat)
+
+    def read_single():
+      with BinaryStatsFile(os.path.join(binary_dir, "1.stats")) as stats_file:
+        return stats_file.get(question_id)
+
+    binary_single = time_per_call(read_single, args.repeat)
+    json_size = os.path.getsize(os.path.join(json_dir, "1.json"))
+    binary_size = os.path.getsize(os.path.join(binary_dir, "1.stats"))
+
+  print(f"Profile with {args.questions} answered questions")
+  print(f"File size:   JSON {json_size / 1e6:.1f} MB, binary {binary_size / 1e6:.1f} MB")
+  print(f"Full load:   JSON {json_load * 1e3:.2f} ms, binary {binary_load * 1e3:.2f} ms ({json_load / binary_load:.1f}x)")
+  print(f"Single stat: JSON {json_single * 1e3:.2f} ms, binary {binary_single * 1e3:.3f} ms ({json_single / binary_single:.0f}x)")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,73 @@
+"""
+Measures the time per practice answer spent persisting profile statistics.
+
+The "every answer" path rewrites the whole profile after each answer, like the old
+practice_mode. The "write-behind" path records answers with a ProfileSaver, which appends
+them to the profile's answer log, flushes it every PROFILE_SAVE_EVERY answers or
+PROFILE_SAVE_INTERVAL seconds, and only rewrites the profile when the log is compacted.
+
+Usage:
+  python benchmarks/bench_profile_save.py [--questions 50000] [--answers 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from controller import ProfileManager, ProfileSaver, use_data_root
+from data_root import DataRoot
+from user_profile import Profile
+
+def make_profile(num_questions, rng):
+  stats = [
+    {"id": i, "times_shown": 0, "correct_answers": 0, "selection_probability": 1}
+    for i in range(1, num_questions + 1)
+  ]
+  return Profile.from_dict({"id": 1, "name": "Benchmark", "questions_stats": stats})
+
+def answer(profile, rng):
+  question_id = rng.randrange(len(profile.stats)) + 1
+  correct = rng.random() < 0.5
+  profile.record_answer(question_id, correct)
+  return question_id, correct
+
+def run_every_answer(profile, answers, rng):
+  start = time.perf_counter()
+  for _ in range(answers):
+    answer(profile, rng)
+    ProfileManager.save_to_json(profile)
+  return (time.perf_counter() - start) / answers
+
+def run_write_behind(profile, answers, rng):
+  start = time.perf_counter()
+  with ProfileSaver(profile) as profile_saver:
+    for _ in range(answers):
+      profile_saver.record(*answer(profile, rng))
+  return (time.perf_counter() - start) / answers
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=50000)
+  parser.add_argument("--answers", type=int, default=200)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    use_data_root(DataRoot(data_dir), "json")
+    rng = random.Random(args.seed)
+    profile = make_profile(args.questions, rng)
+
+    every_answer = run_every_answer(profile, args.answers, rng)
+    write_behind = run_write_behind(profile, args.answers, rng)
+
+  print(f"Profile with {args.questions} questions, {args.answers} answers")
+  print(f"Every answer: {every_answer * 1e3:.2f} ms per answer")
+  print(f"Write-behind: {write_behind * 1e3:.2f} ms per answer")
+  print(f"Speedup:      {every_answer / write_behind:.1f}x")
+
+if __name__ == "__main__":
+  main()
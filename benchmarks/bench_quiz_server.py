@@ -0,0 +1,118 @@
+"""
+Load-tests the quiz server with many concurrent learners.
+
+A quiz server is started in this process on a temporary data directory with a question
+bank and one profile per session. Every session connects, opens its profile, answers
+--answers practice questions, about 70% of them correctly, and then takes a test of
+--test-questions questions, all sessions at once. The benchmark reports the request
+throughput and the p50 and p99 request latency seen by the clients, per operation.
+
+Usage:
+  python benchmarks/bench_quiz_server.py [--sessions 1000] [--answers 20] [--test-questions 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from controller import use_data_root
+from data_root import DataRoot
+from quiz_server import QuizServer
+from storage import JsonStorage
+from user_profile import Profile
+
+def make_data(data_dir, args, rng):
+  questions = []
+  for question_id in range(1, args.questions + 1):
+    if question_id % 2:
+      questions.append({"type": "quiz", "id": question_id, "question_text": f"Question {question_id}?", "status": True, "answer_index": rng.randrange(4), "options": ["A", "B", "C", "D"]})
+    else:
+      questions.append({"type": "freeform", "id": question_id, "question_text": f"Question {question_id}?", "status": True, "answer": f"answer number {question_id}"})
+
+  questions_file = os.path.join(data_dir, "questions.json")
+  with open(questions_file, 'w') as file:
+    json.dump(questions, file)
+  profiles_folder = os.path.join(data_dir, "profiles")
+  os.mkdir(profiles_folder)
+  storage = JsonStorage(questions_file, profiles_folder)
+  storage.save_profiles(Profile.from_dict({"id": profile_id, "name": f"Student {profile_id}"}) for profile_id in range(1, args.sessions + 1))
+  return {question["id"]: question for question in questions}
+
+def pick_answer(question, rng):
+  correct = rng.random() < 0.7
+  if question["type"] == "quiz":
+    return question["answer_index"] + 1 if correct else rng.randint(1, 4)
+  return question["answer"] if correct else "no idea"
+
+async def learner(port, profile_id, args, questions, rng, latencies):
+  reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+  async def request(**fields):
+    start = time.perf_counter()
+    writer.write(json.dumps(fields).encode() + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    latencies.setdefault(fields["op"], []).append(time.perf_counter() - start)
+    if "error" in response:
+      raise RuntimeError(response["error"])
+    return response
+
+  await request(op="open", profile_id=profile_id)
+  question = (await request(op="practice"))["question"]
+  for _ in range(args.answers):
+    question = (await request(op="answer", answer=pick_answer(questions[question["id"]], rng)))["question"]
+
+  response = await request(op="test", count=args.test_questions)
+  while "score" not in response:
+    response = await request(op="answer", answer=pick_answer(questions[response["question"]["id"]], rng))
+
+  writer.close()
+  await writer.wait_closed()
+
+def percentile(sorted_values, fraction):
+  return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def run(args, questions):
+  server = QuizServer("127.0.0.1", 0)
+  await server.start()
+  latencies = {}
+  rng = random.Random(args.seed)
+
+  start = time.perf_counter()
+  await asyncio.gather(*(
+    learner(server.port, profile_id, args, questions, random.Random(rng.random()), latencies)
+    for profile_id in range(1, args.sessions + 1)
+  ))
+  elapsed = time.perf_counter() - start
+  await server.close()
+
+  requests = sum(len(values) for values in latencies.values())
+  print(f"{args.sessions} sessions, {requests} requests in {elapsed:.2f} s: {requests / elapsed:,.0f} requests/s")
+  for operation, values in sorted(latencies.items()):
+    values.sort()
+    print(f"{operation:>8}: {len(values):>7} requests, p50 {percentile(values, 0.5) * 1000:7.2f} ms, p99 {percentile(values, 0.99) * 1000:7.2f} ms")
+  every = sorted(value for values in latencies.values() for value in values)
+  print(f"{'all':>8}: {len(every):>7} requests, p50 {percentile(every, 0.5) * 1000:7.2f} ms, p99 {percentile(every, 0.99) * 1000:7.2f} ms")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--sessions", type=int, default=1000)
+  parser.add_argument("--answers", type=int, default=20)
+  parser.add_argument("--test-questions", type=int, default=5)
+  parser.add_argument("--questions", type=int, default=500)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    questions = make_data(data_dir, args, random.Random(args.seed))
+    use_data_root(DataRoot(data_dir))
+    asyncio.run(run(args, questions))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,69 @@
+"""
+Compares practice-turn question selection with and without the Fenwick-tree sampler.
+
+The "list" path mirrors the old practice_mode: rebuild the weight list for all active
+questions and call random.choices on every turn. The "sampler" path draws from a
+WeightedSampler and updates the single weight that changed.
+
+Usage:
+  python benchmarks/bench_sampler.py [--sizes 1000 100000 1000000] [--turns 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from weighted_sampler import WeightedSampler
+
+def make_data(size, rng):
+  questions = [{"id": i, "status": rng.random() < 0.9} for i in range(1, size + 1)]
+  stats = [{"id": i, "selection_probability": rng.random()} for i in range(1, size + 1)]
+  return questions, stats
+
+def new_probability(rng):
+  return rng.uniform(0.1, 1.0)
+
+def run_list(questions, stats, turns, rng):
+  active_questions = [q for q in questions if q["status"]]
+  question_status = {q["id"]: q["status"] for q in questions}
+  stats_by_id = {s["id"]: s for s in stats}
+
+  start = time.perf_counter()
+  for _ in range(turns):
+    weights = [s["selection_probability"] for s in stats if question_status[s["id"]]]
+    selected = rng.choices(active_questions, weights=weights, k=1)[0]
+    stats_by_id[selected["id"]]["selection_probability"] = new_probability(rng)
+  return (time.perf_counter() - start) / turns
+
+def run_sampler(questions, stats, turns, rng):
+  active = {q["id"] for q in questions if q["status"]}
+
+  start = time.perf_counter()
+  sampler = WeightedSampler((s["id"], s["selection_probability"]) for s in stats if s["id"] in active)
+  build = time.perf_counter() - start
+
+  start = time.perf_counter()
+  for _ in range(turns):
+    selected = sampler.sample(rng)
+    sampler.update(selected, new_probability(rng))
+  return build, (time.perf_counter() - start) / turns
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+  parser.add_argument("--turns", type=int, default=200)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  print(f"{'questions':>10} | {'list per turn':>14} | {'sampler build':>14} | {'sampler per turn':>16} | {'speedup':>8}")
+  for size in args.sizes:
+    questions, stats = make_data(size, random.Random(args.seed))
+    list_turn = run_list(questions, stats, args.turns, random.Random(args.seed))
+    build, sampler_turn = run_sampler(questions, stats, args.turns, random.Random(args.seed))
+    print(f"{size:>10} | {list_turn * 1e6:>11.1f} us | {build * 1e3:>11.1f} ms | {sampler_turn * 1e6:>13.1f} us | {list_turn / sampler_turn:>7.0f}x")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,119 @@
+"""
+Simulates synthetic learners practicing with each scheduler.
+
+Every learner has a memory of each question that fades exponentially: the chance of
+recalling it is exp(-elapsed / stability). Answering correctly grows the stability, the
+more the closer the question was to being forgotten, and answering wrongly halves it.
+Seeing a question for the first time teaches it. Unseen questions are answered correctly by guessing 20% of the time.
+
+Learners practice one session a day, answering a question every 20 seconds. At the start
+of each session a question counts as mastered if it would be recalled with a chance of
+at least 90%. The benchmark reports the cost of picking and rescheduling a question, and
+how many sessions each scheduler takes to have learners master 80% of the questions.
+
+Usage:
+  python benchmarks/bench_scheduler.py [--learners 20] [--questions 100] [--sessions 30]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from profile_stats import ProfileStats
+from scheduler import DAY, SCHEDULERS, create_scheduler
+
+ANSWER_SECONDS = 20
+
+GUESS_CHANCE = 0.2
+
+MASTERY_RECALL = 0.9
+
+MASTERY_TARGET = 0.8
+
+class Learner:
+  """
+  A simulated learner with an exponentially fading memory of each question.
+  """
+
+  def __init__(self, num_questions, rng):
+    self._rng = rng
+    self._initial_stability = {question_id: rng.uniform(0.2, 2) * DAY for question_id in range(1, num_questions + 1)}
+    self._stability = {}
+    self._last_review = {}
+
+  def recall(self, question_id, now):
+    if question_id not in self._stability:
+      return GUESS_CHANCE
+    return math.exp(-(now - self._last_review[question_id]) / self._stability[question_id])
+
+  def answer(self, question_id, now):
+    recall = self.recall(question_id, now)
+    correct = self._rng.random() < recall
+    if question_id not in self._stability:
+      self._stability[question_id] = self._initial_stability[question_id]
+    elif correct:
+      self._stability[question_id] *= 1.5 + 3 * (1 - recall)
+    else:
+      self._stability[question_id] = max(self._initial_stability[question_id], self._stability[question_id] / 2)
+    self._last_review[question_id] = now
+    return correct
+
+  def mastery(self, now):
+    mastered = sum(1 for question_id in self._initial_stability if self.recall(question_id, now) >= MASTERY_RECALL)
+    return mastered / len(self._initial_stability)
+
+def simulate(name, args, seed):
+  rng = random.Random(seed)
+  learner = Learner(args.questions, rng)
+  stats = ProfileStats()
+  scheduler = create_scheduler(name, range(1, args.questions + 1), stats, rng=rng)
+
+  elapsed = 0.0
+  mastered_after = None
+  mastery = 0.0
+  for session in range(args.sessions):
+    now = session * DAY
+    mastery = learner.mastery(now)
+    if mastered_after is None and mastery >= MASTERY_TARGET:
+      mastered_after = session
+
+    for _ in range(args.answers):
+      start = time.perf_counter()
+      question_id = scheduler.next_question(now)
+      elapsed += time.perf_counter() - start
+
+      correct = learner.answer(question_id, now)
+      stats.record(question_id, correct)
+
+      start = time.perf_counter()
+      scheduler.record(question_id, correct, now)
+      elapsed += time.perf_counter() - start
+      now += ANSWER_SECONDS
+
+  return elapsed / (args.sessions * args.answers), mastered_after, mastery
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--learners", type=int, default=20)
+  parser.add_argument("--questions", type=int, default=100)
+  parser.add_argument("--sessions", type=int, default=30)
+  parser.add_argument("--answers", type=int, default=50, help="answers per session")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  print(f"{args.learners} learners, {args.questions} questions, {args.sessions} daily sessions of {args.answers} answers")
+  for name in SCHEDULERS:
+    results = [simulate(name, args, args.seed + learner) for learner in range(args.learners)]
+    cost = sum(result[0] for result in results) / len(results)
+    reached = [result[1] for result in results if result[1] is not None]
+    final_mastery = sum(result[2] for result in results) / len(results)
+    sessions = f"{sum(reached) / len(reached):.1f} sessions" if reached else "never"
+    print(f"{name:>11}: {cost * 1e6:.1f} us per selection, {MASTERY_TARGET:.0%} mastery after {sessions} "
+          f"({len(reached)}/{len(results)} learners), final mastery {final_mastery:.0%}")
+
+if __name__ == "__main__":
+  main()
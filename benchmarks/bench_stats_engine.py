@@ -0,0 +1,60 @@
+"""
+Compares the pure-Python and NumPy stats engines on a large profile.
+
+Each engine recalculates every selection probability, the correct percentage of every
+question, and the summary shown by view_statistics. The NumPy engine is skipped when
+NumPy isn't installed.
+
+Usage:
+  python benchmarks/bench_stats_engine.py [--questions 200000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from profile_stats import ProfileStats
+from stats_engine import NumpyStatsEngine, PythonStatsEngine, np
+
+def make_stats(num_questions, rng):
+  rows = []
+  for question_id in range(1, num_questions + 1):
+    times_shown = rng.randrange(10)
+    rows.append((question_id, times_shown, rng.randrange(times_shown + 1), 1.0))
+  return ProfileStats.from_rows(rows)
+
+def time_per_call(function, repeat):
+  start = time.perf_counter()
+  for _ in range(repeat):
+    function()
+  return (time.perf_counter() - start) / repeat
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=200000)
+  parser.add_argument("--repeat", type=int, default=5)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  stats = make_stats(args.questions, rng)
+  question_types = [(question_id, rng.choice(["quiz", "freeform"])) for question_id in range(1, args.questions + 1)]
+
+  engines = [PythonStatsEngine()]
+  if np is not None:
+    engines.append(NumpyStatsEngine())
+
+  print(f"Profile with {args.questions} answered questions")
+  for engine in engines:
+    probabilities = time_per_call(lambda: engine.recalculate_probabilities(stats), args.repeat)
+    percentages = time_per_call(lambda: engine.correct_percentages(stats), args.repeat)
+    summary = time_per_call(lambda: engine.summary(stats, question_types), args.repeat)
+    print(f"{engine.name:>6}: probabilities {probabilities * 1e3:.1f} ms, percentages {percentages * 1e3:.1f} ms, summary {summary * 1e3:.1f} ms")
+  if np is None:
+    print(" numpy: not installed")
+
+if __name__ == "__main__":
+  main()
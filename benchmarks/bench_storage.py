@@ -0,0 +1,93 @@
+"""
+Compares the JSON and SQLite storage backends on the operations the UI performs.
+
+Usage:
+  python benchmarks/bench_storage.py [--questions 50000] [--profiles 20] [--answers 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from storage import JsonStorage, SqliteStorage
+from user_profile import Profile
+
+def make_questions(num_questions, rng):
+  questions = []
+  for question_id in range(1, num_questions + 1):
+    if rng.random() < 0.5:
+      questions.append({"type": "quiz", "id": question_id, "question_text": f"Question {question_id}", "status": True, "answer_index": 0, "options": ["A", "B", "C"]})
+    else:
+      questions.append({"type": "freeform", "id": question_id, "question_text": f"Question {question_id}", "status": True, "answer": f"Answer {question_id}"})
+  return questions
+
+def make_profile(profile_id, num_questions):
+  stats = [
+    {"id": i, "times_shown": 0, "correct_answers": 0, "selection_probability": 1}
+    for i in range(1, num_questions + 1)
+  ]
+  return Profile.from_dict({"id": profile_id, "name": f"Learner {profile_id}", "questions_stats": stats})
+
+def timed(function, *args):
+  start = time.perf_counter()
+  function(*args)
+  return time.perf_counter() - start
+
+def run(storage, args):
+  rng = random.Random(args.seed)
+  questions = make_questions(args.questions, rng)
+  profiles = [make_profile(profile_id, args.questions) for profile_id in range(1, args.profiles + 1)]
+  results = {}
+
+  results["save questions"] = timed(storage.save_questions, questions)
+  results["save profiles"] = timed(lambda: [storage.save_profile(profile) for profile in profiles])
+  results["load questions"] = timed(storage.load_questions)
+  results["load profiles"] = timed(storage.load_profiles)
+
+  question_id = rng.randrange(args.questions) + 1
+  questions[question_id - 1]["status"] = False
+  results["toggle 1 question"] = timed(storage.update_question_status, questions, [question_id], storage.questions_signature())
+
+  new_question = {"type": "freeform", "id": args.questions + 1, "question_text": "New", "status": True, "answer": "New"}
+  results["add 1 question"] = timed(storage.add_questions, [new_question])
+
+  profile = profiles[0]
+  answer_log = storage.open_answer_log(profile)
+  start = time.perf_counter()
+  for _ in range(args.answers):
+    question_id = rng.randrange(args.questions) + 1
+    correct = rng.random() < 0.5
+    profile.record_answer(question_id, correct)
+    answer_log.append(question_id, correct)
+    answer_log.flush()
+  results["record answer"] = (time.perf_counter() - start) / args.answers
+  answer_log.close()
+  return results
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, default=50000)
+  parser.add_argument("--profiles", type=int, default=20)
+  parser.add_argument("--answers", type=int, default=200)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    profiles_folder = os.path.join(data_dir, "profiles")
+    os.mkdir(profiles_folder)
+    json_results = run(JsonStorage(os.path.join(data_dir, "questions.json"), profiles_folder), args)
+    sqlite_storage = SqliteStorage(os.path.join(data_dir, "learning_tool.db"))
+    sqlite_results = run(sqlite_storage, args)
+    sqlite_storage.close()
+
+  print(f"{args.questions} questions, {args.profiles} profiles, {args.answers} answers")
+  print(f"{'operation':>18} | {'json':>11} | {'sqlite':>11}")
+  for operation in json_results:
+    print(f"{operation:>18} | {json_results[operation] * 1e3:>8.2f} ms | {sqlite_results[operation] * 1e3:>8.2f} ms")
+
+if __name__ == "__main__":
+  main()
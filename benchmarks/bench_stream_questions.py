@@ -0,0 +1,81 @@
+"""
+Compares json.load of a large questions.json with the streaming reader.
+
+For each path it reports the time to the first question, the time to count the active
+questions, and the peak RSS of a fresh process doing the work.
+
+Usage:
+  python benchmarks/bench_stream_questions.py [--size-mb 500]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from storage import iter_json_array, load_data
+
+def generate_bank(file_name, size_mb):
+  target = size_mb * 1024 * 1024
+  with open(file_name, 'w') as file:
+    file.write("[\n")
+    question_id = 0
+    while file.tell() < target:
+      question_id += 1
+      question = {
+        "type": "quiz",
+        "id": question_id,
+        "question_text": f"Question number {question_id} about a generated topic?",
+        "status": question_id % 3 != 0,
+        "answer_index": 0,
+        "options": ["First option", "Second option", "Third option"]
+      }
+      if question_id > 1:
+        file.write(",\n")
+      file.write(json.dumps(question, indent=2))
+    file.write("\n]")
+  return question_id
+
+def run_child(mode, file_name):
+  start = time.perf_counter()
+  if mode == "load":
+    questions = load_data(file_name)
+    first = time.perf_counter() - start
+    active = sum(1 for question in questions if question["status"])
+  else:
+    questions = iter_json_array(file_name)
+    next(questions)
+    first = time.perf_counter() - start
+    active = 1 + sum(1 for question in questions if question["status"])
+  total = time.perf_counter() - start
+  peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+  print(json.dumps({"first": first, "total": total, "active": active, "peak_rss_mb": peak_rss_mb}))
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--size-mb", type=int, default=500)
+  parser.add_argument("--child", choices=["load", "stream"], help=argparse.SUPPRESS)
+  parser.add_argument("--file", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    run_child(args.child, args.file)
+    return
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    file_name = os.path.join(data_dir, "questions.json")
+    num_questions = generate_bank(file_name, args.size_mb)
+    print(f"Generated {os.path.getsize(file_name) / 1024 / 1024:.0f} MB bank with {num_questions} questions")
+    print(f"{'reader':>8} | {'first question':>14} | {'count active':>12} | {'peak RSS':>10}")
+    for mode in ("load", "stream"):
+      output = subprocess.run([sys.executable, __file__, "--child", mode, "--file", file_name], capture_output=True, text=True, check=True).stdout
+      result = json.loads(output)
+      print(f"{mode:>8} | {result['first']:>12.3f} s | {result['total']:>10.1f} s | {result['peak_rss_mb']:>7.0f} MB")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,214 @@
+"""
+Times the controller and terminal UI hot paths on generated data and saves the results as JSON.
+
+For every combination of --questions and --profiles, a seeded data directory is generated
+in a temporary folder (see datagen.py) and each operation runs --repeat times against it.
+Practice turns are timed per turn. "add_questions" saves new questions and refreshes an
+open profile's active questions, which is all adding questions costs profiles now that
+they only store the questions they have answered. "report_hardest" ranks the hardest
+questions across all profiles from the cohort aggregates.
+
+The results file holds the median and fastest time of every operation. Pass an earlier
+results file to --compare to print the change against it.
+
+Usage:
+  python benchmarks/bench_suite.py [--questions 1000 10000 100000] [--profiles 1 100]
+    [--output bench_results.json] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import controller
+from controller import ProfileManager, ProfileSaver, QuestionManager, StatisticsManager
+from data_root import DataRoot
+from datagen import generate_data
+from free_form_question import FreeFormQuestion
+from terminal_ui import TerminalUI
+
+OPERATIONS = (
+  "load_questions",
+  "load_profiles",
+  "get_question_probabilities",
+  "practice_turn",
+  "toggle_question_status",
+  "add_questions",
+  "view_statistics",
+  "report_hardest"
+)
+
+@contextlib.contextmanager
+def quiet():
+  with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), mock.patch("builtins.input", return_value=""):
+    yield
+
+def time_runs(operation, repeat, setup=None):
+  """
+  Times an operation, running an untimed setup before every run.
+
+  Args:
+    operation (callable): The operation, called with the result of setup if there is one.
+    repeat (int): Number of runs.
+    setup (callable): Prepares a run.
+
+  Returns:
+    list: The time of every run, in seconds.
+  """
+  times = []
+  for _ in range(repeat):
+    args = (setup(),) if setup is not None else ()
+    start = time.perf_counter()
+    operation(*args)
+    times.append(time.perf_counter() - start)
+  return times
+
+def open_profile():
+  profile = ProfileManager.open_profile(1)
+  profile.get_active_questions()
+  return profile
+
+def run_operations(num_questions, args, rng):
+  """
+  Runs every operation against the data in the current storage.
+
+  Returns:
+    dict: The run times of every operation, by name.
+  """
+  times = {}
+
+  def reload_questions():
+    controller.question_bank.invalidate()
+
+  times["load_questions"] = time_runs(lambda _: QuestionManager.load_questions(), args.repeat, reload_questions)
+  times["load_profiles"] = time_runs(ProfileManager.load_profiles, args.repeat)
+  times["get_question_probabilities"] = time_runs(
+    lambda profile: profile.get_question_probabilities(), args.repeat, lambda: ProfileManager.open_profile(1)
+  )
+
+  def practice(state):
+    profile, scheduler, profile_saver = state
+    active_questions = profile.get_active_questions()
+    for _ in range(args.turns):
+      question, _ = active_questions[scheduler.next_question()]
+      correct = rng.random() < 0.7
+      profile.record_answer(question["id"], correct)
+      scheduler.record(question["id"], correct)
+      profile_saver.record(question["id"], correct)
+
+  practice_times = []
+  for _ in range(args.repeat):
+    profile = open_profile()
+    with ProfileSaver(profile) as profile_saver:
+      run_time, = time_runs(practice, 1, lambda: (profile, ProfileManager.create_scheduler(profile), profile_saver))
+    practice_times.append(run_time / args.turns)
+  times["practice_turn"] = practice_times
+
+  toggled_ids = rng.sample(range(1, num_questions + 1), min(args.toggled, num_questions))
+  with quiet():
+    times["toggle_question_status"] = time_runs(lambda: QuestionManager.toggle_question_status(toggled_ids), args.repeat)
+
+  def prepare_add():
+    question_manager = QuestionManager()
+    for _ in range(args.added):
+      question_manager.add_question(FreeFormQuestion("New question?", "New answer"))
+    return question_manager, open_profile()
+
+  def add_questions(state):
+    question_manager, profile = state
+    question_manager.save_to_json()
+    profile.get_active_questions()
+
+  times["add_questions"] = time_runs(add_questions, args.repeat, prepare_add)
+
+  def prepare_view():
+    ui = TerminalUI()
+    ui._profile = ProfileManager.open_profile(1)
+    return ui
+
+  with quiet():
+    times["view_statistics"] = time_runs(lambda ui: ui.view_statistics(), args.repeat, prepare_view)
+  times["report_hardest"] = time_runs(lambda: StatisticsManager.report("hardest"), args.repeat)
+  return times
+
+def run_suite(args):
+  """
+  Generates the data for every size combination and times the operations on it.
+
+  Returns:
+    list: One result dictionary per size combination and operation.
+  """
+  results = []
+  for num_questions in args.questions:
+    for num_profiles in args.profiles:
+      with tempfile.TemporaryDirectory() as data_dir:
+        generate_data(data_dir, num_questions, num_profiles, args.answered, args.seed)
+        controller.use_data_root(DataRoot(data_dir))
+        times = run_operations(num_questions, args, random.Random(args.seed))
+
+      for operation in OPERATIONS:
+        results.append({
+          "questions": num_questions,
+          "profiles": num_profiles,
+          "operation": operation,
+          "median": statistics.median(times[operation]),
+          "min": min(times[operation]),
+          "runs": times[operation]
+        })
+  return results
+
+def result_key(result):
+  return (result["questions"], result["profiles"], result["operation"])
+
+def print_results(results, baseline=None):
+  baseline = {result_key(result): result for result in baseline or []}
+  print(f"{'questions':>9} | {'profiles':>8} | {'operation':>26} | {'median':>11} | {'min':>11} | {'vs baseline':>11}")
+  for result in results:
+    previous = baseline.get(result_key(result))
+    change = f"{result['median'] / previous['median']:.2f}x" if previous and previous["median"] else "-"
+    print(f"{result['questions']:>9} | {result['profiles']:>8} | {result['operation']:>26} | {result['median'] * 1e3:>8.3f} ms | {result['min'] * 1e3:>8.3f} ms | {change:>11}")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--questions", type=int, nargs="+", default=[1000, 10000, 100000])
+  parser.add_argument("--profiles", type=int, nargs="+", default=[1, 100])
+  parser.add_argument("--answered", type=int, default=1000, help="questions answered by each profile")
+  parser.add_argument("--repeat", type=int, default=5)
+  parser.add_argument("--turns", type=int, default=200, help="practice turns per run")
+  parser.add_argument("--toggled", type=int, default=10, help="questions toggled per run")
+  parser.add_argument("--added", type=int, default=10, help="questions added per run")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default="bench_results.json", help="JSON file to save the results to")
+  parser.add_argument("--compare", help="results file of an earlier run to compare with")
+  args = parser.parse_args()
+
+  results = run_suite(args)
+
+  baseline = None
+  if args.compare:
+    with open(args.compare, 'r') as file:
+      baseline = json.load(file)["results"]
+  print_results(results, baseline)
+
+  with open(args.output, 'w') as file:
+    json.dump({
+      "created": datetime.datetime.now().isoformat(timespec="seconds"),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "arguments": vars(args),
+      "results": results
+    }, file, indent=2)
+  print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,116 @@
+"""
+Generates a synthetic question bank and profile set in a data directory laid out like data/,
+with the cohort aggregates built from the profiles.
+
+The data is seeded, so the same arguments always generate the same files. Every profile
+has statistics for --answered random questions, and about one question in ten is disabled.
+
+Usage:
+  python benchmarks/datagen.py DATA_DIR [--questions 10000] [--profiles 10] [--answered 1000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from aggregates import AggregateStore
+from profile_stats import probability_from_counts
+from storage import JsonStorage
+from user_profile import Profile
+
+# Number of profiles written at a time
+PROFILE_BATCH_SIZE = 100
+
+def make_questions(num_questions, rng):
+  """
+  Makes a mix of quiz and free-form questions with IDs from 1 to num_questions.
+
+  Args:
+    num_questions (int): Number of questions.
+    rng (random.Random): The random generator.
+
+  Returns:
+    list: The question dictionaries.
+  """
+  questions = []
+  for question_id in range(1, num_questions + 1):
+    status = rng.random() >= 0.1
+    if rng.random() < 0.5:
+      options = [f"Option {i}" for i in range(rng.randrange(2, 6))]
+      questions.append({"type": "quiz", "id": question_id, "question_text": f"Question {question_id}?", "status": status, "answer_index": rng.randrange(len(options)), "options": options})
+    else:
+      questions.append({"type": "freeform", "id": question_id, "question_text": f"Question {question_id}?", "status": status, "answer": f"Answer {question_id}", "alternatives": [f"Alternative {question_id}"]})
+  return questions
+
+def make_profile(profile_id, num_questions, answered, rng):
+  """
+  Makes a profile that has answered some random questions.
+
+  Args:
+    profile_id (int): The ID of the profile.
+    num_questions (int): Number of questions in the bank.
+    answered (int): Number of questions the profile has answered, at most num_questions.
+    rng (random.Random): The random generator.
+
+  Returns:
+    Profile: The profile.
+  """
+  stats = []
+  for question_id in sorted(rng.sample(range(1, num_questions + 1), min(answered, num_questions))):
+    times_shown = rng.randrange(1, 10)
+    correct_answers = rng.randrange(times_shown + 1)
+    stats.append({"id": question_id, "times_shown": times_shown, "correct_answers": correct_answers, "selection_probability": probability_from_counts(times_shown, correct_answers)})
+  return Profile.from_dict({"id": profile_id, "name": f"Learner {profile_id}", "questions_stats": stats})
+
+def generate_data(data_dir, num_questions, num_profiles, answered=1000, seed=0):
+  """
+  Writes a question bank, profiles and last-ID files to a data directory.
+
+  Args:
+    data_dir (str): The directory to write to. It is created if missing.
+    num_questions (int): Number of questions.
+    num_profiles (int): Number of profiles.
+    answered (int): Number of questions each profile has answered.
+    seed (int): Seed of the random generator.
+
+  Returns:
+    JsonStorage: A storage over the generated data.
+  """
+  rng = random.Random(seed)
+  profiles_folder = os.path.join(data_dir, "profiles")
+  os.makedirs(profiles_folder, exist_ok=True)
+  storage = JsonStorage(os.path.join(data_dir, "questions.json"), profiles_folder)
+  storage.save_questions(make_questions(num_questions, rng))
+
+  answers = []
+  for first_id in range(1, num_profiles + 1, PROFILE_BATCH_SIZE):
+    last_id = min(first_id + PROFILE_BATCH_SIZE, num_profiles + 1)
+    profiles = [make_profile(profile_id, num_questions, answered, rng) for profile_id in range(first_id, last_id)]
+    storage.save_profiles(profiles)
+    answers.extend(
+      (profile._id, question_id, times_shown, correct_answers, None)
+      for profile in profiles for question_id, times_shown, correct_answers, _ in profile.stats.rows()
+    )
+  AggregateStore(os.path.join(data_dir, "aggregates.json")).rebuild(answers)
+
+  for file_name, last_id in (("last_id_questions.txt", num_questions), ("last_id_profiles.txt", num_profiles)):
+    with open(os.path.join(data_dir, file_name), 'w') as file:
+      file.write(str(last_id))
+  return storage
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("data_dir")
+  parser.add_argument("--questions", type=int, default=10000)
+  parser.add_argument("--profiles", type=int, default=10)
+  parser.add_argument("--answered", type=int, default=1000)
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  generate_data(args.data_dir, args.questions, args.profiles, args.answered, args.seed)
+  print(f"Generated {args.questions} questions and {args.profiles} profiles in {args.data_dir}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import heapq
+from config import AGGREGATE_LOG_COMPACT_SIZE
+from storage import file_lock, atomic_write_json, atomic_write_text
+from instrumentation import count_bytes, count_file_read
+
+def _signature(file_name):
+  try:
+    stat = os.stat(file_name)
+  except FileNotFoundError:
+    return None
+  return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _row(item_id, totals):
+  shown, correct, last_seen = totals
+  return {"id": item_id, "shown": shown, "correct": correct, "accuracy": correct / shown * 100 if shown else 0, "last_seen": last_seen}
+
+def _add(totals, item_id, shown, correct, timestamp):
+  row = totals.get(item_id)
+  if row is None:
+    totals[item_id] = [shown, correct, timestamp]
+  else:
+    row[0] += shown
+    row[1] += correct
+    if timestamp is not None and (row[2] is None or timestamp > row[2]):
+      row[2] = timestamp
+
+class AggregateStore:
+  """
+  Running totals of answers per question and per profile, across all profiles.
+
+  Each question and profile has its times shown, correct answers and the Unix time it was
+  last answered, so cohort reports read one row per question or profile instead of every
+  profile's statistics. The totals are kept in a JSON snapshot and answers are appended to
+  a "<snapshot>.log" file next to it as "<profile id> <question id> <shown> <correct>
+  <timestamp>" lines, which costs O(1) per answer. The log names the snapshot it continues
+  from by its inode, like the questions change log, and is folded into a new snapshot once
+  it reaches AGGREGATE_LOG_COMPACT_SIZE bytes.
+
+  The totals are a cache of the profiles' statistics: appended answers aren't synced to
+  disk, and `rebuild` recreates the totals from the profiles.
+
+  The reports pick their rows with a heap over the totals, which costs O(n log k) for n
+  questions or profiles and k rows, whatever the number of answers. They aren't
+  O(k): loading the snapshot is already O(n), and the totals aren't kept in rank order.
+  """
+
+  def __init__(self, file_name, compact_size=AGGREGATE_LOG_COMPACT_SIZE):
+    """
+    Initializes the aggregates stored in a snapshot file.
+
+    Args:
+      file_name (str): Name of the JSON snapshot file.
+      compact_size (int): Size in bytes of the log at which it is folded into the snapshot.
+    """
+    self._file_name = file_name
+    self._log_file_name = file_name + ".log"
+    self._compact_size = compact_size
+    self._buffer = []
+    self._questions = {}
+    self._profiles = {}
+    self._snapshot_signature = None
+    self._log_inode = None
+    self._log_offset = 0
+    self._log_current = False
+
+  def exists(self):
+    """
+    Checks whether the aggregates have been built.
+
+    Returns:
+      bool: True if there is a snapshot.
+    """
+    return os.path.exists(self._file_name)
+
+  def _base(self):
+    try:
+      return os.stat(self._file_name).st_ino
+    except FileNotFoundError:
+      return None
+
+  def _load_snapshot(self):
+    try:
+      with open(self._file_name, 'r') as file:
+        count_file_read(file)
+        snapshot = json.load(file)
+    except (FileNotFoundError, ValueError):
+      snapshot = {"questions": {}, "profiles": {}}
+    self._questions = {int(question_id): totals for question_id, totals in snapshot["questions"].items()}
+    self._profiles = {int(profile_id): totals for profile_id, totals in snapshot["profiles"].items()}
+
+  def _read_log(self, base):
+    start = self._log_offset
+    with open(self._log_file_name, 'rb') as file:
+      file.seek(self._log_offset)
+      if self._log_offset == 0:
+        header = file.readline()
+        try:
+          self._log_current = header.endswith(b"\n") and json.loads(header)["base"] == base
+        except (ValueError, KeyError, TypeError):
+          self._log_current = False
+        if not header.endswith(b"\n"):
+          return
+        self._log_offset = len(header)
+
+      for line in file:
+        if not line.endswith(b"\n"):
+          # Only read up to the last complete line, the rest is still being appended
+          break
+        self._log_offset += len(line)
+        if not self._log_current:
+          continue
+        try:
+          profile_id, question_id, shown, correct, timestamp = map(int, line.split())
+        except ValueError:
+          # A crash mid-append can leave a torn line behind
+          continue
+        _add(self._questions, question_id, shown, correct, timestamp)
+        _add(self._profiles, profile_id, shown, correct, timestamp)
+    count_bytes(read=self._log_offset - start)
+
+  def _refresh(self):
+    """
+    Brings the in-memory totals up to date, reading only what was logged since the last
+    refresh unless the snapshot or log was replaced.
+    """
+    snapshot_signature = _signature(self._file_name)
+    log_signature = _signature(self._log_file_name)
+    log_inode = log_signature and log_signature[0]
+    if snapshot_signature != self._snapshot_signature or log_inode != self._log_inode or (log_signature and log_signature[2] < self._log_offset):
+      self._load_snapshot()
+      self._snapshot_signature = snapshot_signature
+      self._log_inode = log_inode
+      self._log_offset = 0
+    if log_signature and log_signature[2] > self._log_offset:
+      self._read_log(snapshot_signature and snapshot_signature[0])
+
+  def record(self, profile_id, question_id, shown, correct, timestamp=None):
+    """
+    Adds answers to the totals. They are buffered until the store is flushed.
+
+    Args:
+      profile_id (int): The ID of the profile that answered.
+      question_id (int): The ID of the question.
+      shown (int): Number of answers.
+      correct (int): Number of correct answers.
+      timestamp (int): Unix time of the last answer, defaults to now.
+    """
+    if timestamp is None:
+      timestamp = int(time.time())
+    self._buffer.append(f"{profile_id} {question_id} {shown} {int(correct)} {timestamp}\n")
+
+  def flush(self):
+    """
+    Appends buffered answers to the log, folding it into the snapshot if it has grown too long.
+    """
+    if not self._buffer:
+      return
+    with file_lock(self._file_name):
+      base = self._base()
+      try:
+        with open(self._log_file_name, 'r') as file:
+          current = json.loads(file.readline())["base"] == base
+      except (FileNotFoundError, ValueError, KeyError, TypeError):
+        current = False
+
+      text = "".join(self._buffer)
+      if current:
+        with open(self._log_file_name, 'a+b') as file:
+          file.seek(0, os.SEEK_END)
+          file.seek(file.tell() - 1)
+          # Start on a new line if the last append was torn
+          text = text if file.read(1) == b"\n" else "\n" + text
+          file.write(text.encode())
+          size = file.tell()
+      else:
+        text = json.dumps({"base": base}) + "\n" + text
+        atomic_write_text(self._log_file_name, text)
+        size = len(text)
+      count_bytes(written=len(text))
+      self._buffer.clear()
+
+      if size >= self._compact_size:
+        self._compact()
+
+  def _compact(self):
+    """
+    Folds the log into a new snapshot. The caller must hold the snapshot lock.
+    """
+    self._refresh()
+    self._write_snapshot(self._questions, self._profiles)
+
+  def _write_snapshot(self, questions, profiles):
+    atomic_write_json(self._file_name, {"questions": questions, "profiles": profiles})
+    header = json.dumps({"base": self._base()}) + "\n"
+    atomic_write_text(self._log_file_name, header)
+
+    # The totals in memory are what was just written, so they needn't be read back
+    self._questions = questions
+    self._profiles = profiles
+    self._snapshot_signature = _signature(self._file_name)
+    self._log_inode = _signature(self._log_file_name)[0]
+    self._log_offset = len(header)
+    self._log_current = True
+
+  def rebuild(self, answers):
+    """
+    Replaces the totals with ones built from the profiles' statistics.
+
+    Args:
+      answers (iterable): (profile ID, question ID, times shown, correct answers, last
+        answer time or None) tuples, one per answered question of every profile.
+    """
+    questions = {}
+    profiles = {}
+    for profile_id, question_id, shown, correct, timestamp in answers:
+      _add(questions, question_id, shown, correct, timestamp)
+      _add(profiles, profile_id, shown, correct, timestamp)
+
+    with file_lock(self._file_name):
+      self._write_snapshot(questions, profiles)
+
+  def question(self, question_id):
+    """
+    Gets the totals of a question across all profiles.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      dict: The question's "id", "shown", "correct", "accuracy" (a percentage) and
+        "last_seen" (Unix time or None), or None if it was never answered.
+    """
+    self._refresh()
+    totals = self._questions.get(question_id)
+    return None if totals is None else _row(question_id, totals)
+
+  def profile(self, profile_id):
+    """
+    Gets the totals of a profile across all questions.
+
+    Args:
+      profile_id (int): The ID of the profile.
+
+    Returns:
+      dict: The profile's totals, as returned by `question`, or None if it never answered.
+    """
+    self._refresh()
+    totals = self._profiles.get(profile_id)
+    return None if totals is None else _row(profile_id, totals)
+
+  def question_totals(self):
+    """
+    Gets the totals of every answered question at once, for listing them all.
+
+    Returns:
+      dict: [shown, correct, last seen] lists by question ID. They must not be changed.
+    """
+    self._refresh()
+    return self._questions
+
+  def hardest_questions(self, limit=10, min_shown=1):
+    """
+    Gets the questions with the lowest accuracy, the most shown first among equals.
+
+    Args:
+      limit (int): The maximum number of questions to return.
+      min_shown (int): The number of answers a question needs to be ranked.
+
+    Returns:
+      list: The questions' totals, as returned by `question`.
+    """
+    self._refresh()
+    rows = ((question_id, totals) for question_id, totals in self._questions.items() if totals[0] >= min_shown)
+    hardest = heapq.nsmallest(limit, rows, key=lambda row: (row[1][1] / row[1][0], -row[1][0]))
+    return [_row(question_id, totals) for question_id, totals in hardest]
+
+  def most_practised_questions(self, limit=10):
+    """
+    Gets the most shown questions.
+
+    Args:
+      limit (int): The maximum number of questions to return.
+
+    Returns:
+      list: The questions' totals, as returned by `question`.
+    """
+    self._refresh()
+    practised = heapq.nlargest(limit, self._questions.items(), key=lambda row: row[1][0])
+    return [_row(question_id, totals) for question_id, totals in practised]
+
+  def leaderboard(self, limit=10):
+    """
+    Gets the profiles with the most correct answers, the most accurate first among equals.
+
+    Args:
+      limit (int): The maximum number of profiles to return.
+
+    Returns:
+      list: The profiles' totals, as returned by `profile`.
+    """
+    self._refresh()
+    leaders = heapq.nlargest(limit, self._profiles.items(), key=lambda row: (row[1][1], row[1][1] / row[1][0]))
+    return [_row(profile_id, totals) for profile_id, totals in leaders]
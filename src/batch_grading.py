@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from config import GRADING_SAVE_BATCH_SIZE
+from grading import grade_question, normalize_answer
+from question_io import detect_format
+from stats_engine import create_stats_engine
+
+def read_submissions(file_name, file_format=None):
+  """
+  Read answer submissions from a JSONL or CSV file, one at a time.
+
+  Each record has a profile_id, a question_id and an answer. The answer to a quiz question
+  is the number of the chosen option, counting from 1 as in the terminal UI, or its text.
+
+  Args:
+    file_name (str): Name of the file.
+    file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+
+  Yields:
+    tuple: (line number, profile ID, question ID, answer), or (line number, None, None,
+      error) for a record that can't be read.
+  """
+  file_format = detect_format(file_name, file_format)
+
+  with open(file_name, 'r', newline='' if file_format == "csv" else None) as file:
+    if file_format == "jsonl":
+      rows = ((line_number, line) for line_number, line in enumerate(file, start=1) if line.strip())
+    else:
+      reader = csv.DictReader(file)
+      rows = ((reader.line_num, row) for row in reader)
+
+    for line_number, row in rows:
+      try:
+        if file_format == "jsonl":
+          row = json.loads(row)
+        yield line_number, int(row["profile_id"]), int(row["question_id"]), row["answer"]
+      except (ValueError, TypeError, KeyError) as error:
+        yield line_number, None, None, f"invalid submission: {error}"
+
+def _quiz_choice(question, answer):
+  if isinstance(answer, int) or str(answer).strip().isdigit():
+    return int(answer) - 1
+  normalized = normalize_answer(str(answer))
+  for index, option in enumerate(question["options"]):
+    if normalize_answer(option) == normalized:
+      return index
+  return None
+
+def grade_submission(question, answer):
+  """
+  Grade one submitted answer.
+
+  Args:
+    question (dict): The question, as stored in the questions file.
+    answer: The submitted answer, as read by read_submissions.
+
+  Returns:
+    bool: True if the answer is correct.
+  """
+  if question["type"] == "quiz":
+    return grade_question(question, _quiz_choice(question, answer))
+  return grade_question(question, str(answer))
+
+def index_questions(questions):
+  """
+  Index questions by ID, keeping only the fields needed to grade them.
+
+  Args:
+    questions (iterable): Question dictionaries.
+
+  Returns:
+    dict: The questions by ID.
+  """
+  fields = ("type", "answer", "alternatives", "answer_index", "options")
+  return {question["id"]: {key: question[key] for key in fields if key in question} for question in questions}
+
+def grade_records(records, questions, storage, aggregates=None, batch_size=GRADING_SAVE_BATCH_SIZE, engine=None):
+  """
+  Grade submissions and apply them to the profiles they belong to.
+
+  Answers are aggregated into per-question counts for each profile, then every profile is
+  loaded, updated and saved once, whatever the number of its submissions. Profiles are
+  saved `batch_size` at a time and released once saved, so memory holds the counts and
+  one batch of profiles rather than every graded profile. Each profile's probabilities are
+  recalculated by the stats engine in one pass after its counts are added.
+
+  Args:
+    records (iterable): (line number, profile ID, question ID, answer) records.
+    questions (dict): The questions by ID, as built by index_questions.
+    storage (Storage): The storage holding the profiles.
+    aggregates (AggregateStore): The cohort totals to add the graded answers to, if any.
+    batch_size (int): Number of profiles loaded and saved together.
+    engine: The stats engine to recalculate the probabilities with, by default the configured one.
+
+  Returns:
+    tuple: (graded and correct answers by profile ID, list of (line number, error) pairs).
+  """
+  engine = engine or create_stats_engine()
+  counts = {}
+  errors = []
+
+  for line_number, profile_id, question_id, answer in records:
+    question = questions.get(question_id)
+    if question is None:
+      errors.append((line_number, f"unknown question {question_id}"))
+      continue
+    correct = grade_submission(question, answer)
+    question_counts = counts.setdefault(profile_id, {}).setdefault(question_id, [0, 0])
+    question_counts[0] += 1
+    question_counts[1] += correct
+
+  profiles = {}
+  batch = []
+  for profile_id in list(counts):
+    profile_counts = counts.pop(profile_id)
+    try:
+      profile = storage.load_profile(storage.read_profile(profile_id))
+    except (FileNotFoundError, KeyError):
+      errors.append((None, f"unknown profile {profile_id}"))
+      continue
+    profile.add_counts(profile_counts, engine)
+    batch.append((profile, profile_counts))
+    profiles[profile_id] = [sum(shown for shown, _ in profile_counts.values()), sum(correct for _, correct in profile_counts.values())]
+    if len(batch) >= batch_size:
+      _save_batch(batch, storage, aggregates)
+      batch = []
+
+  _save_batch(batch, storage, aggregates)
+  return profiles, errors
+
+def _save_batch(batch, storage, aggregates):
+  storage.save_profiles([profile for profile, _ in batch])
+  if aggregates is not None:
+    for profile, profile_counts in batch:
+      for question_id, (times_shown, correct_answers) in profile_counts.items():
+        aggregates.record(profile._id, question_id, times_shown, correct_answers)
+    aggregates.flush()
+
+_worker_state = {}
+
+def _init_worker(questions, storage_factory, aggregates_factory):
+  _worker_state["questions"] = questions
+  _worker_state["storage"] = storage_factory()
+  _worker_state["aggregates"] = aggregates_factory() if aggregates_factory is not None else None
+
+def _read_partition(file_name):
+  with open(file_name, 'r') as file:
+    for line in file:
+      yield tuple(json.loads(line))
+
+def _grade_partition(file_name):
+  return grade_records(_read_partition(file_name), _worker_state["questions"], _worker_state["storage"], _worker_state["aggregates"])
+
+def _valid_submissions(submissions, errors):
+  for line_number, profile_id, question_id, answer in submissions:
+    if profile_id is None:
+      errors.append((line_number, answer))
+    else:
+      yield line_number, profile_id, question_id, answer
+
+def _error_order(error):
+  line_number, _ = error
+  return (line_number is None, line_number or 0)
+
+def grade_submissions(file_name, storage_factory, file_format=None, workers=1, aggregates_factory=None):
+  """
+  Grade a file of answer submissions and update the profiles' statistics.
+
+  With several workers, the submissions are split by profile into one partition per
+  worker process, so each profile is only updated by one process and saved once.
+
+  Args:
+    file_name (str): Name of the JSONL or CSV submissions file.
+    storage_factory (callable): Creates the storage holding the questions and profiles.
+      It is called in every worker process, so it must be picklable.
+    file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+    workers (int): Number of worker processes, 1 to grade in this process.
+    aggregates_factory (callable): Creates the AggregateStore the graded answers are added
+      to, if any. Like storage_factory, it must be picklable.
+
+  Returns:
+    tuple: (graded and correct answers by profile ID, list of (line number, error) pairs,
+      where the line number is None for errors that concern a whole profile).
+  """
+  storage = storage_factory()
+  questions = index_questions(storage.iter_questions())
+  errors = []
+  submissions = _valid_submissions(read_submissions(file_name, file_format), errors)
+
+  if workers <= 1:
+    aggregates = aggregates_factory() if aggregates_factory is not None else None
+    profiles, grading_errors = grade_records(submissions, questions, storage, aggregates)
+    return profiles, sorted(errors + grading_errors, key=_error_order)
+
+  with tempfile.TemporaryDirectory() as partition_dir:
+    partition_files = [os.path.join(partition_dir, f"{worker}.jsonl") for worker in range(workers)]
+    partitions = [open(partition_file, 'w') for partition_file in partition_files]
+    try:
+      for record in submissions:
+        partitions[record[1] % workers].write(json.dumps(record) + "\n")
+    finally:
+      for partition in partitions:
+        partition.close()
+
+    profiles = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(questions, storage_factory, aggregates_factory)) as executor:
+      for partition_profiles, partition_errors in executor.map(_grade_partition, partition_files):
+        profiles.update(partition_profiles)
+        errors.extend(partition_errors)
+
+  return profiles, sorted(errors, key=_error_order)
@@ -0,0 +1,190 @@
+import os
+import mmap
+import struct
+import sys
+from array import array
+from profile_stats import ProfileStats
+from instrumentation import count_bytes
+
+MAGIC = b"ILTS"
+
+VERSION = 1
+
+# Magic, format version, reserved, number of records
+HEADER = struct.Struct("<4sHHQ")
+
+# Question ID, times shown, correct answers, selection probability
+RECORD = struct.Struct("<qIId")
+
+def pack_binary_stats(stats):
+  """
+  Pack profile statistics into the binary snapshot format.
+
+  The snapshot holds a fixed-size header followed by fixed-width records sorted by
+  question ID, so a single record can be found by binary search and updated in place.
+
+  Args:
+    stats (ProfileStats): The statistics to pack.
+
+  Returns:
+    bytearray: The snapshot.
+  """
+  rows = sorted(stats.rows())
+  data = bytearray(HEADER.size + RECORD.size * len(rows))
+  HEADER.pack_into(data, 0, MAGIC, VERSION, 0, len(rows))
+  for index, row in enumerate(rows):
+    RECORD.pack_into(data, HEADER.size + index * RECORD.size, *row)
+  return data
+
+def _check_header(data, file_name):
+  if len(data) < HEADER.size:
+    raise ValueError(f"{file_name} is not a profile stats snapshot.")
+  magic, version, _, count = HEADER.unpack_from(data, 0)
+  if magic != MAGIC or version != VERSION:
+    raise ValueError(f"{file_name} is not a profile stats snapshot.")
+  if len(data) < HEADER.size + count * RECORD.size:
+    raise ValueError(f"{file_name} is truncated.")
+  return count
+
+def read_binary_stats(file_name):
+  """
+  Read all profile statistics from a binary snapshot file.
+
+  Args:
+    file_name (str): Name of the snapshot file.
+
+  Returns:
+    ProfileStats: The statistics.
+  """
+  with open(file_name, 'rb') as file:
+    data = file.read()
+  count_bytes(read=len(data))
+  count = _check_header(data, file_name)
+
+  records = memoryview(data)[HEADER.size:HEADER.size + count * RECORD.size]
+
+  if sys.byteorder != "little" or not count:
+    return ProfileStats.from_rows(struct.iter_unpack(RECORD.format, records))
+
+  # Every field sits at a fixed stride, so each column is a strided slice of the records.
+  words = records.cast('q')
+  halves = records.cast('I')
+  return ProfileStats.from_columns(
+    array('q', words[0::3].tobytes()),
+    array('I', halves[2::6].tobytes()),
+    array('I', halves[3::6].tobytes()),
+    array('d', records.cast('d')[2::3].tobytes())
+  )
+
+class BinaryStatsFile:
+  """
+  A memory-mapped binary stats snapshot.
+
+  Reading one question's statistics is a binary search over the mapped records, and
+  updating it writes the record in place, so neither parses the whole file.
+  """
+
+  def __init__(self, file_name):
+    """
+    Opens a binary snapshot file.
+
+    Args:
+      file_name (str): Name of the snapshot file.
+    """
+    self._file_name = file_name
+    self._file = open(file_name, 'r+b')
+    self._map = mmap.mmap(self._file.fileno(), 0)
+    self._count = _check_header(self._map, file_name)
+
+  def __len__(self):
+    return self._count
+
+  def _record_offset(self, index):
+    return HEADER.size + index * RECORD.size
+
+  def _resize(self, size):
+    try:
+      self._map.resize(size)
+    except SystemError:
+      # Resizing a map needs mremap, which only Linux has: elsewhere the file is grown
+      # and mapped again
+      self._map.flush()
+      self._map.close()
+      os.ftruncate(self._file.fileno(), size)
+      self._map = mmap.mmap(self._file.fileno(), 0)
+
+  def _find(self, question_id):
+    low, high = 0, self._count
+    while low < high:
+      middle = (low + high) // 2
+      middle_id = RECORD.unpack_from(self._map, self._record_offset(middle))[0]
+      if middle_id < question_id:
+        low = middle + 1
+      elif middle_id > question_id:
+        high = middle
+      else:
+        return middle, True
+    return low, False
+
+  def get(self, question_id):
+    """
+    Reads the statistics of one question.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      dict: The statistics, or None if the question hasn't been answered.
+    """
+    index, found = self._find(question_id)
+    if not found:
+      return None
+    _, times_shown, correct_answers, selection_probability = RECORD.unpack_from(self._map, self._record_offset(index))
+    return {"id": question_id, "times_shown": times_shown, "correct_answers": correct_answers, "selection_probability": selection_probability}
+
+  def set(self, question_id, times_shown, correct_answers, selection_probability):
+    """
+    Writes the statistics of one question in place.
+
+    A question that isn't in the file yet is inserted at its sorted position, which moves
+    the records after it.
+
+    Args:
+      question_id (int): The ID of the question.
+      times_shown (int): Number of times the question was shown.
+      correct_answers (int): Number of correct answers.
+      selection_probability (float): The selection probability.
+    """
+    index, found = self._find(question_id)
+    offset = self._record_offset(index)
+
+    if not found:
+      end = self._record_offset(self._count)
+      self._resize(end + RECORD.size)
+      self._map.move(offset + RECORD.size, offset, end - offset)
+      self._count += 1
+      HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0, self._count)
+
+    RECORD.pack_into(self._map, offset, question_id, times_shown, correct_answers, selection_probability)
+
+  def flush(self):
+    """
+    Writes changed records to disk.
+    """
+    self._map.flush()
+
+  def close(self):
+    """
+    Flushes and closes the file.
+    """
+    if self._map is not None:
+      self._map.flush()
+      self._map.close()
+      self._file.close()
+      self._map = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
@@ -10,10 +10,74 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-QUESTIONS_FILE = os.path.join(BASE_DIR, "data/questions.json")
+# Environment variable that points the tool at another data directory
+DATA_DIR_VARIABLE = "LEARNING_TOOL_DATA_DIR"
 
-LAST_ID_PROFILES = os.path.join(BASE_DIR, "data/last_id_profiles.txt")
+DATA_DIR = os.path.abspath(os.environ.get(DATA_DIR_VARIABLE) or os.path.join(BASE_DIR, "data"))
 
-LAST_ID_QUESTIONS = os.path.join(BASE_DIR, "data/last_id_questions.txt")
+QUESTIONS_FILE = os.path.join(DATA_DIR, "questions.json")
 
-PROFILES_FOLDER = os.path.join(BASE_DIR, "data/profiles/")
+LAST_ID_PROFILES = os.path.join(DATA_DIR, "last_id_profiles.txt")
+
+LAST_ID_QUESTIONS = os.path.join(DATA_DIR, "last_id_questions.txt")
+
+PROFILES_FOLDER = os.path.join(DATA_DIR, "profiles/")
+
+DATABASE_FILE = os.path.join(DATA_DIR, "learning_tool.db")
+
+# Number of IDs reserved from a last-ID file at a time
+ID_BLOCK_SIZE = 16
+
+# Storage backend for questions and profiles: "json" or "sqlite"
+STORAGE_BACKEND = "json"
+
+# Write-behind settings for saving profile statistics in practice mode
+PROFILE_SAVE_INTERVAL = 5.0
+
+PROFILE_SAVE_EVERY = 20
+
+# Number of logged answers after which a profile's answer log is folded into its snapshot
+ANSWER_LOG_COMPACT_EVERY = 500
+
+# Size in bytes the questions change log must reach, and exceed the questions file by,
+# before it is folded into the questions file
+QUESTION_LOG_COMPACT_SIZE = 1 << 20
+
+# Size in bytes at which the log of answers added to the cohort aggregates is folded into
+# their snapshot
+AGGREGATE_LOG_COMPACT_SIZE = 1 << 20
+
+# Size in bytes the test results appended since the results index was written must reach,
+# and exceed the index by, before the index is rewritten
+RESULTS_INDEX_COMPACT_SIZE = 1 << 16
+
+# Number of questions written at a time by the bulk importer
+IMPORT_BATCH_SIZE = 10000
+
+# Number of profiles batch grading keeps loaded and saves at a time
+GRADING_SAVE_BATCH_SIZE = 1000
+
+# Where JSON storage keeps profile statistics: "json" in the profile file, or "binary" in
+# a memory-mapped snapshot next to it that practice answers update in place
+PROFILE_STATS_FORMAT = "json"
+
+# Engine for statistics over whole profiles: "auto" uses NumPy when it is installed,
+# "numpy" requires it and "python" never uses it
+STATS_ENGINE = "auto"
+
+# Scheduler that picks questions in practice mode for new profiles: "probability",
+# "leitner" or "sm2"
+DEFAULT_SCHEDULER = "probability"
+
+# Free-form grading: the number of typos forgiven in answers of at least
+# GRADING_FUZZY_MIN_LENGTH characters, and how many questions' normalized answers are cached
+GRADING_MAX_EDIT_DISTANCE = 1
+
+GRADING_FUZZY_MIN_LENGTH = 5
+
+GRADING_CACHE_SIZE = 4096
+
+# Address the quiz server listens on
+SERVER_HOST = "127.0.0.1"
+
+SERVER_PORT = 8765
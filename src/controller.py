@@ -1,61 +1,295 @@
 import os
-import json
-from config import QUESTIONS_FILE, LAST_ID_QUESTIONS, LAST_ID_PROFILES, PROFILES_FOLDER
-from user_profile import Profile
+import time
+import atexit
+import signal
+import threading
+from config import ID_BLOCK_SIZE, PROFILE_SAVE_INTERVAL, PROFILE_SAVE_EVERY, ANSWER_LOG_COMPACT_EVERY, STORAGE_BACKEND
+from storage import create_storage
+from data_root import DataRoot
+from results_store import ResultStore
+from aggregates import AggregateStore
+from instrumentation import instrumented
+from scheduler import SCHEDULERS
 
-def load_data(file_name):
+try:
+  import fcntl
+except ImportError:  # Not available on Windows, where IDs are allocated without locking
+  fcntl = None
+
+def generate_unique_id(file_name, count=1):
   """
-  Load data from a JSON file.
+  Generate unique IDs for items.
+
+  The last-ID file is locked while it is read and updated, so concurrent processes never
+  get the same ID.
 
   Args:
-    file_name (str): Name of the JSON file to load data from.
+    file_name (str): Name of the file to get the last ID from.
+    count (int): Number of consecutive IDs to reserve.
 
   Returns:
-    list: List of items from the JSON file.
+    int: The first of the reserved IDs.
   """
-  try:
-    with open(file_name, 'r') as file:
-      existing_data = json.load(file)
-  except FileNotFoundError:
-    existing_data = []
-  return existing_data
+  fd = os.open(file_name, os.O_RDWR | os.O_CREAT, 0o644)
+  with os.fdopen(fd, 'r+') as f:
+    if fcntl is not None:
+      fcntl.flock(f, fcntl.LOCK_EX)
+
+    content = f.read().strip()
+    last_id = int(content) if content else 0
+
+    f.seek(0)
+    f.truncate()
+    f.write(str(last_id + count))
+    f.flush()
+    os.fsync(f.fileno())
 
-def save_data_to_json(file_name, existing_data, data_list):
+  return last_id + 1
+
+class IdAllocator:
   """
-  Save data to a JSON file.
+  Hands out unique IDs from a last-ID file, reserving them in blocks.
 
-  Args:
-    file_name (str): Name of the JSON file to save data to.
-    existing_data (list): List of existing data in the JSON file.
-    data_list (list): List of data to append to the JSON file.
+  Only reserving a block touches the file; IDs within a block are served from memory.
+  IDs left over in a block when the process exits are never used.
   """
-  with open(file_name, 'w') as file:
-    json_data = [item.to_dict() for item in data_list]
-    updated_data = existing_data + json_data
-    json.dump(updated_data, file, indent=2)
 
-def generate_unique_id(file_name):
+  def __init__(self, file_name, block_size=ID_BLOCK_SIZE):
+    """
+    Initializes a new IdAllocator.
+
+    Args:
+      file_name (str): Name of the file holding the last reserved ID.
+      block_size (int): Number of IDs to reserve at a time.
+    """
+    self._file_name = file_name
+    self._block_size = block_size
+    self._next_id = 1
+    self._block_end = 0
+    self._lock = threading.Lock()
+
+  def allocate(self):
+    """
+    Allocates one ID.
+
+    Returns:
+      int: A unique ID.
+    """
+    return self.allocate_many(1)
+
+  def allocate_many(self, count):
+    """
+    Allocates consecutive IDs.
+
+    Args:
+      count (int): Number of IDs to allocate.
+
+    Returns:
+      int: The first of the allocated IDs.
+    """
+    with self._lock:
+      if self._next_id + count - 1 > self._block_end:
+        reserve = max(count, self._block_size)
+        self._next_id = generate_unique_id(self._file_name, reserve)
+        self._block_end = self._next_id + reserve - 1
+
+      first_id = self._next_id
+      self._next_id += count
+      return first_id
+
+data_root = DataRoot()
+question_ids = IdAllocator(data_root.last_id_questions)
+profile_ids = IdAllocator(data_root.last_id_profiles)
+results = ResultStore(data_root.results_file)
+aggregates = AggregateStore(data_root.aggregates_file)
+
+class QuestionBank:
+  """
+  An in-memory, ID-indexed copy of the stored questions.
+
+  The questions are loaded once and only re-read when the storage signature changes
+  (the questions file's modification time and size for JSON storage), so repeated
+  lookups during a session don't pay for a full reload.
   """
-  Generate a unique ID for an item.
+
+  def __init__(self, storage):
+    """
+    Initializes a new QuestionBank for the given storage.
+
+    Args:
+      storage (Storage): The storage holding the questions.
+    """
+    self._storage = storage
+    self._signature = None
+    self._questions = []
+    self._by_id = {}
+    self._active = {}
+    self._version = 0
+    self._stale = True
+
+  def _index(self, questions):
+    self._questions = questions
+    self._by_id = {question["id"]: question for question in questions}
+    self._active = {question["id"]: question for question in questions if question["status"]}
+    self._version += 1
+
+  def _refresh(self):
+    signature = self._storage.questions_signature()
+    if self._stale or signature != self._signature:
+      self._index(self._storage.load_questions())
+      self._signature = signature
+      self._stale = False
+
+  def invalidate(self):
+    """
+    Forces the next access to re-read the questions file.
+    """
+    self._stale = True
+
+  def replace(self, questions, signature):
+    """
+    Replaces the cached questions after they have been written to storage.
+
+    The signature must be the one the storage returned for the write: reading it
+    afterwards could pick up another writer's changes, which the questions don't have.
+
+    Args:
+      questions (list): The questions that are now stored.
+      signature: The storage signature of the written questions, None to re-read them on next access.
+    """
+    self._index(questions)
+    self._signature = signature
+    self._stale = signature is None
+
+  def extend(self, questions, signature):
+    """
+    Adds questions to the cache after they have been appended to storage, indexing only them.
+
+    Args:
+      questions (list): The questions that were added.
+      signature: The storage signature returned by the append, None if the stored
+        questions had changed since the cache read them, which re-reads them on next access.
+    """
+    if signature is None:
+      self.invalidate()
+      return
+    for question in questions:
+      self._questions.append(question)
+      self._by_id[question["id"]] = question
+      if question["status"]:
+        self._active[question["id"]] = question
+    self._version += 1
+    self._signature = signature
+
+  @property
+  def signature(self):
+    """
+    The storage signature the cached questions were read at, None if they haven't been read.
+    """
+    return None if self._stale else self._signature
+
+  @property
+  def version(self):
+    """
+    int: A counter that changes whenever the cached questions are replaced.
+    """
+    self._refresh()
+    return self._version
+
+  @property
+  def questions(self):
+    """
+    list: All questions, in file order.
+    """
+    self._refresh()
+    return self._questions
+
+  @property
+  def active_ids(self):
+    """
+    KeysView: IDs of the enabled questions, in file order.
+    """
+    self._refresh()
+    return self._active.keys()
+
+  def iter_questions(self):
+    """
+    Yields all questions, streaming them from storage unless they are already cached.
+
+    Yields:
+      dict: The questions, in file order.
+    """
+    if not self._stale and self._storage.questions_signature() == self._signature:
+      yield from self._questions
+    else:
+      yield from self._storage.iter_questions()
+
+  def active_questions(self):
+    """
+    Returns the enabled questions, in file order.
+
+    Returns:
+      list: List of enabled questions.
+    """
+    self._refresh()
+    return list(self._active.values())
+
+  def get(self, question_id):
+    """
+    Gets a question by its ID.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      dict: The question, or None if there is no question with that ID.
+    """
+    self._refresh()
+    return self._by_id.get(question_id)
+
+  def is_active(self, question_id):
+    """
+    Checks whether a question exists and is enabled.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      bool: True if the question is enabled.
+    """
+    self._refresh()
+    return question_id in self._active
+
+storage = create_storage(STORAGE_BACKEND, data_root)
+question_bank = QuestionBank(storage)
+
+def use_storage(new_storage):
+  """
+  Switch the managers to another storage backend.
 
   Args:
-    file_name (str): Name of the file to get the last ID from.
+    new_storage (Storage): The storage backend to use.
+  """
+  global storage, question_bank
+  storage = new_storage
+  question_bank = QuestionBank(new_storage)
 
-  Returns:
-    int: Unique ID for the item.
+def use_data_root(new_data_root, backend=STORAGE_BACKEND):
   """
-  try:
-    with open(file_name, 'r') as f:
-      last_id = int(f.read().strip())
-  except FileNotFoundError:
-    last_id = 0
-      
-  new_id = last_id + 1
-  
-  with open(file_name, 'w') as f:
-    f.write(str(new_id))
-    
-  return new_id
+  Switch the managers to another data directory, with its own storage, question bank,
+  ID allocators, test results and aggregates. The directory is created if it doesn't exist.
+
+  Args:
+    new_data_root (DataRoot): The data directory to use.
+    backend (str): The storage backend, "json" or "sqlite".
+  """
+  global data_root, question_ids, profile_ids, results, aggregates
+  data_root = new_data_root.create()
+  question_ids = IdAllocator(data_root.last_id_questions)
+  profile_ids = IdAllocator(data_root.last_id_profiles)
+  results = ResultStore(data_root.results_file)
+  aggregates = AggregateStore(data_root.aggregates_file)
+  use_storage(create_storage(backend, data_root))
 
 class QuestionManager: 
   """
@@ -73,42 +307,58 @@ class QuestionManager:
     self._questions.append(question)
     
   @classmethod
+  def get_bank(cls):
+    """
+    Get the shared question bank.
+
+    Returns:
+      QuestionBank: The cached, indexed questions.
+    """
+    return question_bank
+
+  @classmethod
+  @instrumented("QuestionManager.load_questions")
   def load_questions(cls):
     """
-    Load questions from a JSON file.
+    Load questions from the question bank.
 
     Returns:
       list: List of questions.
     """
-    return load_data(QUESTIONS_FILE)
+    return question_bank.questions
   
+  @instrumented("QuestionManager.save_to_json")
   def save_to_json(self):
     """
-    Save questions to a JSON file.
+    Save the added questions to storage.
     """
-    existing_questions = self.load_questions()
-    save_data_to_json(QUESTIONS_FILE, existing_questions, self.questions)
+    # Refresh the bank first, so it can be extended with the new questions alone
+    self.load_questions()
+    new_questions = [question.to_dict() for question in self.questions]
+    signature = storage.add_questions(new_questions, question_bank.signature)
+    question_bank.extend(new_questions, signature)
       
   @classmethod
   def generate_id(cls):
-    return generate_unique_id(LAST_ID_QUESTIONS)
+    return question_ids.allocate()
   
   @classmethod
   def get_last_id(cls):
     """
-    Get the last ID of the questions.
+    Get the last reserved ID of the questions.
 
     Returns:
       int: Last ID of the questions.
     """
     try:
-      with open(LAST_ID_QUESTIONS, 'r') as f:
+      with open(data_root.last_id_questions, 'r') as f:
         last_id = int(f.read().strip())
     except FileNotFoundError:
       last_id = 0
     return last_id
 
   @classmethod
+  @instrumented("QuestionManager.toggle_question_status")
   def toggle_question_status(cls, questions_id_list):
     """
     Toggle the status of a list of questions using their ids.
@@ -117,81 +367,187 @@ class QuestionManager:
       questions_id_list (list): List of question IDs.
     """
     questions = cls.load_questions()
+    toggled_ids = []
     
     for question_id in questions_id_list:
-      for question in questions:
-        if question["id"] == question_id:
-          question["status"] = not question["status"]
-          new_status = "enabled" if question["status"] else "disabled"
-          print(f"\nQuestion ID {question_id} is now {new_status}.")
-          
-    cls.save_questions(questions)
+      question = question_bank.get(question_id)
+      if question is not None:
+        question["status"] = not question["status"]
+        toggled_ids.append(question_id)
+        new_status = "enabled" if question["status"] else "disabled"
+        print(f"\nQuestion ID {question_id} is now {new_status}.")
+
+    if not toggled_ids:
+      return
+    signature = storage.update_question_status(questions, toggled_ids, question_bank.signature)
+    question_bank.replace(questions, signature)
   
   
+  @classmethod
+  def iter_questions(cls):
+    """
+    Iterate over the questions without loading them all into memory.
+
+    Returns:
+      iterator: The questions, in file order.
+    """
+    return question_bank.iter_questions()
+
+  @classmethod
+  @instrumented("QuestionManager.import_questions")
+  def import_questions(cls, file_name, file_format=None):
+    """
+    Import questions from a JSONL or CSV file in batches.
+
+    Args:
+      file_name (str): Name of the file to import.
+      file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+
+    Returns:
+      tuple: The number of imported questions, the number of rows skipped because their
+        question already exists, and a list of (line number, error) pairs.
+    """
+    from question_io import import_questions  # Imported here to avoid a circular import
+    result = import_questions(file_name, storage, question_ids, file_format)
+    question_bank.invalidate()
+    return result
+
+  @classmethod
+  @instrumented("QuestionManager.export_questions")
+  def export_questions(cls, file_name, file_format=None):
+    """
+    Export all questions to a JSONL or CSV file.
+
+    Args:
+      file_name (str): Name of the file to write.
+      file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+
+    Returns:
+      int: The number of exported questions.
+    """
+    from question_io import export_questions  # Imported here to avoid a circular import
+    return export_questions(file_name, cls.iter_questions(), file_format)
+
   @classmethod
   def save_questions(cls, questions):
-    with open(QUESTIONS_FILE, 'w') as file:
-      json.dump(questions, file, indent=2)
+    """
+    Replace all questions.
+
+    Args:
+      questions (list): The questions, as read from the question bank.
+
+    Raises:
+      ConflictError: If the stored questions were changed by another process since the
+        question bank read them. Reload and apply the changes again.
+    """
+    signature = storage.save_questions(questions, question_bank.signature)
+    question_bank.replace(questions, signature)
 
 class ProfileManager: 
   """
   A class to manage user profiles.
   """
   @classmethod
-  def initialize_all_stats_to_zero(cls):
+  @instrumented("ProfileManager.load_profiles")
+  def load_profiles(cls):
     """
-    Initializes statistics for all questions to zero.
+    Loads all profiles from storage.
     
     Returns:
-    list: A list of dictionaries, each containing the question ID, times shown, correct answers,
-          and selection probability.
+    list: A list of dictionaries, each containing profile data.
     """
-    questions = QuestionManager.load_questions()
-    stats = []
+    return storage.load_profiles()
+  
+  @classmethod
+  @instrumented("ProfileManager.list_profiles")
+  def list_profiles(cls):
+    """
+    Lists the ID and name of every profile without loading their statistics.
     
-    for question in questions: 
-      stat = {
-        "id": question["id"],
-        "times_shown": 0,
-        "correct_answers": 0,
-        "selection_probability": 1
-      }
-      stats.append(stat)
-      
-    return stats
+    Returns:
+    list: {"id", "name"} dictionaries, ordered by ID.
+    """
+    return storage.list_profiles()
   
   @classmethod
-  def load_profiles(cls):
+  @instrumented("ProfileManager.open_profile")
+  def open_profile(cls, profile_id):
     """
-    Loads all profiles from the profiles folder.
+    Loads one profile, including any answers logged since its last snapshot.
+    
+    Args:
+    profile_id (int): The ID of the profile.
     
     Returns:
-    list: A list of dictionaries, each containing profile data.
+    Profile: The up-to-date profile.
+    """
+    return storage.load_profile(storage.read_profile(profile_id))
+  
+  @classmethod
+  def load_profile(cls, profile_data):
+    """
+    Creates an up-to-date profile from its snapshot, including any answers logged since.
+    
+    Args:
+    profile_data (dict): The profile snapshot, as returned by load_profiles.
+    
+    Returns:
+    Profile: The up-to-date profile.
     """
-    profiles = []
-
-    for file_name in os.listdir(PROFILES_FOLDER):
-      if file_name.endswith('.json'):
-        profile_file = os.path.join(PROFILES_FOLDER, file_name)
-        with open(profile_file, 'r') as f:
-          profile_data = json.load(f)
-          
-          profiles.append(profile_data) 
-          
-    return profiles
+    return storage.load_profile(profile_data)
   
   @classmethod
+  @instrumented("ProfileManager.save_to_json")
   def save_to_json(cls, profile):
     """
-    Saves a profile to a JSON file.
+    Saves a full snapshot of a profile to storage, folding its answer log into it.
     
     Args:
     profile (Profile): The profile to be saved.
     """
-    file_name = PROFILES_FOLDER + f"{profile._id}.json"
-    with open(file_name, 'w') as file:
-      json.dump(profile.to_dict(), file, indent=2)
+    storage.save_profile(profile)
 
+  @classmethod
+  def create_scheduler(cls, profile):
+    """
+    Creates the scheduler that picks a profile's questions in practice mode.
+    
+    Args:
+    profile (Profile): The profile.
+    
+    Returns:
+    Scheduler: The scheduler, loaded with the profile's active questions and, if it
+    needs them, all of its past answers.
+    """
+    history = storage.get_answer_history(profile, None) if SCHEDULERS[profile.scheduler].uses_history else ()
+    return profile.create_scheduler(history)
+
+  @classmethod
+  def open_answer_log(cls, profile):
+    """
+    Opens the log that records a profile's practice answers between snapshots.
+    
+    Args:
+    profile (Profile): The profile.
+    
+    Returns:
+    The answer log, with append(), flush() and close() methods.
+    """
+    return storage.open_answer_log(profile)
+
+  @classmethod
+  def get_answer_history(cls, profile, limit=10):
+    """
+    Gets the most recent answers of a profile.
+    
+    Args:
+    profile (Profile): The profile.
+    limit (int): The maximum number of answers to return.
+    
+    Returns:
+    list: (question ID, correct, timestamp) records, oldest first.
+    """
+    return storage.get_answer_history(profile, limit)
     
   @classmethod
   def generate_id(cls):
@@ -201,31 +557,279 @@ class ProfileManager:
     Returns:
     int: A unique ID.
     """
-    return generate_unique_id(LAST_ID_PROFILES)
-  
+    return profile_ids.allocate()
+
+
+class ProfileSaver:
+  """
+  A write-behind recorder for practice answers.
+
+  Each answer is appended to the profile's answer log in storage, which costs O(1)
+  whatever the size of the profile. Buffered answers are flushed to disk once every `save_every` answers,
+  once `interval` seconds have passed since the last flush (checked when an answer is
+  recorded), when the saver is closed, and when the process exits or is terminated.
+  Once the log holds `compact_every` answers it is folded back into the profile snapshot.
+  Use it as a context manager around a practice session.
+  """
+
+  def __init__(self, profile, interval=PROFILE_SAVE_INTERVAL, save_every=PROFILE_SAVE_EVERY, compact_every=ANSWER_LOG_COMPACT_EVERY):
+    """
+    Initializes a new ProfileSaver.
+
+    Args:
+      profile (Profile): The profile to save.
+      interval (float): Maximum number of seconds between flushes while answers arrive.
+      save_every (int): Number of answers after which the log is flushed.
+      compact_every (int): Number of logged answers after which the log is folded into the snapshot.
+    """
+    self._profile = profile
+    self._answer_log = None
+    self._interval = interval
+    self._save_every = save_every
+    self._compact_every = compact_every
+    self._pending = 0
+    self._last_flush = time.monotonic()
+    self._previous_handler = None
+
+  @property
+  def pending(self):
+    """
+    int: Number of answers recorded since the last flush.
+    """
+    return self._pending
+
+  def record(self, question_id, correct):
+    """
+    Records an answer, flushing the log if a threshold is reached.
+
+    Args:
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+    """
+    self._answer_log.append(question_id, correct)
+    self._profile.answer_logged(question_id, correct)
+    StatisticsManager.record_answer(self._profile._id, question_id, correct)
+    self._pending += 1
+    if self._pending >= self._save_every or time.monotonic() - self._last_flush >= self._interval:
+      self.flush()
+
+  @instrumented("ProfileSaver.flush")
+  def flush(self):
+    """
+    Writes buffered answers to disk and compacts the log if it has grown too long.
+    """
+    if self._pending:
+      self._answer_log.flush()
+      StatisticsManager.flush()
+      self._pending = 0
+    if len(self._answer_log) >= self._compact_every:
+      self.compact()
+    self._last_flush = time.monotonic()
+
+  def compact(self):
+    """
+    Folds the answer log into the profile snapshot and starts a new log.
+    """
+    self._answer_log.close()
+    ProfileManager.save_to_json(self._profile)
+    self._answer_log = ProfileManager.open_answer_log(self._profile)
+
+  def _handle_sigterm(self, signum, frame):
+    self.flush()
+    if callable(self._previous_handler):
+      self._previous_handler(signum, frame)
+    else:
+      raise SystemExit(128 + signum)
+
+  def open(self):
+    """
+    Opens the answer log and registers the exit and SIGTERM hooks that flush it.
+    """
+    self._answer_log = ProfileManager.open_answer_log(self._profile)
+    atexit.register(self.flush)
+    if threading.current_thread() is threading.main_thread():
+      self._previous_handler = signal.signal(signal.SIGTERM, self._handle_sigterm)
+
+  def close(self):
+    """
+    Flushes and closes the answer log and removes the exit and SIGTERM hooks.
+    """
+    self.flush()
+    self._answer_log.close()
+    atexit.unregister(self.flush)
+    if self._previous_handler is not None:
+      signal.signal(signal.SIGTERM, self._previous_handler)
+      self._previous_handler = None
+
+  def __enter__(self):
+    self.open()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+class ResultManager:
+  """
+  A class to record and query test results.
+  """
   @classmethod
-  def add_new_questions_to_each_profile(cls, questions):
+  @instrumented("ResultManager.record")
+  def record(cls, profile_id, answers, duration):
     """
-    Adds new questions to each profile.
-    
+    Records the result of a test.
+
     Args:
-    questions (list): A list of Question objects to be added to each profile.
+      profile_id (int): The ID of the profile that took the test.
+      answers (list): (question ID, correct, seconds taken) tuples, in the order the
+        questions were asked.
+      duration (float): How long the whole test took, in seconds.
+
+    Returns:
+      dict: The stored record.
     """
-    profiles = cls.load_profiles()
-    
-    for profile_data in profiles:
-      profile = Profile.from_dict(profile_data)
-      
-      for question in questions:
-        question_stats = {
-          "id": question._id,
-          "times_shown": 0,
-          "correct_answers": 0,
-          "selection_probability": 1
-          }
-        profile._questions_stats.append(question_stats)
-        
-      cls.save_to_json(profile)
-    
-    
-    
\ No newline at end of file
+    return results.append(profile_id, answers, duration)
+
+  @classmethod
+  def recent(cls, profile_id, limit=20):
+    """
+    Gets the last tests of a profile.
+
+    Args:
+      profile_id (int): The ID of the profile.
+      limit (int): The maximum number of tests to return.
+
+    Returns:
+      list: The test records, oldest first.
+    """
+    return results.recent(profile_id, limit)
+
+  @classmethod
+  def between(cls, first_day, last_day):
+    """
+    Gets the tests taken between two days.
+
+    Args:
+      first_day (datetime.date): The first day, included.
+      last_day (datetime.date): The last day, included.
+
+    Returns:
+      list: The test records, in the order they were stored.
+    """
+    return results.between(first_day, last_day)
+
+  @classmethod
+  def question_stats(cls):
+    """
+    Gets how often every question was asked and failed across all tests.
+
+    Returns:
+      dict: {"asked", "failed", "failure_rate"} dictionaries by question ID.
+    """
+    return results.question_stats()
+
+class StatisticsManager:
+  """
+  A class to maintain and query answer totals across all profiles.
+  """
+  @classmethod
+  def record_answer(cls, profile_id, question_id, correct, timestamp=None):
+    """
+    Adds a practice answer to the totals. It is buffered until the totals are flushed.
+
+    Args:
+      profile_id (int): The ID of the profile that answered.
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+      timestamp (int): Unix time of the answer, defaults to now.
+    """
+    aggregates.record(profile_id, question_id, 1, correct, timestamp)
+
+  @classmethod
+  def flush(cls):
+    """
+    Writes buffered answers to the totals.
+    """
+    aggregates.flush()
+
+  @classmethod
+  @instrumented("StatisticsManager.rebuild")
+  def rebuild(cls):
+    """
+    Recreates the totals from the statistics and answer history of every profile.
+    """
+    def answers():
+      for profile_data in storage.load_profiles():
+        profile = storage.load_profile(profile_data)
+        last_seen = {}
+        for question_id, _, timestamp in storage.get_answer_history(profile, None):
+          last_seen[question_id] = timestamp
+        for question_id, times_shown, correct_answers, _ in profile.stats.rows():
+          if times_shown:
+            yield profile._id, question_id, times_shown, correct_answers, last_seen.get(question_id)
+
+    aggregates.rebuild(answers())
+
+  @classmethod
+  def get_aggregates(cls):
+    """
+    Gets the totals, building them from the profiles the first time.
+
+    Returns:
+      AggregateStore: The totals.
+    """
+    if not aggregates.exists():
+      cls.rebuild()
+    return aggregates
+
+  @classmethod
+  def question_totals(cls, question_id):
+    """
+    Gets the totals of a question across all profiles.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      dict: The question's "shown", "correct", "accuracy" and "last_seen", or None if it
+        was never answered.
+    """
+    return cls.get_aggregates().question(question_id)
+
+  @classmethod
+  def profile_totals(cls, profile_id):
+    """
+    Gets the totals of a profile across all questions.
+
+    Args:
+      profile_id (int): The ID of the profile.
+
+    Returns:
+      dict: The profile's "shown", "correct", "accuracy" and "last_seen", or None if it
+        never answered.
+    """
+    return cls.get_aggregates().profile(profile_id)
+
+  @classmethod
+  @instrumented("StatisticsManager.report")
+  def report(cls, kind, limit=10, min_shown=1):
+    """
+    Ranks questions or profiles by their totals.
+
+    Args:
+      kind (str): "hardest" for the questions with the lowest accuracy, "practised" for
+        the most shown questions or "leaderboard" for the profiles with the most correct
+        answers.
+      limit (int): The maximum number of rows.
+      min_shown (int): The number of answers a question needs to rank among the hardest.
+
+    Returns:
+      list: The totals of the ranked questions or profiles, with their "id".
+    """
+    store = cls.get_aggregates()
+    if kind == "hardest":
+      return store.hardest_questions(limit, min_shown)
+    if kind == "practised":
+      return store.most_practised_questions(limit)
+    if kind == "leaderboard":
+      return store.leaderboard(limit)
+    raise ValueError(f"unknown report {kind!r}")
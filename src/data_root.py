@@ -0,0 +1,41 @@
+import os
+from config import DATA_DIR
+
+class DataRoot:
+  """
+  The files of one data directory: the questions, the profiles, the last-ID files, the
+  SQLite database, the test results and the cohort aggregates.
+
+  Each process, test or tenant can use its own data directory by passing a DataRoot to
+  controller.use_data_root. The default one comes from config.DATA_DIR, which can be set
+  with the LEARNING_TOOL_DATA_DIR environment variable.
+  """
+
+  def __init__(self, path=DATA_DIR):
+    """
+    Initializes a DataRoot. Nothing is created on disk until `create` is called.
+
+    Args:
+      path (str): The data directory.
+    """
+    self.path = os.path.abspath(path)
+    self.questions_file = os.path.join(self.path, "questions.json")
+    self.profiles_folder = os.path.join(self.path, "profiles")
+    self.last_id_questions = os.path.join(self.path, "last_id_questions.txt")
+    self.last_id_profiles = os.path.join(self.path, "last_id_profiles.txt")
+    self.database_file = os.path.join(self.path, "learning_tool.db")
+    self.results_file = os.path.join(self.path, "results.jsonl")
+    self.aggregates_file = os.path.join(self.path, "aggregates.json")
+
+  def __repr__(self):
+    return f"DataRoot({self.path!r})"
+
+  def create(self):
+    """
+    Creates the data directory and its profiles folder if they don't exist.
+
+    Returns:
+      DataRoot: The data root itself.
+    """
+    os.makedirs(self.profiles_folder, exist_ok=True)
+    return self
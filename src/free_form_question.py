@@ -1,11 +1,12 @@
 import json
 from question import Question
+from grading import grade_answer
 
 class FreeFormQuestion(Question): 
   """
   A class to represent a free-form question.
   """
-  def __init__(self, question_text, answer,status=True):
+  def __init__(self, question_text, answer,status=True, question_id=None, alternatives=None):
     """
     Initializes a new FreeFormQuestion object.
     
@@ -13,19 +14,25 @@ class FreeFormQuestion(Question):
     question_text (str): The text of the question.
     answer (str): The correct answer for the question.
     status (bool): The status of the question (True for active, False for inactive).
+    question_id (int): The ID of an existing question. A new ID is allocated if omitted.
+    alternatives (list): Other answers that are accepted as correct.
     """
-    super().__init__(question_text, status)
+    super().__init__(question_text, status, question_id)
     self._answer = answer
+    self._alternatives = list(alternatives or [])
     self._type = "quiz"
   
   def to_dict(self):
-    return {
+    question_dict = {
       'type': 'freeform',
       'id': self._id,
       'question_text': self._question_text,
       'status': self._status,
       'answer': self._answer
     }
+    if self._alternatives:
+      question_dict['alternatives'] = self._alternatives
+    return question_dict
     
   @classmethod
   def from_json(cls, json_str):
@@ -33,7 +40,7 @@ class FreeFormQuestion(Question):
     question_text = data['question_text']
     answer = data['answer']
     status = data['status']
-    return cls(question_text, answer, status)
+    return cls(question_text, answer, status, data.get('id'), data.get('alternatives'))
   
   def check_answer(self, answer): 
-    return self._answer == answer  
\ No newline at end of file
+    return grade_answer(answer, self._answer, self._alternatives)  
\ No newline at end of file
@@ -0,0 +1,161 @@
+import re
+import unicodedata
+from functools import lru_cache
+from config import GRADING_MAX_EDIT_DISTANCE, GRADING_FUZZY_MIN_LENGTH, GRADING_CACHE_SIZE
+from instrumentation import instrumented
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalize_answer(text):
+  """
+  Normalize an answer for comparison.
+
+  Unicode compatibility forms are unified, case is folded and runs of whitespace are
+  collapsed to single spaces.
+
+  Args:
+    text (str): The answer.
+
+  Returns:
+    str: The normalized answer.
+  """
+  return WHITESPACE.sub(' ', unicodedata.normalize("NFKC", text).casefold()).strip()
+
+@lru_cache(maxsize=GRADING_CACHE_SIZE)
+def accepted_answers(answer, alternatives=()):
+  """
+  Get the normalized answers a free-form question accepts.
+
+  Results are cached, so a question's answers are only normalized the first time it is
+  graded.
+
+  Args:
+    answer (str): The answer of the question.
+    alternatives (tuple): Other acceptable answers.
+
+  Returns:
+    frozenset: The normalized acceptable answers.
+  """
+  return frozenset(normalize_answer(text) for text in (answer, *alternatives))
+
+def within_edit_distance(first, second, limit):
+  """
+  Check whether two strings are at most `limit` insertions, deletions or substitutions apart.
+
+  Only the diagonal band of the Levenshtein table that can stay within the limit is
+  computed, after trimming the common prefix and suffix, and the computation stops as
+  soon as a whole row exceeds the limit, so the cost is O(limit * length) at worst.
+
+  Args:
+    first (str): The first string.
+    second (str): The second string.
+    limit (int): The maximum edit distance.
+
+  Returns:
+    bool: True if the edit distance is at most `limit`.
+  """
+  if first == second:
+    return True
+  if abs(len(first) - len(second)) > limit:
+    return False
+
+  # A common prefix and suffix never cost edits, and a single typo leaves little else.
+  start = 0
+  shortest = min(len(first), len(second))
+  while start < shortest and first[start] == second[start]:
+    start += 1
+  end = 0
+  while end < shortest - start and first[-1 - end] == second[-1 - end]:
+    end += 1
+  first = first[start:len(first) - end]
+  second = second[start:len(second) - end]
+
+  if len(first) > len(second):
+    first, second = second, first
+  if not first:
+    return len(second) <= limit
+
+  too_far = limit + 1
+  previous = [min(j, too_far) for j in range(len(second) + 1)]
+  for i in range(1, len(first) + 1):
+    character = first[i - 1]
+    low = max(1, i - limit)
+    high = min(len(second), i + limit)
+    current = [too_far] * (len(second) + 1)
+    current[0] = min(i, too_far)
+    row_minimum = current[low - 1]
+
+    for j in range(low, high + 1):
+      distance = previous[j - 1] + (character != second[j - 1])
+      if previous[j] < distance:
+        distance = previous[j] + 1
+      if current[j - 1] < distance:
+        distance = current[j - 1] + 1
+      if distance > too_far:
+        distance = too_far
+      current[j] = distance
+      if distance < row_minimum:
+        row_minimum = distance
+
+    if row_minimum > limit:
+      return False
+    previous = current
+
+  return previous[len(second)] <= limit
+
+def grade_answer(response, answer, alternatives=(), max_distance=GRADING_MAX_EDIT_DISTANCE):
+  """
+  Grade a response to a free-form question.
+
+  The response is correct if its normalized form equals one of the accepted answers, or
+  is within `max_distance` edits of an accepted answer of at least
+  GRADING_FUZZY_MIN_LENGTH characters. Shorter answers must match exactly.
+
+  Args:
+    response (str): The response to grade.
+    answer (str): The answer of the question.
+    alternatives (iterable): Other acceptable answers.
+    max_distance (int): The number of typos to forgive, 0 for exact matching.
+
+  Returns:
+    bool: True if the response is correct.
+  """
+  accepted = accepted_answers(answer, tuple(alternatives))
+  response = normalize_answer(response)
+  if response in accepted:
+    return True
+
+  if max_distance > 0:
+    for accepted_answer in accepted:
+      if len(accepted_answer) >= GRADING_FUZZY_MIN_LENGTH and within_edit_distance(response, accepted_answer, max_distance):
+        return True
+  return False
+
+@instrumented("grade_question")
+def grade_question(question, response):
+  """
+  Grade a response to a question.
+
+  Args:
+    question (dict): The question, as stored in the questions file.
+    response: The index of the chosen option for a quiz question, or the answer text for
+      a free-form question.
+
+  Returns:
+    bool: True if the response is correct.
+  """
+  if question["type"] == "quiz":
+    return response == question["answer_index"]
+  return grade_answer(response, question["answer"], question.get("alternatives", ()))
+
+def grade_many(questions_and_responses):
+  """
+  Grade many responses.
+
+  Args:
+    questions_and_responses (iterable): (question, response) pairs, as taken by grade_question.
+
+  Returns:
+    list: True or False for each response.
+  """
+  return [grade_question(question, response) for question, response in questions_and_responses]
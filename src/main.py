@@ -1,7 +1,144 @@
+import argparse
+import asyncio
+import os
+import datetime
+from functools import partial
+from config import STORAGE_BACKEND, DATA_DIR, SERVER_HOST, SERVER_PORT
+from controller import QuestionManager, ProfileManager, StatisticsManager, use_data_root
+from data_root import DataRoot
+from aggregates import AggregateStore
+from instrumentation import profile_session
+from storage import SqliteStorage, create_storage, migrate_json_to_sqlite, convert_profile_stats
 from terminal_ui import TerminalUI
+from batch_grading import grade_submissions
+from quiz_server import serve
+
+# Number of grading errors printed by the grade command
+MAX_PRINTED_ERRORS = 20
+
+def migrate(args, data_root):
+  database = args.database or data_root.database_file
+  if os.path.exists(database):
+    print(f"{database} already exists, remove it first to migrate again.")
+    return
+  
+  question_count, profile_count = migrate_json_to_sqlite(create_storage("json", data_root), SqliteStorage(database))
+  print(f"Imported {question_count} questions and {profile_count} profiles into {database}.")
+
+def convert_profiles(args, data_root):
+  profile_count = convert_profile_stats(data_root.profiles_folder, args.format, data_root.questions_file)
+  print(f"Converted {profile_count} profiles to {args.format} statistics.")
+  print(f"Set PROFILE_STATS_FORMAT = \"{args.format}\" in config.py to keep saving them that way.")
+
+def import_command(args):
+  imported, existing, errors = QuestionManager.import_questions(args.file, args.format)
+  for line_number, error in errors:
+    print(f"Line {line_number}: {error}")
+  print(f"Imported {imported} questions, skipped {existing} existing questions and {len(errors)} invalid rows.")
+
+def export_command(args):
+  exported = QuestionManager.export_questions(args.file, args.format)
+  print(f"Exported {exported} questions to {args.file}.")
+
+def grade_command(args, data_root):
+  profiles, errors = grade_submissions(
+    args.file, partial(create_storage, args.storage, data_root), args.format, args.workers, partial(AggregateStore, data_root.aggregates_file)
+  )
+  for line_number, error in errors[:MAX_PRINTED_ERRORS]:
+    print(f"Line {line_number}: {error}" if line_number is not None else error)
+  if len(errors) > MAX_PRINTED_ERRORS:
+    print(f"... and {len(errors) - MAX_PRINTED_ERRORS} more errors")
+
+  for profile_id, (graded, correct) in sorted(profiles.items()):
+    print(f"Profile {profile_id}: {correct} of {graded} correct ({correct / graded * 100:.2f}%)")
+  graded = sum(graded for graded, _ in profiles.values())
+  correct = sum(correct for _, correct in profiles.values())
+  percentage = correct / graded * 100 if graded else 0
+  print(f"Graded {graded} answers for {len(profiles)} profiles, {correct} correct ({percentage:.2f}%), skipped {len(errors)} with errors.")
+
+def report_command(args):
+  if args.rebuild:
+    StatisticsManager.rebuild()
+  rows = StatisticsManager.report(args.kind, args.limit, args.min_shown)
+  names = {profile["id"]: profile["name"] for profile in ProfileManager.list_profiles()} if args.kind == "leaderboard" else {}
+
+  for rank, row in enumerate(rows, start=1):
+    name = names.get(row["id"], f"Profile {row['id']}") if args.kind == "leaderboard" else f"Question {row['id']}"
+    last_seen = datetime.datetime.fromtimestamp(row["last_seen"]).strftime("%Y-%m-%d %H:%M:%S") if row["last_seen"] else "unknown"
+    print(f"{rank}. {name}: {row['correct']} of {row['shown']} correct ({row['accuracy']:.2f}%), last answered {last_seen}")
+  if not rows:
+    print("No answers recorded yet.")
 
 def main():
+  parser = argparse.ArgumentParser(description="Interactive Learning Tool")
+  parser.add_argument("--storage", choices=["json", "sqlite"], default=STORAGE_BACKEND, help="storage backend for questions and profiles")
+  parser.add_argument("--data-dir", default=DATA_DIR, help="data directory to use instead of data/ (also set by LEARNING_TOOL_DATA_DIR)")
+  parser.add_argument("--profile", action="store_true", help="time the main operations and print a summary at exit")
+  parser.add_argument("--profile-file", help="also run the session under cProfile and save its statistics to this file")
+  subparsers = parser.add_subparsers(dest="command")
+  
+  migrate_parser = subparsers.add_parser("migrate", help="import the data directory into a SQLite database")
+  migrate_parser.add_argument("--database", help="SQLite database file to create, learning_tool.db in the data directory by default")
+  
+  convert_parser = subparsers.add_parser("convert-profiles", help="rewrite profile statistics as JSON or as binary snapshots")
+  convert_parser.add_argument("format", choices=["json", "binary"], help="format to convert to")
+  
+  import_parser = subparsers.add_parser("import", help="add questions from a JSONL or CSV file")
+  import_parser.add_argument("file", help="file to import")
+  import_parser.add_argument("--format", choices=["jsonl", "csv"], help="file format, detected from the extension by default")
+  
+  export_parser = subparsers.add_parser("export", help="write all questions to a JSONL or CSV file")
+  export_parser.add_argument("file", help="file to write")
+  export_parser.add_argument("--format", choices=["jsonl", "csv"], help="file format, detected from the extension by default")
+  
+  grade_parser = subparsers.add_parser("grade", help="grade a JSONL or CSV file of profile_id, question_id, answer records")
+  grade_parser.add_argument("file", help="file to grade")
+  grade_parser.add_argument("--format", choices=["jsonl", "csv"], help="file format, detected from the extension by default")
+  grade_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+  
+  serve_parser = subparsers.add_parser("serve", help="run the multi-user quiz server")
+  serve_parser.add_argument("--host", default=SERVER_HOST, help="address to listen on")
+  serve_parser.add_argument("--port", type=int, default=SERVER_PORT, help="port to listen on")
+  
+  report_parser = subparsers.add_parser("report", help="rank questions or learners by their answers across all profiles")
+  report_parser.add_argument("kind", choices=["hardest", "practised", "leaderboard"], help="hardest questions, most practised questions or learners with the most correct answers")
+  report_parser.add_argument("--limit", type=int, default=10, help="number of rows")
+  report_parser.add_argument("--min-shown", type=int, default=1, help="answers a question needs to rank among the hardest")
+  report_parser.add_argument("--rebuild", action="store_true", help="recompute the totals from the profiles first")
+  
+  args = parser.parse_args()
+  data_root = DataRoot(args.data_dir)
+  if args.profile or args.profile_file:
+    profile_session(args.profile_file)
+  
+  if args.command == "migrate":
+    migrate(args, data_root)
+    return
+  if args.command == "convert-profiles":
+    convert_profiles(args, data_root)
+    return
+  if args.command == "grade":
+    grade_command(args, data_root)
+    return
+  
+  use_data_root(data_root, args.storage)
+  
+  if args.command == "serve":
+    asyncio.run(serve(args.host, args.port))
+    return
+  
+  if args.command == "import":
+    import_command(args)
+    return
+  if args.command == "export":
+    export_command(args)
+    return
+  if args.command == "report":
+    report_command(args)
+    return
+  
   terminal_ui = TerminalUI()
   terminal_ui.run()
   
-main()
\ No newline at end of file
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,319 @@
+from array import array
+from collections.abc import Mapping
+
+def calculate_new_probability(question_stats):
+  """
+  Calculates a new selection probability for a question based on its statistics.
+
+  Args:
+    question_stats (dict): A dictionary containing question statistics.
+
+  Returns:
+    float: The new selection probability.
+  """
+  return probability_from_counts(question_stats["times_shown"], question_stats["correct_answers"])
+
+def probability_from_counts(times_shown, correct_answers):
+  """
+  Calculates a selection probability from how often a question was shown and answered correctly.
+
+  Args:
+    times_shown (int): Number of times the question was shown.
+    correct_answers (int): Number of correct answers.
+
+  Returns:
+    float: The selection probability.
+  """
+  incorrect_answers = times_shown - correct_answers
+
+  new_probability = 1 - (incorrect_answers / (times_shown + 1))
+  return new_probability
+
+def default_question_stats(question_id):
+  """
+  Creates the statistics of a question that hasn't been answered yet.
+
+  Profiles only store statistics for questions they have answered, so a missing entry
+  means these defaults.
+
+  Args:
+    question_id (int): The ID of the question.
+
+  Returns:
+    dict: Zeroed statistics with a selection probability of 1.
+  """
+  return {
+    "id": question_id,
+    "times_shown": 0,
+    "correct_answers": 0,
+    "selection_probability": 1
+  }
+
+STATS_KEYS = ("id", "times_shown", "correct_answers", "selection_probability")
+
+class QuestionStats(Mapping):
+  """
+  A live, read-only view of one question's statistics in a ProfileStats.
+
+  It reads like the statistics dictionaries of the JSON schema, and shows the defaults
+  until the question is first answered.
+  """
+  __slots__ = ("_stats", "_question_id")
+
+  def __init__(self, stats, question_id):
+    self._stats = stats
+    self._question_id = question_id
+
+  def __getitem__(self, key):
+    if key == "id":
+      return self._question_id
+    if key == "times_shown":
+      return self._stats.times_shown(self._question_id)
+    if key == "correct_answers":
+      return self._stats.correct_answers(self._question_id)
+    if key == "selection_probability":
+      return self._stats.selection_probability(self._question_id)
+    raise KeyError(key)
+
+  def __iter__(self):
+    return iter(STATS_KEYS)
+
+  def __len__(self):
+    return len(STATS_KEYS)
+
+  def __repr__(self):
+    return repr(dict(self))
+
+class ProfileStats:
+  """
+  Per-question statistics of a profile, stored in parallel arrays.
+
+  A question ID maps to a slot in the `times_shown`, `correct_answers` and
+  `selection_probability` arrays, so lookups and updates are O(1) and each answered
+  question costs a few bytes instead of a dictionary. Questions without a slot haven't
+  been answered and have the default statistics.
+  """
+  __slots__ = ("_slots", "_ids", "_times_shown", "_correct_answers", "_selection_probability")
+
+  def __init__(self):
+    self._slots = {}
+    self._ids = array('q')
+    self._times_shown = array('l')
+    self._correct_answers = array('l')
+    self._selection_probability = array('d')
+
+  @classmethod
+  def from_list(cls, questions_stats):
+    """
+    Creates the statistics from the list of dictionaries used in the JSON schema.
+
+    Args:
+      questions_stats (list): A list of question statistics dictionaries.
+
+    Returns:
+      ProfileStats: The statistics.
+    """
+    stats = cls()
+    for question_stats in questions_stats:
+      slot = stats._slot(question_stats["id"])
+      stats._times_shown[slot] = question_stats["times_shown"]
+      stats._correct_answers[slot] = question_stats["correct_answers"]
+      stats._selection_probability[slot] = question_stats["selection_probability"]
+    return stats
+
+  @classmethod
+  def from_rows(cls, rows):
+    """
+    Creates the statistics from rows with distinct question IDs.
+
+    Args:
+      rows (iterable): (question ID, times shown, correct answers, selection probability) tuples.
+
+    Returns:
+      ProfileStats: The statistics.
+    """
+    columns = list(zip(*rows)) or [(), (), (), ()]
+    return cls.from_columns(*columns)
+
+  @classmethod
+  def from_columns(cls, ids, times_shown, correct_answers, selection_probability):
+    """
+    Creates the statistics from one sequence per field, indexed alike, with distinct question IDs.
+
+    Args:
+      ids (iterable): The question IDs.
+      times_shown (iterable): Number of times each question was shown.
+      correct_answers (iterable): Number of correct answers to each question.
+      selection_probability (iterable): The selection probability of each question.
+
+    Returns:
+      ProfileStats: The statistics.
+    """
+    stats = cls()
+    stats._ids = array('q', ids)
+    stats._times_shown = array('l', times_shown)
+    stats._correct_answers = array('l', correct_answers)
+    stats._selection_probability = array('d', selection_probability)
+    stats._slots = dict(zip(stats._ids, range(len(stats._ids))))
+    return stats
+
+  def to_list(self):
+    """
+    Converts the statistics to the list of dictionaries used in the JSON schema.
+
+    Returns:
+      list: A list of question statistics dictionaries.
+    """
+    return [
+      {"id": question_id, "times_shown": times_shown, "correct_answers": correct_answers, "selection_probability": selection_probability}
+      for question_id, times_shown, correct_answers, selection_probability in self.rows()
+    ]
+
+  def rows(self):
+    """
+    Iterates over the stored statistics.
+
+    Returns:
+      iterator: (question ID, times shown, correct answers, selection probability) tuples.
+    """
+    return zip(self._ids, self._times_shown, self._correct_answers, self._selection_probability)
+
+  def columns(self):
+    """
+    Gets the arrays the statistics are stored in, indexed alike.
+
+    The arrays are live: changing an element changes the statistics. New questions can't
+    be recorded while a buffer exported from them, such as a NumPy view, is alive.
+
+    Returns:
+      tuple: The question ID, times shown, correct answers and selection probability arrays.
+    """
+    return self._ids, self._times_shown, self._correct_answers, self._selection_probability
+
+  def __len__(self):
+    return len(self._ids)
+
+  def __contains__(self, question_id):
+    return question_id in self._slots
+
+  def __iter__(self):
+    return iter(self._ids)
+
+  def _slot(self, question_id):
+    slot = self._slots.get(question_id)
+    if slot is None:
+      slot = len(self._ids)
+      self._slots[question_id] = slot
+      self._ids.append(question_id)
+      self._times_shown.append(0)
+      self._correct_answers.append(0)
+      self._selection_probability.append(1.0)
+    return slot
+
+  def times_shown(self, question_id):
+    slot = self._slots.get(question_id)
+    return 0 if slot is None else self._times_shown[slot]
+
+  def correct_answers(self, question_id):
+    slot = self._slots.get(question_id)
+    return 0 if slot is None else self._correct_answers[slot]
+
+  def selection_probability(self, question_id):
+    slot = self._slots.get(question_id)
+    return 1 if slot is None else self._selection_probability[slot]
+
+  def view(self, question_id):
+    """
+    Gets a live view of a question's statistics.
+
+    Args:
+      question_id (int): The ID of the question.
+
+    Returns:
+      QuestionStats: The view.
+    """
+    return QuestionStats(self, question_id)
+
+  def record(self, question_id, correct):
+    """
+    Records an answer to a question and recalculates its selection probability.
+
+    Args:
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+
+    Returns:
+      float: The new selection probability.
+    """
+    slot = self._slot(question_id)
+    self._times_shown[slot] += 1
+    if correct:
+      self._correct_answers[slot] += 1
+    probability = probability_from_counts(self._times_shown[slot], self._correct_answers[slot])
+    self._selection_probability[slot] = probability
+    return probability
+
+  def record_many(self, answers):
+    """
+    Records many answers at once, recalculating the affected probabilities in one pass.
+
+    Args:
+      answers (iterable): (question ID, correct) pairs.
+    """
+    touched = set()
+    for question_id, correct in answers:
+      slot = self._slot(question_id)
+      self._times_shown[slot] += 1
+      if correct:
+        self._correct_answers[slot] += 1
+      touched.add(slot)
+
+    for slot in touched:
+      self._selection_probability[slot] = probability_from_counts(self._times_shown[slot], self._correct_answers[slot])
+
+  def add_counts(self, counts, engine=None):
+    """
+    Adds aggregated answers, recalculating the affected probabilities once.
+
+    Args:
+      counts (dict): (times shown, correct answers) to add, by question ID.
+      engine: The stats engine to recalculate every probability with in one pass, or None
+        to recalculate the affected ones one at a time.
+    """
+    for question_id, (times_shown, correct_answers) in counts.items():
+      slot = self._slot(question_id)
+      self._times_shown[slot] += times_shown
+      self._correct_answers[slot] += correct_answers
+      if engine is None:
+        self._selection_probability[slot] = probability_from_counts(self._times_shown[slot], self._correct_answers[slot])
+    if engine is not None:
+      engine.recalculate_probabilities(self)
+
+  def replace(self, other):
+    """
+    Replaces the statistics with a copy of another's, in place.
+
+    Args:
+      other (ProfileStats): The statistics to copy.
+    """
+    self._ids = array('q', other._ids)
+    self._times_shown = array('l', other._times_shown)
+    self._correct_answers = array('l', other._correct_answers)
+    self._selection_probability = array('d', other._selection_probability)
+    self._slots = dict(other._slots)
+
+  def set_selection_probability(self, question_id, probability):
+    """
+    Sets the selection probability of a question.
+
+    Args:
+      question_id (int): The ID of the question.
+      probability (float): The new selection probability.
+    """
+    self._selection_probability[self._slot(question_id)] = probability
+
+  def recalculate_probabilities(self):
+    """
+    Recalculates the selection probability of every stored question from its counts.
+    """
+    self._selection_probability = array('d', map(probability_from_counts, self._times_shown, self._correct_answers))
@@ -7,8 +7,16 @@ class Question(ABC):
   A base class representing a question.
   """
   
-  def __init__(self, question_text, status=True):
-    self._id = QuestionManager.generate_id()
+  def __init__(self, question_text, status=True, question_id=None):
+    """
+    Initializes a new question.
+
+    Args:
+        question_text: The text of the question.
+        status: The status of the question (True for active, False for inactive).
+        question_id: The ID of an existing question. A new ID is allocated if omitted.
+    """
+    self._id = question_id if question_id is not None else QuestionManager.generate_id()
     self._question_text = question_text 
     self._status = status
     
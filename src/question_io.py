@@ -0,0 +1,209 @@
+import csv
+import json
+import os
+from config import IMPORT_BATCH_SIZE
+from quiz_question import QuizQuestion
+from free_form_question import FreeFormQuestion
+
+CSV_FIELDS = ["type", "id", "question_text", "status", "answer", "answer_index", "options", "alternatives"]
+
+# Separates the options of a quiz question, or the alternative answers of a free-form one, in a CSV cell
+OPTION_SEPARATOR = "|"
+
+def detect_format(file_name, file_format=None):
+  """
+  Work out the format of a question file from its extension.
+
+  Args:
+    file_name (str): Name of the file.
+    file_format (str): "jsonl" or "csv" to override the extension.
+
+  Returns:
+    str: "jsonl" or "csv".
+  """
+  if file_format is None:
+    file_format = os.path.splitext(file_name)[1].lstrip(".").lower()
+  if file_format not in ("jsonl", "csv"):
+    raise ValueError(f"Unsupported question file format: {file_format}")
+  return file_format
+
+def _parse_status(value):
+  if isinstance(value, bool):
+    return value
+  if value is None or value == "":
+    return True
+  if str(value).strip().lower() in ("true", "1", "yes"):
+    return True
+  if str(value).strip().lower() in ("false", "0", "no"):
+    return False
+  raise ValueError(f"invalid status {value!r}")
+
+def _parse_csv_row(row):
+  data = {key: value for key, value in row.items() if value not in (None, "")}
+  for key in ("id", "answer_index"):
+    if key in data:
+      data[key] = int(data[key])
+  for key in ("options", "alternatives"):
+    if key in data:
+      data[key] = data[key].split(OPTION_SEPARATOR)
+  return data
+
+def validate_question_data(data):
+  """
+  Check a question dictionary read from an import file and normalize it.
+
+  Args:
+    data (dict): The question data.
+
+  Returns:
+    dict: The question data with the fields needed to create the question.
+  """
+  question_type = data.get("type")
+  question_text = str(data.get("question_text", "")).strip()
+  if not question_text:
+    raise ValueError("question_text is missing")
+  status = _parse_status(data.get("status"))
+
+  if question_type == "quiz":
+    options = data.get("options")
+    if not isinstance(options, list) or not 2 <= len(options) <= 5:
+      raise ValueError("a quiz question needs 2 to 5 options")
+    answer_index = data.get("answer_index")
+    if not isinstance(answer_index, int) or not 0 <= answer_index < len(options):
+      raise ValueError("answer_index is not the index of an option")
+    return {"type": "quiz", "question_text": question_text, "status": status, "answer_index": answer_index, "options": [str(option).strip() for option in options]}
+
+  if question_type == "freeform":
+    answer = str(data.get("answer", "")).strip()
+    if not answer:
+      raise ValueError("answer is missing")
+    alternatives = data.get("alternatives", [])
+    if not isinstance(alternatives, list):
+      raise ValueError("alternatives must be a list of answers")
+    alternatives = [str(alternative).strip() for alternative in alternatives if str(alternative).strip()]
+    return {"type": "freeform", "question_text": question_text, "status": status, "answer": answer, "alternatives": alternatives}
+
+  raise ValueError(f"unknown question type {question_type!r}")
+
+def question_from_data(data, question_id):
+  """
+  Create a question object from validated question data.
+
+  Args:
+    data (dict): Question data, as returned by validate_question_data.
+    question_id (int): The ID of the question.
+
+  Returns:
+    Question: A QuizQuestion or a FreeFormQuestion.
+  """
+  if data["type"] == "quiz":
+    return QuizQuestion(data["question_text"], data["answer_index"], data["options"], data["status"], question_id)
+  return FreeFormQuestion(data["question_text"], data["answer"], data["status"], question_id, data["alternatives"])
+
+def read_question_rows(file, file_format):
+  """
+  Read raw question rows from an open import file, one at a time.
+
+  Args:
+    file: The open file.
+    file_format (str): "jsonl" or "csv".
+
+  Yields:
+    tuple: The line number and a function returning the question dictionary of that line.
+  """
+  if file_format == "jsonl":
+    for line_number, line in enumerate(file, start=1):
+      if line.strip():
+        yield line_number, lambda line=line: json.loads(line)
+  else:
+    reader = csv.DictReader(file)
+    for row in reader:
+      yield reader.line_num, lambda row=row: _parse_csv_row(row)
+
+def import_questions(file_name, storage, id_allocator, file_format=None, batch_size=IMPORT_BATCH_SIZE):
+  """
+  Stream questions from a JSONL or CSV file into storage.
+
+  Rows are validated one at a time and written in batches: each batch gets its IDs in one
+  reservation and is stored with one write, so memory use doesn't grow with the file.
+  Imported questions always get new IDs. Rows whose "id" is already a stored question
+  are skipped, so importing an export of the same storage adds nothing.
+
+  Args:
+    file_name (str): Name of the file to import.
+    storage (Storage): The storage to add the questions to.
+    id_allocator (IdAllocator): The allocator for the new question IDs.
+    file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+    batch_size (int): Number of questions written at a time.
+
+  Returns:
+    tuple: The number of imported questions, the number of rows skipped because their
+      question already exists, and a list of (line number, error) pairs for the invalid
+      rows that were skipped.
+  """
+  file_format = detect_format(file_name, file_format)
+  existing_ids = {question["id"] for question in storage.iter_questions()}
+  imported = 0
+  existing = 0
+  errors = []
+  batch = []
+
+  def write_batch():
+    first_id = id_allocator.allocate_many(len(batch))
+    storage.add_questions([question_from_data(data, first_id + i).to_dict() for i, data in enumerate(batch)])
+    batch.clear()
+
+  with open(file_name, 'r', newline='' if file_format == "csv" else None) as file:
+    for line_number, parse_row in read_question_rows(file, file_format):
+      try:
+        data = parse_row()
+        if data.get("id") in existing_ids:
+          existing += 1
+          continue
+        batch.append(validate_question_data(data))
+      except (ValueError, TypeError, AttributeError) as error:
+        errors.append((line_number, str(error)))
+        continue
+
+      if len(batch) >= batch_size:
+        imported += len(batch)
+        write_batch()
+
+  if batch:
+    imported += len(batch)
+    write_batch()
+
+  return imported, existing, errors
+
+def export_questions(file_name, questions, file_format=None):
+  """
+  Write questions to a JSONL or CSV file, one at a time.
+
+  Args:
+    file_name (str): Name of the file to write.
+    questions (iterable): Question dictionaries to export.
+    file_format (str): "jsonl" or "csv", detected from the extension if omitted.
+
+  Returns:
+    int: The number of exported questions.
+  """
+  file_format = detect_format(file_name, file_format)
+  exported = 0
+
+  with open(file_name, 'w', newline='' if file_format == "csv" else None) as file:
+    if file_format == "jsonl":
+      for question in questions:
+        file.write(json.dumps(question) + "\n")
+        exported += 1
+    else:
+      writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+      writer.writeheader()
+      for question in questions:
+        row = dict(question)
+        for key in ("options", "alternatives"):
+          if key in row:
+            row[key] = OPTION_SEPARATOR.join(row[key])
+        writer.writerow(row)
+        exported += 1
+
+  return exported
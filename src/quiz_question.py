@@ -6,7 +6,7 @@ class QuizQuestion(Question):
   A class to represent a quiz question.
   """
   
-  def __init__(self, question_text, answer_index, options,status=True):
+  def __init__(self, question_text, answer_index, options,status=True, question_id=None):
     """
     Initializes a new QuizQuestion object.
     
@@ -15,8 +15,9 @@ class QuizQuestion(Question):
     answer_index (int): The index of the correct answer in the options list.
     options (list): A list of strings representing the options for the question.
     status (bool): The status of the question (True for active, False for inactive).
+    question_id (int): The ID of an existing question. A new ID is allocated if omitted.
     """
-    super().__init__(question_text, status)
+    super().__init__(question_text, status, question_id)
     self._answer_index = answer_index
     self._options = options
     self._type = "quiz"
@@ -56,4 +57,4 @@ class QuizQuestion(Question):
     answer_index = data['answer_index']
     options = data['options']
     status = data['status']
-    return cls(question_text, answer_index, options, status)
\ No newline at end of file
+    return cls(question_text, answer_index, options, status, data.get('id'))
\ No newline at end of file
@@ -0,0 +1,558 @@
+import asyncio
+import json
+import random
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import SERVER_HOST, SERVER_PORT, PROFILE_SAVE_INTERVAL, PROFILE_SAVE_EVERY, ANSWER_LOG_COMPACT_EVERY
+from controller import ProfileManager, QuestionManager, ResultManager, StatisticsManager
+from batch_grading import grade_submission
+from user_profile import Profile
+
+def public_question(question):
+  """
+  Get the fields of a question that can be sent to a learner.
+
+  Args:
+    question (dict): The question, as stored in the questions file.
+
+  Returns:
+    dict: The question without its answer.
+  """
+  public = {"id": question["id"], "type": question["type"], "question_text": question["question_text"]}
+  if question["type"] == "quiz":
+    public["options"] = question["options"]
+  return public
+
+class StorageWriter:
+  """
+  Serializes every storage write of the server in a single task.
+
+  Sessions queue their writes and carry on. The writer takes whatever is queued, appends
+  the answers to the answer logs of their profiles and runs the other writes in order,
+  so concurrent sessions never write to a profile's files at the same time. Like
+  ProfileSaver, it flushes a profile's log once `save_every` answers are buffered or
+  `interval` seconds after its oldest buffered answer. Answers are buffered on the event
+  loop, and the file writes and fsyncs run one at a time in a dedicated thread, so the
+  sessions keep being served while the writer waits for the disk.
+
+  A snapshot holds the shared in-memory profile, which already includes answers whose
+  records may still be queued. Before a profile is snapshotted, its queued answers are
+  moved to its log, so they are folded into the snapshot instead of being logged on top
+  of it, and sessions wait with new answers to it until the snapshot is written.
+  """
+
+  def __init__(self, interval=PROFILE_SAVE_INTERVAL, save_every=PROFILE_SAVE_EVERY, compact_every=ANSWER_LOG_COMPACT_EVERY):
+    """
+    Initializes a new StorageWriter.
+
+    Args:
+      interval (float): Maximum number of seconds an answer stays buffered.
+      save_every (int): Number of buffered answers after which a log is flushed.
+      compact_every (int): Number of logged answers after which a log is folded into its profile snapshot.
+    """
+    self._interval = interval
+    self._save_every = save_every
+    self._compact_every = compact_every
+    self._queue = asyncio.Queue()
+    self._logs = {}
+
+    # Profiles with buffered answers, by ID, with their number and the time of the oldest
+    self._pending = {}
+
+    # Futures done once the snapshot in progress of a profile is written, by profile ID
+    self._saving = {}
+    self._task = None
+    self._executor = None
+
+  def start(self):
+    """
+    Starts the writer task and its I/O thread.
+    """
+    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-writer")
+    self._task = asyncio.create_task(self._run())
+
+  def record(self, profile, question_id, correct):
+    """
+    Queues an answer for the profile's answer log.
+
+    The profile's statistics must already include the answer, and be updated after
+    awaiting wait_until_saved.
+
+    Args:
+      profile (Profile): The profile.
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+    """
+    self._queue.put_nowait(("record", profile, (question_id, correct, int(time.time())), None))
+
+  async def wait_until_saved(self, profile):
+    """
+    Waits until no snapshot of a profile is being written. Sessions call it before
+    changing a profile, so snapshots never miss or half include a change.
+
+    Args:
+      profile (Profile): The profile.
+    """
+    saving = self._saving.get(profile._id)
+    while saving is not None:
+      await asyncio.shield(saving)
+      saving = self._saving.get(profile._id)
+
+  def _submit(self, operation, profile=None, argument=None):
+    future = asyncio.get_running_loop().create_future()
+    self._queue.put_nowait((operation, profile, argument, future))
+    return future
+
+  def save(self, profile):
+    """
+    Queues a full snapshot of a profile.
+
+    Returns:
+      Future: Done once the profile is saved.
+    """
+    return self._submit("save", profile)
+
+  def create(self, name):
+    """
+    Queues the creation of a profile.
+
+    Returns:
+      Future: The new Profile, once it is saved.
+    """
+    return self._submit("create", argument=name)
+
+  def release(self, profile):
+    """
+    Queues the closing of a profile's answer log, once no session uses the profile.
+
+    Returns:
+      Future: Done once the log is flushed and closed.
+    """
+    return self._submit("release", profile)
+
+  def test_result(self, profile, answers, duration):
+    """
+    Queues the result of a test for the results store.
+
+    Args:
+      profile (Profile): The profile that took the test.
+      answers (list): (question ID, correct, seconds taken) tuples.
+      duration (float): How long the whole test took, in seconds.
+
+    Returns:
+      Future: Done once the result is written.
+    """
+    return self._submit("test_result", profile, (answers, duration))
+
+  async def close(self):
+    """
+    Writes everything queued, closes the answer logs and stops the writer task.
+    """
+    if self._task is not None:
+      await self._submit("stop")
+      await self._task
+      self._task = None
+      self._executor.shutdown()
+      self._executor = None
+
+  def _io(self, function, *args):
+    return asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+  async def _log(self, profile):
+    answer_log = self._logs.get(profile._id)
+    if answer_log is None:
+      answer_log = self._logs[profile._id] = await self._io(ProfileManager.open_answer_log, profile)
+    return answer_log
+
+  async def _close_log(self, profile_id):
+    self._pending.pop(profile_id, None)
+    answer_log = self._logs.pop(profile_id, None)
+    if answer_log is not None:
+      await self._io(answer_log.close)
+
+  async def _record(self, profile, argument):
+    answer_log = await self._log(profile)
+    answer_log.append(*argument)
+    profile.answer_logged(*argument[:2])
+    StatisticsManager.record_answer(profile._id, *argument)
+    pending = self._pending.setdefault(profile._id, [profile, 0, time.monotonic()])
+    pending[1] += 1
+
+  def _take_records(self, profile, batch):
+    """
+    Moves a profile's queued answers out of the batch, after moving everything queued into it.
+
+    Returns:
+      list: The answers, as given to record.
+    """
+    while not self._queue.empty():
+      batch.append(self._queue.get_nowait())
+    records = [item[2] for item in batch if item[0] == "record" and item[1] is profile]
+    if records:
+      remaining = [item for item in batch if item[0] != "record" or item[1] is not profile]
+      batch.clear()
+      batch.extend(remaining)
+    return records
+
+  async def _snapshot(self, profile, batch):
+    saving = self._saving[profile._id] = asyncio.get_running_loop().create_future()
+    try:
+      for argument in self._take_records(profile, batch):
+        await self._record(profile, argument)
+      await self._close_log(profile._id)
+      await self._io(ProfileManager.save_to_json, profile)
+    finally:
+      del self._saving[profile._id]
+      saving.set_result(None)
+
+  async def _apply(self, operation, profile, argument, batch):
+    if operation == "record":
+      await self._record(profile, argument)
+    elif operation == "save":
+      await self._snapshot(profile, batch)
+    elif operation == "release":
+      await self._close_log(profile._id)
+    elif operation == "create":
+      return await self._io(Profile, argument)
+    elif operation == "test_result":
+      await self._io(ResultManager.record, profile._id, *argument)
+
+  async def _flush_due(self, batch):
+    now = time.monotonic()
+    flushed = False
+    for profile_id, (profile, count, since) in list(self._pending.items()):
+      if profile_id not in self._logs:
+        # Snapshotted while an earlier profile was being flushed
+        continue
+      if len(self._logs[profile_id]) >= self._compact_every:
+        await self._snapshot(profile, batch)
+        flushed = True
+      elif count >= self._save_every or now - since >= self._interval:
+        del self._pending[profile_id]
+        await self._io(self._logs[profile_id].flush)
+        flushed = True
+    if flushed:
+      await self._io(StatisticsManager.flush)
+
+  async def _run(self):
+    batch = deque()
+    while True:
+      if not batch:
+        try:
+          batch.append(await asyncio.wait_for(self._queue.get(), self._interval))
+        except asyncio.TimeoutError:
+          pass
+      while not self._queue.empty():
+        batch.append(self._queue.get_nowait())
+
+      stop = None
+      while batch:
+        operation, profile, argument, future = batch.popleft()
+        if operation == "stop":
+          stop = future
+          continue
+        try:
+          result = await self._apply(operation, profile, argument, batch)
+        except Exception as error:
+          if future is None:
+            print(f"Could not record an answer of profile {profile._id}: {error}", file=sys.stderr)
+          else:
+            future.set_exception(error)
+        else:
+          if future is not None:
+            future.set_result(result)
+
+      if stop is not None:
+        for profile_id in list(self._logs):
+          await self._close_log(profile_id)
+        await self._io(StatisticsManager.flush)
+        stop.set_result(None)
+        return
+      await self._flush_due(batch)
+
+class Session:
+  """
+  The state of one client connection: its profile and the practice or test in progress.
+  """
+
+  def __init__(self, server):
+    self._server = server
+    self.profile = None
+    self._mode = None
+    self._question = None
+    self._scheduler = None
+    self._question_start = None
+    self._test_questions = None
+    self._test_answers = []
+    self._test_start = None
+
+  def _require_profile(self):
+    if self.profile is None:
+      raise ValueError("Open or create a profile first.")
+
+  def _next_test_question(self):
+    self._question = self._test_questions.pop()
+    self._question_start = time.monotonic()
+    return {"question": public_question(self._question), "remaining": len(self._test_questions) + 1}
+
+  async def handle(self, request):
+    """
+    Handles one request.
+
+    Args:
+      request (dict): The request, with an "op" naming the operation.
+
+    Returns:
+      dict: The response.
+    """
+    handler = getattr(self, f"_op_{request.get('op')}", None)
+    if handler is None:
+      raise ValueError(f"Unknown operation: {request.get('op')}")
+    return await handler(request)
+
+  async def _op_profiles(self, request):
+    return {"profiles": ProfileManager.list_profiles()}
+
+  async def _op_open(self, request):
+    self._reset()
+    await self._server.switch_profile(self, profile_id=int(request["profile_id"]))
+    return {"profile": {"id": self.profile._id, "name": self.profile.name, "scheduler": self.profile.scheduler}}
+
+  async def _op_create(self, request):
+    self._reset()
+    await self._server.switch_profile(self, name=str(request["name"]))
+    return {"profile": {"id": self.profile._id, "name": self.profile.name, "scheduler": self.profile.scheduler}}
+
+  async def _op_scheduler(self, request):
+    self._require_profile()
+    if request["name"] != self.profile.scheduler:
+      await self._server.writer.wait_until_saved(self.profile)
+      self.profile.scheduler = request["name"]
+      await self._server.writer.save(self.profile)
+    return {"scheduler": self.profile.scheduler}
+
+  async def _op_practice(self, request):
+    self._require_profile()
+    if not self.profile.get_active_questions():
+      raise ValueError("There are no active questions to practice.")
+    self._mode = "practice"
+    self._scheduler = ProfileManager.create_scheduler(self.profile)
+    self._question, _ = self.profile.get_active_questions()[self._scheduler.next_question()]
+    return {"question": public_question(self._question)}
+
+  async def _op_test(self, request):
+    self._require_profile()
+    active_questions = QuestionManager.get_bank().active_questions()
+    count = int(request["count"])
+    if not 1 <= count <= len(active_questions):
+      raise ValueError(f"The number of questions must be between 1 and {len(active_questions)}.")
+    self._mode = "test"
+    self._test_questions = random.sample(active_questions, count)
+    self._test_answers = []
+    self._test_start = time.monotonic()
+    return self._next_test_question()
+
+  async def _op_answer(self, request):
+    if self._mode is None:
+      raise ValueError("Start a practice or a test first.")
+    question = self._question
+    correct = grade_submission(question, request["answer"])
+
+    if self._mode == "practice":
+      await self._server.writer.wait_until_saved(self.profile)
+      self.profile.record_answer(question["id"], correct)
+      self._scheduler.record(question["id"], correct)
+      self._server.writer.record(self.profile, question["id"], correct)
+      active_questions = self.profile.get_active_questions()
+      self._question, _ = active_questions[self._scheduler.next_question()]
+      return {"correct": correct, "question": public_question(self._question)}
+
+    self._test_answers.append((question["id"], correct, time.monotonic() - self._question_start))
+    if self._test_questions:
+      return {"correct": correct, **self._next_test_question()}
+
+    answers, duration = self._test_answers, time.monotonic() - self._test_start
+    score = sum(correct for _, correct, _ in answers) / len(answers) * 100
+    self._reset()
+    await self._server.writer.test_result(self.profile, answers, duration)
+    return {"correct": correct, "score": score}
+
+  def _reset(self):
+    self._mode = None
+    self._question = None
+    self._scheduler = None
+    self._test_questions = None
+
+  async def _op_stop(self, request):
+    self._reset()
+    return {"stopped": True}
+
+class QuizServer:
+  """
+  A multi-user quiz server speaking newline-delimited JSON over TCP.
+
+  Every connection is a Session. Each request is one JSON object on a line, naming its
+  operation in "op", and gets one JSON object back: the result, or {"error": message}.
+
+    {"op": "profiles"}                   -> {"profiles": [{"id", "name"}, ...]}
+    {"op": "open", "profile_id": 1}      -> {"profile": {"id", "name", "scheduler"}}
+    {"op": "create", "name": "Jane"}     -> {"profile": {"id", "name", "scheduler"}}
+    {"op": "scheduler", "name": "sm2"}   -> {"scheduler": "sm2"}
+    {"op": "practice"}                   -> {"question": {...}}
+    {"op": "test", "count": 10}          -> {"question": {...}, "remaining": 10}
+    {"op": "answer", "answer": "Paris"}  -> {"correct": true, "question": {...}}, or
+                                            {"correct": true, "score": 90.0} after the
+                                            last question of a test
+    {"op": "stop"}                       -> {"stopped": true}
+
+  Quiz questions are answered with the number of the chosen option, counting from 1.
+  Profiles are loaded once and shared by all the sessions that open them, and dropped
+  from memory when the last one closes. All storage writes go through a StorageWriter.
+  """
+
+  # Pending connections the listening socket queues, enough for a burst of learners
+  BACKLOG = 1024
+
+  def __init__(self, host=SERVER_HOST, port=SERVER_PORT, writer=None):
+    """
+    Initializes a new QuizServer.
+
+    Args:
+      host (str): The address to listen on.
+      port (int): The port to listen on, 0 for any free port.
+      writer (StorageWriter): The writer for storage writes, one with the default settings if omitted.
+    """
+    self._host = host
+    self._port = port
+    self.writer = writer or StorageWriter()
+    self._server = None
+    self._connections = set()
+
+    # Profiles in use, by ID, with the number of sessions using them
+    self._profiles = {}
+
+  @property
+  def port(self):
+    """
+    int: The port the server listens on.
+    """
+    return self._server.sockets[0].getsockname()[1]
+
+  async def start(self):
+    """
+    Starts the writer task and listening for connections.
+    """
+    self.writer.start()
+    self._server = await asyncio.start_server(self._handle_connection, self._host, self._port, backlog=self.BACKLOG)
+
+  async def close(self):
+    """
+    Stops listening, closes the open connections and writes everything queued.
+    """
+    if self._server is not None:
+      self._server.close()
+      for connection in list(self._connections):
+        connection.cancel()
+      await asyncio.gather(*self._connections, return_exceptions=True)
+      await self._server.wait_closed()
+      self._server = None
+    await self.writer.close()
+
+  async def switch_profile(self, session, profile_id=None, name=None):
+    """
+    Makes a session use another profile, opened by ID or created with a name.
+
+    Args:
+      session (Session): The session.
+      profile_id (int): The ID of the profile to open.
+      name (str): The name of the profile to create.
+    """
+    if name is not None:
+      profile = await self.writer.create(name)
+      profile_id = profile._id
+      self._profiles[profile_id] = [profile, 0]
+    elif profile_id not in self._profiles:
+      try:
+        profile = ProfileManager.open_profile(profile_id)
+      except (FileNotFoundError, KeyError):
+        raise ValueError(f"Unknown profile: {profile_id}") from None
+      self._profiles[profile_id] = [profile, 0]
+
+    entry = self._profiles[profile_id]
+    entry[1] += 1
+    previous, session.profile = session.profile, entry[0]
+    await self._release(previous)
+
+  async def release_profile(self, session):
+    """
+    Makes a session stop using its profile, unloading it if no other session uses it.
+
+    Args:
+      session (Session): The session.
+    """
+    profile, session.profile = session.profile, None
+    await self._release(profile)
+
+  async def _release(self, profile):
+    if profile is None:
+      return
+    entry = self._profiles[profile._id]
+    entry[1] -= 1
+    if entry[1] == 0:
+      await self.writer.release(profile)
+      # A session may have opened the profile again while its log was being closed
+      if entry[1] == 0 and self._profiles.get(profile._id) is entry:
+        del self._profiles[profile._id]
+
+  async def _handle_connection(self, reader, writer):
+    session = Session(self)
+    task = asyncio.current_task()
+    self._connections.add(task)
+    try:
+      while True:
+        line = await reader.readline()
+        if not line:
+          break
+        try:
+          request = json.loads(line)
+          if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object.")
+          response = await session.handle(request)
+        except (ValueError, TypeError, KeyError, OSError) as error:
+          response = {"error": str(error) if not isinstance(error, KeyError) else f"Missing field: {error}"}
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+      pass
+    finally:
+      self._connections.discard(task)
+      await self.release_profile(session)
+      writer.close()
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT):
+  """
+  Runs a quiz server until SIGINT or SIGTERM.
+
+  Args:
+    host (str): The address to listen on.
+    port (int): The port to listen on.
+  """
+  server = QuizServer(host, port)
+  await server.start()
+  print(f"Serving on {host}:{server.port}, press Ctrl+C to stop.")
+
+  stop = asyncio.Event()
+  loop = asyncio.get_running_loop()
+  for signum in (signal.SIGINT, signal.SIGTERM):
+    try:
+      loop.add_signal_handler(signum, stop.set)
+    except (NotImplementedError, RuntimeError):  # Not supported on Windows
+      pass
+
+  try:
+    await stop.wait()
+  finally:
+    await server.close()
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import datetime
+from config import RESULTS_INDEX_COMPACT_SIZE
+from storage import file_lock, atomic_write_text
+from instrumentation import count_bytes, count_file_read
+
+class ResultStore:
+  """
+  An append-only store of test results, indexed by profile, day and question.
+
+  Each test is one JSON line in the results file:
+
+    {"profile_id": 1, "timestamp": 1700000000, "duration": 42.5, "score": 50.0,
+     "answers": [[<question id>, <correct>, <seconds taken>], ...]}
+
+  A "<results file>.index" file next to it holds the byte offset of every record by
+  profile ID and by day, and how many times each question was asked and failed, so
+  reading a profile's last tests seeks straight to them and failure rates need no scan
+  at all. The index records the size of the results file it covers, and the records
+  appended after it are indexed when read, so appending a test only writes its record.
+  The index is rewritten once those records are larger than it, which amortizes the
+  rewrite over as many appended bytes and bounds what a new reader has to index.
+  """
+
+  def __init__(self, file_name, compact_size=RESULTS_INDEX_COMPACT_SIZE):
+    """
+    Initializes the store of a results file.
+
+    Args:
+      file_name (str): Name of the JSONL results file.
+      compact_size (int): Size in bytes the records missing from the index file must
+        reach before it is rewritten.
+    """
+    self._file_name = file_name
+    self._index_file_name = file_name + ".index"
+    self._compact_size = compact_size
+    self._index = None
+
+    # Size of the results file the index file covers, and the size of the index file
+    self._indexed_size = 0
+    self._index_file_size = 0
+
+  @staticmethod
+  def _empty_index():
+    return {"size": 0, "profiles": {}, "days": {}, "questions": {}}
+
+  @staticmethod
+  def _day(timestamp):
+    return datetime.date.fromtimestamp(timestamp).isoformat()
+
+  def _size(self):
+    try:
+      return os.path.getsize(self._file_name)
+    except FileNotFoundError:
+      return 0
+
+  def _read_index(self):
+    try:
+      with open(self._index_file_name, 'r') as file:
+        count_file_read(file)
+        index = json.load(file)
+        index_file_size = file.tell()
+    except (FileNotFoundError, ValueError):
+      index, index_file_size = self._empty_index(), 0
+    self._indexed_size = index["size"]
+    self._index_file_size = index_file_size
+    return index
+
+  @staticmethod
+  def _add_to_index(index, offset, record):
+    index["profiles"].setdefault(str(record["profile_id"]), []).append(offset)
+    index["days"].setdefault(ResultStore._day(record["timestamp"]), []).append(offset)
+    for question_id, correct, _ in record["answers"]:
+      counts = index["questions"].setdefault(str(question_id), [0, 0])
+      counts[0] += 1
+      counts[1] += not correct
+
+  def _catch_up(self, index, repair=False):
+    """
+    Indexes the records appended after the index's size.
+
+    Args:
+      index (dict): The index to add the records to.
+      repair (bool): True to truncate a torn last line. The caller must hold the
+        results file lock, as the line could otherwise still be being appended.
+
+    Returns:
+      dict: The index, or a new one if the results file was replaced behind it.
+    """
+    size = self._size()
+    if index["size"] > size:
+      # The results file was replaced or truncated behind the index
+      index = self._empty_index()
+      self._indexed_size = 0
+    if index["size"] == size:
+      return index
+
+    with open(self._file_name, 'r+b' if repair else 'rb') as file:
+      file.seek(index["size"])
+      offset = index["size"]
+      for line in file:
+        if not line.endswith(b"\n"):
+          if repair:
+            # A crash mid-append left a torn last line behind
+            file.truncate(offset)
+          break
+        try:
+          self._add_to_index(index, offset, json.loads(line))
+        except (ValueError, KeyError, TypeError):
+          pass
+        offset += len(line)
+      count_bytes(read=offset - index["size"])
+      index["size"] = offset
+    return index
+
+  def _current_index(self):
+    if self._index is None:
+      self._index = self._read_index()
+    if self._index["size"] != self._size():
+      self._index = self._catch_up(self._index)
+    return self._index
+
+  def _compact(self, index):
+    """
+    Rewrites the index file once the records it is missing are larger than it. The
+    caller must hold the results file lock.
+    """
+    if index["size"] - self._indexed_size < max(self._compact_size, self._index_file_size):
+      return
+    # Compact JSON is written by the C encoder and keeps the index small
+    text = json.dumps(index, separators=(",", ":"))
+    atomic_write_text(self._index_file_name, text)
+    self._indexed_size = index["size"]
+    self._index_file_size = len(text)
+
+  def append(self, profile_id, answers, duration, timestamp=None):
+    """
+    Appends the result of a test.
+
+    Args:
+      profile_id (int): The ID of the profile that took the test.
+      answers (list): (question ID, correct, seconds taken) tuples, in the order the
+        questions were asked.
+      duration (float): How long the whole test took, in seconds.
+      timestamp (int): Unix time the test ended, defaults to now.
+
+    Returns:
+      dict: The stored record.
+    """
+    record = {
+      "profile_id": profile_id,
+      "timestamp": int(time.time()) if timestamp is None else timestamp,
+      "duration": round(duration, 3),
+      "score": sum(correct for _, correct, _ in answers) / len(answers) * 100 if answers else 0.0,
+      "answers": [[question_id, bool(correct), round(seconds, 3)] for question_id, correct, seconds in answers]
+    }
+    line = (json.dumps(record) + "\n").encode()
+
+    with file_lock(self._file_name):
+      if self._index is None:
+        self._index = self._read_index()
+      index = self._index = self._catch_up(self._index, repair=True)
+      with open(self._file_name, 'ab') as file:
+        file.write(line)
+        file.flush()
+        os.fsync(file.fileno())
+      count_bytes(written=len(line))
+      self._add_to_index(index, index["size"], record)
+      index["size"] += len(line)
+      self._compact(index)
+    return record
+
+  def _read_records(self, offsets):
+    records = []
+    with open(self._file_name, 'rb') as file:
+      for offset in offsets:
+        file.seek(offset)
+        line = file.readline()
+        count_bytes(read=len(line))
+        records.append(json.loads(line))
+    return records
+
+  def recent(self, profile_id, limit=20):
+    """
+    Gets the last tests of a profile, reading only their records.
+
+    Args:
+      profile_id (int): The ID of the profile.
+      limit (int): The maximum number of tests to return.
+
+    Returns:
+      list: The test records, oldest first.
+    """
+    offsets = self._current_index()["profiles"].get(str(profile_id), [])
+    return self._read_records(offsets[-limit:] if limit else [])
+
+  def between(self, first_day, last_day):
+    """
+    Gets the tests taken between two days, reading only their records.
+
+    Args:
+      first_day (datetime.date): The first day, included.
+      last_day (datetime.date): The last day, included.
+
+    Returns:
+      list: The test records, in the order they were stored.
+    """
+    days = self._current_index()["days"]
+    first_day, last_day = first_day.isoformat(), last_day.isoformat()
+    offsets = sorted(offset for day, day_offsets in days.items() if first_day <= day <= last_day for offset in day_offsets)
+    return self._read_records(offsets)
+
+  def question_stats(self):
+    """
+    Gets how often every question was asked and failed across all tests, from the index.
+
+    Returns:
+      dict: {"asked", "failed", "failure_rate"} dictionaries by question ID.
+    """
+    return {
+      int(question_id): {"asked": asked, "failed": failed, "failure_rate": failed / asked}
+      for question_id, (asked, failed) in self._current_index()["questions"].items()
+    }
@@ -0,0 +1,251 @@
+import heapq
+import random
+import time
+from abc import ABC, abstractmethod
+from weighted_sampler import WeightedSampler
+from instrumentation import instrumented
+
+DAY = 86400
+
+class Scheduler(ABC):
+  """
+  A base class for the engines that pick the next question in practice mode.
+
+  A scheduler is loaded with the active questions, the profile's statistics and its
+  answer history, then alternates between next_question() and record() as questions are
+  answered. Schedulers keep no state of their own on disk: whatever they need is rebuilt
+  from the statistics or by replaying the answer history.
+  """
+  name = None
+
+  # True if load() replays the answer history
+  uses_history = False
+
+  def __init__(self, rng=random):
+    """
+    Initializes a new scheduler.
+
+    Args:
+      rng: The random number generator to use.
+    """
+    self._rng = rng
+
+  @abstractmethod
+  def load(self, question_ids, stats, history):
+    """
+    Builds the schedule.
+
+    Args:
+      question_ids (iterable): The IDs of the questions to schedule.
+      stats (ProfileStats): The profile's statistics.
+      history (iterable): The profile's (question ID, correct, timestamp) answer records,
+        oldest first.
+    """
+    pass
+
+  @abstractmethod
+  def next_question(self, now=None):
+    """
+    Picks the question to ask next.
+
+    Args:
+      now (float): Unix time, defaults to the current time.
+
+    Returns:
+      int: The ID of the question.
+    """
+    pass
+
+  @abstractmethod
+  def record(self, question_id, correct, now=None):
+    """
+    Reschedules a question after it has been answered.
+
+    The profile's statistics must already include the answer.
+
+    Args:
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+      now (float): Unix time of the answer, defaults to the current time.
+    """
+    pass
+
+class ProbabilityScheduler(Scheduler):
+  """
+  Draws questions at random, weighted by their selection probability.
+
+  This is the original practice mode behaviour: a question's weight is
+  1 - incorrect / (shown + 1), so questions answered wrongly come up more often.
+  """
+  name = "probability"
+
+  def load(self, question_ids, stats, history):
+    self._stats = stats
+    self._sampler = WeightedSampler(
+      (question_id, float(stats.selection_probability(question_id)))
+      for question_id in question_ids
+    )
+
+  @instrumented("ProbabilityScheduler.next_question")
+  def next_question(self, now=None):
+    return self._sampler.sample(self._rng)
+
+  def record(self, question_id, correct, now=None):
+    if question_id in self._sampler:
+      self._sampler.update(question_id, float(self._stats.selection_probability(question_id)))
+
+class DueTimeScheduler(Scheduler):
+  """
+  A base class for schedulers that give every question a due time.
+
+  Questions sit in a heap keyed on (due time, sequence number), so the next question is
+  the one due earliest and picking and rescheduling cost O(log n). Rescheduling pushes a
+  new entry and leaves the old one to be skipped when it reaches the top. Questions that
+  were never answered are due at time 0, in the order they were loaded. When nothing is
+  due yet, the question due soonest is asked anyway, so practice never runs dry.
+  """
+  uses_history = True
+
+  def load(self, question_ids, stats, history):
+    self._state = {}
+    for question_id, correct, timestamp in history:
+      self._state[question_id] = self._update(self._state.get(question_id), correct, timestamp)
+
+    self._due = {}
+    self._heap = []
+    self._counter = 0
+    for question_id in question_ids:
+      state = self._state.get(question_id)
+      due = 0 if state is None else self._due_time(state)
+      self._due[question_id] = due
+      self._heap.append((due, self._counter, question_id))
+      self._counter += 1
+    heapq.heapify(self._heap)
+
+  def _push(self, question_id, due):
+    self._due[question_id] = due
+    heapq.heappush(self._heap, (due, self._counter, question_id))
+    self._counter += 1
+
+    # Drop skipped entries once they outnumber the live ones.
+    if len(self._heap) > 2 * len(self._due) + 16:
+      self._heap = [(due, counter, question_id) for due, counter, question_id in self._heap if self._due[question_id] == due]
+      heapq.heapify(self._heap)
+
+  @instrumented("DueTimeScheduler.next_question")
+  def next_question(self, now=None):
+    while self._heap:
+      due, _, question_id = self._heap[0]
+      if self._due[question_id] == due:
+        return question_id
+      heapq.heappop(self._heap)
+    raise ValueError("There are no questions to schedule.")
+
+  def record(self, question_id, correct, now=None):
+    if now is None:
+      now = time.time()
+    state = self._state[question_id] = self._update(self._state.get(question_id), correct, now)
+    if question_id in self._due:
+      self._push(question_id, self._due_time(state))
+
+  @abstractmethod
+  def _update(self, state, correct, now):
+    """
+    Computes the state of a question after an answer.
+
+    Args:
+      state (tuple): The previous state, or None if the question wasn't answered before.
+      correct (bool): True if the answer was correct.
+      now (float): Unix time of the answer.
+
+    Returns:
+      tuple: The new state.
+    """
+    pass
+
+  @abstractmethod
+  def _due_time(self, state):
+    """
+    Gets the due time of a question from its state.
+    """
+    pass
+
+class LeitnerScheduler(DueTimeScheduler):
+  """
+  The Leitner box system.
+
+  A correct answer moves a question up one box and a wrong one sends it back to the
+  first box. Each box has a longer review interval than the one before it.
+  """
+  name = "leitner"
+
+  # Review interval of each box in seconds
+  INTERVALS = (60, 600, 3600, DAY, 7 * DAY)
+
+  def _update(self, state, correct, now):
+    box = 0 if state is None else state[0]
+    box = min(box + 1, len(self.INTERVALS) - 1) if correct else 0
+    return (box, now + self.INTERVALS[box])
+
+  def _due_time(self, state):
+    return state[1]
+
+class SM2Scheduler(DueTimeScheduler):
+  """
+  The SM-2 spaced repetition algorithm.
+
+  Each question has an easiness factor and a review interval that is multiplied by it
+  after every correct answer. Answers are graded as quality 4 when correct and 1 when
+  wrong. A wrong answer restarts the repetitions and, as SM-2 asks, brings the question
+  back in the same session, after RETRY_DELAY seconds.
+  """
+  name = "sm2"
+
+  CORRECT_QUALITY = 4
+
+  INCORRECT_QUALITY = 1
+
+  RETRY_DELAY = 60
+
+  def _update(self, state, correct, now):
+    repetitions, easiness, interval, _ = (0, 2.5, 0, 0) if state is None else state
+    quality = self.CORRECT_QUALITY if correct else self.INCORRECT_QUALITY
+    easiness = max(1.3, easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    if not correct:
+      return (0, easiness, 0, now + self.RETRY_DELAY)
+
+    if repetitions == 0:
+      interval = 1
+    elif repetitions == 1:
+      interval = 6
+    else:
+      interval = round(interval * easiness)
+    return (repetitions + 1, easiness, interval, now + interval * DAY)
+
+  def _due_time(self, state):
+    return state[3]
+
+SCHEDULERS = {scheduler.name: scheduler for scheduler in (ProbabilityScheduler, LeitnerScheduler, SM2Scheduler)}
+
+def create_scheduler(name, question_ids, stats, history=(), rng=random):
+  """
+  Creates and loads a scheduler.
+
+  Args:
+    name (str): "probability", "leitner" or "sm2".
+    question_ids (iterable): The IDs of the questions to schedule.
+    stats (ProfileStats): The profile's statistics.
+    history (iterable): The profile's answer records, oldest first.
+    rng: The random number generator to use.
+
+  Returns:
+    Scheduler: The loaded scheduler.
+  """
+  try:
+    scheduler_class = SCHEDULERS[name]
+  except KeyError:
+    raise ValueError(f"Unknown scheduler: {name}") from None
+  scheduler = scheduler_class(rng)
+  scheduler.load(question_ids, stats, history)
+  return scheduler
@@ -0,0 +1,176 @@
+from config import STATS_ENGINE
+
+try:
+  import numpy as np
+except ImportError:  # NumPy is optional, the pure-Python engine is used without it
+  np = None
+
+def _accuracy(times_shown, correct_answers):
+  return (correct_answers / times_shown) * 100 if times_shown > 0 else 0
+
+def _summary(type_totals, weakest):
+  times_shown = sum(totals[0] for totals in type_totals.values())
+  correct_answers = sum(totals[1] for totals in type_totals.values())
+  return {
+    "answered": sum(totals[2] for totals in type_totals.values()),
+    "times_shown": times_shown,
+    "correct_answers": correct_answers,
+    "accuracy": _accuracy(times_shown, correct_answers),
+    "by_type": {
+      question_type: {"times_shown": totals[0], "correct_answers": totals[1], "accuracy": _accuracy(totals[0], totals[1])}
+      for question_type, totals in type_totals.items()
+    },
+    "weakest": [
+      {"id": question_id, "times_shown": times_shown, "correct_answers": correct_answers, "accuracy": _accuracy(times_shown, correct_answers)}
+      for question_id, times_shown, correct_answers in weakest
+    ]
+  }
+
+class PythonStatsEngine:
+  """
+  Computes statistics over a whole profile with plain Python loops.
+  """
+  name = "python"
+
+  def recalculate_probabilities(self, stats):
+    """
+    Recalculates the selection probability of every stored question from its counts.
+
+    Args:
+      stats (ProfileStats): The statistics to update.
+    """
+    stats.recalculate_probabilities()
+
+  def correct_percentages(self, stats):
+    """
+    Calculates the percentage of correct answers of every stored question.
+
+    Args:
+      stats (ProfileStats): The statistics.
+
+    Returns:
+      dict: The percentage by question ID, 0 for questions that were never shown.
+    """
+    return {
+      question_id: _accuracy(times_shown, correct_answers)
+      for question_id, times_shown, correct_answers, _ in stats.rows()
+    }
+
+  def summary(self, stats, question_types, weakest=5):
+    """
+    Summarizes a profile's answers to the given questions.
+
+    Args:
+      stats (ProfileStats): The statistics.
+      question_types (iterable): (question ID, question type) pairs of the questions to
+        include. Statistics of other questions are ignored.
+      weakest (int): The number of weakest questions to list.
+
+    Returns:
+      dict: The number of answered questions, total times shown, correct answers and
+        accuracy, the same totals by question type, and the answered questions with the
+        lowest accuracy, the most shown first among equals.
+    """
+    types = dict(question_types)
+    type_totals = {question_type: [0, 0, 0] for question_type in types.values()}
+    answered = []
+
+    for question_id, times_shown, correct_answers, _ in stats.rows():
+      question_type = types.get(question_id)
+      if question_type is None or times_shown == 0:
+        continue
+      totals = type_totals[question_type]
+      totals[0] += times_shown
+      totals[1] += correct_answers
+      totals[2] += 1
+      answered.append((question_id, times_shown, correct_answers))
+
+    answered.sort(key=lambda row: (_accuracy(row[1], row[2]), -row[1], row[0]))
+    return _summary(type_totals, answered[:weakest])
+
+class NumpyStatsEngine:
+  """
+  Computes statistics over a whole profile in vectorized NumPy passes over its arrays.
+
+  The arrays of the ProfileStats are wrapped without copying, so recalculating the
+  probabilities writes them in place.
+  """
+  name = "numpy"
+
+  def __init__(self):
+    if np is None:
+      raise RuntimeError("The NumPy stats engine needs NumPy to be installed.")
+
+  @staticmethod
+  def _wrap(column):
+    if not len(column):
+      return np.zeros(0, dtype=column.typecode)
+    return np.frombuffer(column, dtype=column.typecode)
+
+  def _columns(self, stats):
+    return [self._wrap(column) for column in stats.columns()]
+
+  def recalculate_probabilities(self, stats):
+    _, times_shown, correct_answers, selection_probability = self._columns(stats)
+    selection_probability[:] = 1 - (times_shown - correct_answers) / (times_shown + 1)
+
+  def correct_percentages(self, stats):
+    ids, times_shown, correct_answers, _ = self._columns(stats)
+    percentages = np.zeros(len(ids))
+    shown = times_shown > 0
+    percentages[shown] = correct_answers[shown] / times_shown[shown] * 100
+    return dict(zip(ids.tolist(), percentages.tolist()))
+
+  def summary(self, stats, question_types, weakest=5):
+    type_codes = {}
+    question_ids = []
+    codes = []
+    for question_id, question_type in question_types:
+      question_ids.append(question_id)
+      codes.append(type_codes.setdefault(question_type, len(type_codes)))
+
+    question_ids = np.array(question_ids, dtype=np.int64)
+    codes = np.array(codes, dtype=np.int64)
+    order = np.argsort(question_ids, kind="stable")
+    question_ids, codes = question_ids[order], codes[order]
+
+    ids, times_shown, correct_answers, _ = self._columns(stats)
+    positions = np.minimum(np.searchsorted(question_ids, ids), max(len(question_ids) - 1, 0))
+    if len(question_ids):
+      answered = (question_ids[positions] == ids) & (times_shown > 0)
+    else:
+      answered = np.zeros(len(ids), dtype=bool)
+
+    ids, times_shown, correct_answers = ids[answered], times_shown[answered], correct_answers[answered]
+    answered_codes = codes[positions[answered]]
+
+    shown_by_type = np.bincount(answered_codes, weights=times_shown, minlength=len(type_codes))
+    correct_by_type = np.bincount(answered_codes, weights=correct_answers, minlength=len(type_codes))
+    count_by_type = np.bincount(answered_codes, minlength=len(type_codes))
+    type_totals = {
+      question_type: [int(shown_by_type[code]), int(correct_by_type[code]), int(count_by_type[code])]
+      for question_type, code in type_codes.items()
+    }
+
+    accuracy = correct_answers / times_shown * 100
+    order = np.lexsort((ids, -times_shown, accuracy))[:weakest]
+    rows = zip(ids[order].tolist(), times_shown[order].tolist(), correct_answers[order].tolist())
+    return _summary(type_totals, rows)
+
+def create_stats_engine(engine=STATS_ENGINE):
+  """
+  Creates a statistics engine.
+
+  Args:
+    engine (str): "numpy", "python", or "auto" to use NumPy when it is installed.
+
+  Returns:
+    The engine.
+  """
+  if engine == "auto":
+    engine = "python" if np is None else "numpy"
+  if engine == "numpy":
+    return NumpyStatsEngine()
+  if engine == "python":
+    return PythonStatsEngine()
+  raise ValueError(f"Unknown stats engine: {engine}")
@@ -0,0 +1,1556 @@
+import os
+import re
+import json
+import time
+import stat
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from config import QUESTIONS_FILE, PROFILES_FOLDER, DATABASE_FILE, PROFILE_STATS_FORMAT, QUESTION_LOG_COMPACT_SIZE
+from data_root import DataRoot
+from instrumentation import count_bytes, count_file_read
+from binary_stats import BinaryStatsFile, pack_binary_stats, read_binary_stats
+from user_profile import Profile
+
+try:
+  import fcntl
+except ImportError:  # Not available on Windows, where files are written without locking
+  fcntl = None
+
+class ConflictError(Exception):
+  """
+  Raised when stored data changed since it was read, so writing would overwrite someone else's changes.
+  """
+  pass
+
+@contextmanager
+def file_lock(file_name, shared=False):
+  """
+  Hold an advisory lock on a file for the duration of a with block.
+
+  The lock is taken on a "<file name>.lock" file next to it, as atomic writes replace
+  the file itself. Locks only keep out processes that take them too, and are not
+  reentrant: taking a lock that is already held, even by the same process, blocks.
+
+  Args:
+    file_name (str): Name of the file to lock.
+    shared (bool): True for a shared lock, which only excludes exclusive ones.
+  """
+  if fcntl is None:
+    yield
+    return
+
+  with open(file_name + ".lock", 'a') as lock_file:
+    fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_data(file_name):
+  """
+  Load data from a JSON file.
+
+  Args:
+    file_name (str): Name of the JSON file to load data from.
+
+  Returns:
+    list: List of items from the JSON file.
+  """
+  try:
+    with open(file_name, 'r') as file:
+      count_file_read(file)
+      existing_data = json.load(file)
+  except FileNotFoundError:
+    existing_data = []
+  return existing_data
+
+JSON_ARRAY_SEPARATOR = re.compile(r'[\s,]*')
+
+def iter_json_array(file_name, chunk_size=1 << 16):
+  """
+  Yield the items of the JSON array in a file one at a time.
+
+  The file is read in chunks, so memory use depends on the size of the largest item
+  rather than the size of the file.
+
+  Args:
+    file_name (str): Name of the JSON file holding the array.
+    chunk_size (int): Number of characters read at a time.
+
+  Yields:
+    The items of the array, in order.
+  """
+  try:
+    file = open(file_name, 'r')
+  except FileNotFoundError:
+    return
+
+  with file:
+    yield from _iter_json_array_file(file, file_name, chunk_size)
+
+def _iter_json_array_file(file, file_name, chunk_size=1 << 16):
+  """
+  Yield the items of the JSON array in an open file, up to the last complete one if the
+  array isn't closed because an append to it is being written or was torn by a crash.
+  """
+  decoder = json.JSONDecoder()
+  buffer = file.read(chunk_size)
+  count_bytes(read=len(buffer))
+  buffer = buffer.lstrip()
+  if not buffer:
+    return
+  if buffer[0] != "[":
+    raise ValueError(f"{file_name} does not hold a JSON array.")
+  position = 1
+  at_end = False
+
+  while True:
+    position = JSON_ARRAY_SEPARATOR.match(buffer, position).end()
+    if position < len(buffer) and buffer[position] == "]":
+      return
+    if position == len(buffer) and at_end:
+      return
+
+    try:
+      item, end = decoder.raw_decode(buffer, position)
+      complete = end < len(buffer) or at_end
+    except json.JSONDecodeError:
+      if at_end:
+        # The last item is still being appended
+        return
+      complete = False
+
+    if not complete:
+      # The next item runs past the buffer, read more of the file
+      more = file.read(chunk_size)
+      count_bytes(read=len(more))
+      at_end = not more
+      buffer = buffer[position:] + more
+      position = 0
+      continue
+
+    yield item
+    position = end
+
+def _json_array_content_end(tail):
+  """
+  Find where the items of a JSON array end in the last bytes of its file.
+
+  An append torn by a crash leaves the array without its closing bracket, or with a
+  comma before it. Appended items are one per line, so the lines of a torn append are
+  dropped back to the last complete item.
+
+  Args:
+    tail (bytes): The end of the file.
+
+  Returns:
+    int: The offset in the tail just past the last item, or past the opening bracket
+      of an empty array.
+  """
+  content = tail.rstrip()
+  if content.endswith(b"]"):
+    content = content[:-1].rstrip()
+    if not content.endswith(b","):
+      return len(content)
+
+  lines = content.split(b"\n")
+  while lines:
+    line = lines[-1].strip().rstrip(b",")
+    if line in (b"[", b"}"):
+      break
+    try:
+      complete = line.startswith(b"{") and isinstance(json.loads(line), dict)
+    except ValueError:
+      complete = False
+    if complete:
+      break
+    lines.pop()
+  if not lines:
+    raise ValueError("The file does not hold a JSON array.")
+  return len(b"\n".join(lines).rstrip().rstrip(b","))
+
+def append_to_json_array(file_name, items):
+  """
+  Append items to the JSON array in a file without rewriting the existing items.
+
+  The closing bracket of the array is overwritten with the new items, one per line,
+  followed by a new closing bracket, and the file is synced before returning. The
+  caller must hold the file's lock. Readers don't take it: while an append is being
+  written, or after a crash tore one, they see the array without its closing bracket and
+  read the items up to the last complete one. The next append repairs a torn array.
+
+  Args:
+    file_name (str): Name of the JSON file holding the array.
+    items (list): JSON-serializable items to append.
+  """
+  if not items:
+    return
+
+  encoded_items = ",\n".join("  " + json.dumps(item) for item in items)
+
+  try:
+    file = open(file_name, 'r+b')
+  except FileNotFoundError:
+    atomic_write_text(file_name, f"[\n{encoded_items}\n]")
+    return
+
+  with file:
+    end = file.seek(0, os.SEEK_END)
+    tail_start = max(0, end - 4096)
+    file.seek(tail_start)
+    tail = file.read()
+    try:
+      content_end = _json_array_content_end(tail)
+    except ValueError:
+      raise ValueError(f"{file_name} does not hold a JSON array.")
+
+    is_empty = tail[:content_end].endswith(b"[")
+    # Written over the old end before truncating, so readers never see the array cut short
+    file.seek(tail_start + content_end)
+    appended = (("\n" if is_empty else ",\n") + encoded_items + "\n]").encode()
+    file.write(appended)
+    file.truncate()
+    file.flush()
+    os.fsync(file.fileno())
+    count_bytes(read=len(tail), written=len(appended))
+
+# The process umask, read once as it can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _file_mode(file_name):
+  """
+  Gets the permissions a rewrite of a file should have: those of the file if it exists,
+  or those open() would give a new file otherwise.
+
+  Args:
+    file_name (str): Name of the file.
+
+  Returns:
+    int: The permission bits.
+  """
+  try:
+    return stat.S_IMODE(os.stat(file_name).st_mode)
+  except FileNotFoundError:
+    return 0o666 & ~_UMASK
+
+def atomic_write_bytes(file_name, data):
+  """
+  Write bytes to a file atomically.
+
+  The data is written to a temporary file in the same folder and then renamed over the
+  target, so a crash mid-write leaves either the old or the new file, never a truncated one.
+  The file keeps its permissions, and a new one gets the usual ones rather than the
+  private mode of temporary files.
+
+  Args:
+    file_name (str): Name of the file to write.
+    data (bytes): The data to write.
+  """
+  fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(file_name) or ".", prefix=".tmp-")
+  try:
+    with os.fdopen(fd, 'wb') as file:
+      if hasattr(os, "fchmod"):
+        os.fchmod(file.fileno(), _file_mode(file_name))
+      file.write(data)
+      count_bytes(written=len(data))
+      file.flush()
+      os.fsync(file.fileno())
+    os.replace(temp_name, file_name)
+  except BaseException:
+    try:
+      os.remove(temp_name)
+    except FileNotFoundError:
+      pass
+    raise
+
+def atomic_write_text(file_name, text):
+  """
+  Write text to a file atomically.
+
+  Args:
+    file_name (str): Name of the file to write.
+    text (str): The text to write.
+  """
+  atomic_write_bytes(file_name, text.encode())
+
+def atomic_write_json(file_name, data):
+  """
+  Write data to a JSON file atomically.
+
+  Args:
+    file_name (str): Name of the JSON file to write.
+    data: JSON-serializable data to write.
+  """
+  atomic_write_text(file_name, json.dumps(data, indent=2))
+
+class AnswerLog:
+  """
+  An append-only log of a profile's answers.
+
+  Each answer is stored as a compact "<question id> <1|0> <unix timestamp>" line, so
+  recording one costs O(1) whatever the size of the profile. The first line names the
+  snapshot checkpoint the log continues from: a log whose checkpoint doesn't match the
+  profile snapshot has already been folded into it and is ignored. Folded answers are
+  moved to a history file so they stay available for statistics.
+
+  Several processes can append to the same log. Answers are buffered in memory and
+  written under the profile lock, into whichever log file is current at that time, so
+  none are lost when another process folds the log into the snapshot.
+  """
+
+  def __init__(self, profiles_folder, profile_id):
+    """
+    Initializes the answer log of a profile.
+
+    Args:
+      profiles_folder (str): The folder holding the profile files.
+      profile_id (int): The ID of the profile.
+    """
+    self._file_name = os.path.join(profiles_folder, f"{profile_id}.log")
+    self._history_file_name = os.path.join(profiles_folder, f"{profile_id}.history.log")
+    self._file = None
+    self._buffer = []
+    self._length = 0
+
+  def __len__(self):
+    return self._length
+
+  @staticmethod
+  def _parse_records(lines):
+    records = []
+    for line in lines:
+      try:
+        question_id, correct, timestamp = line.split()
+        records.append((int(question_id), correct == "1", int(timestamp)))
+      except ValueError:
+        # A crash mid-append can leave a torn last line behind
+        continue
+    return records
+
+  def lock(self):
+    """
+    Locks the profile's files against other processes.
+
+    Returns:
+      A context manager holding the lock.
+    """
+    return file_lock(self._file_name)
+
+  def exists(self):
+    """
+    Checks whether the log file exists.
+
+    Returns:
+      bool: True if the log file exists.
+    """
+    return os.path.exists(self._file_name)
+
+  def read(self):
+    """
+    Reads the log.
+
+    Returns:
+      tuple: The checkpoint the log continues from (None if there is no log) and a list
+        of (question ID, correct, timestamp) records.
+    """
+    try:
+      with open(self._file_name, 'r') as file:
+        count_file_read(file)
+        header = file.readline().split()
+        records = self._parse_records(file)
+    except FileNotFoundError:
+      return None, []
+
+    checkpoint = int(header[1]) if len(header) == 2 and header[0] == "checkpoint" else None
+    return checkpoint, records
+
+  def reset(self, checkpoint):
+    """
+    Replaces the log with an empty one that continues from the given checkpoint.
+
+    Args:
+      checkpoint (int): The checkpoint of the profile snapshot.
+    """
+    atomic_write_text(self._file_name, f"checkpoint {checkpoint}\n")
+    self._length = 0
+
+  def archive(self):
+    """
+    Appends the records of the log to the history file.
+    """
+    try:
+      with open(self._file_name, 'r') as file:
+        file.readline()
+        records = file.read()
+    except FileNotFoundError:
+      return
+
+    if records:
+      with open(self._history_file_name, 'a') as history_file:
+        history_file.write(records if records.endswith("\n") else records + "\n")
+
+  def recent(self, limit):
+    """
+    Gets the most recent answers, including ones that have already been folded.
+
+    Args:
+      limit (int): The maximum number of answers to return.
+
+    Returns:
+      list: (question ID, correct, timestamp) records, oldest first.
+    """
+    recent_records = deque(maxlen=limit)
+    try:
+      with open(self._history_file_name, 'r') as history_file:
+        recent_records.extend(self._parse_records(history_file))
+    except FileNotFoundError:
+      pass
+
+    recent_records.extend(self.read()[1])
+    return list(recent_records)
+
+  def open(self, checkpoint):
+    """
+    Opens the log for appending, starting a new one if there is none from the checkpoint on.
+
+    A log from a later checkpoint is kept: another process has saved the profile since
+    it was loaded, and its answers go on top of that snapshot.
+
+    Args:
+      checkpoint (int): The checkpoint of the profile snapshot.
+    """
+    with self.lock():
+      log_checkpoint, records = self.read()
+      if log_checkpoint is None or log_checkpoint < checkpoint:
+        self.reset(checkpoint)
+        records = []
+      self._file = open(self._file_name, 'a')
+    self._length = len(records)
+
+  def append(self, question_id, correct, timestamp=None):
+    """
+    Appends an answer to the log. The answer is buffered until the log is flushed.
+
+    Args:
+      question_id (int): The ID of the question.
+      correct (bool): True if the answer was correct.
+      timestamp (int): Unix time of the answer, defaults to now.
+    """
+    if timestamp is None:
+      timestamp = int(time.time())
+    self._buffer.append(f"{question_id} {1 if correct else 0} {timestamp}\n")
+    self._length += 1
+
+  def flush(self):
+    """
+    Writes buffered answers to disk.
+    """
+    if not self._buffer:
+      return
+    with self.lock():
+      # The log is replaced when another process folds it into the snapshot
+      try:
+        replaced = os.stat(self._file_name).st_ino != os.fstat(self._file.fileno()).st_ino
+      except FileNotFoundError:
+        replaced = True
+      if replaced:
+        self._file.close()
+        self._file = open(self._file_name, 'a')
+
+      text = "".join(self._buffer)
+      self._file.write(text)
+      self._file.flush()
+      count_bytes(written=len(text))
+      os.fsync(self._file.fileno())
+    self._buffer.clear()
+
+  def close(self):
+    """
+    Flushes and closes the log.
+    """
+    if self._file is not None:
+      self.flush()
+      self._file.close()
+      self._file = None
+
+class BinaryAnswerLog:
+  """
+  Records practice answers straight into a profile's memory-mapped binary stats snapshot.
+
+  Each answer overwrites the question's fixed-width record in place and appends a line to
+  the history file. Nothing ever needs folding, so its length is 0.
+  """
+
+  def __init__(self, stats_file_name, history_file_name, profile):
+    self._stats_file = BinaryStatsFile(stats_file_name)
+    self._history_file = open(history_file_name, 'a')
+    self._profile = profile
+
+  def __len__(self):
+    return 0
+
+  def append(self, question_id, correct, timestamp=None):
+    if timestamp is None:
+      timestamp = int(time.time())
+    stats = self._profile.stats
+    self._stats_file.set(question_id, stats.times_shown(question_id), stats.correct_answers(question_id), stats.selection_probability(question_id))
+    self._history_file.write(f"{question_id} {1 if correct else 0} {timestamp}\n")
+
+  def flush(self):
+    self._stats_file.flush()
+    self._history_file.flush()
+    os.fsync(self._history_file.fileno())
+
+  def close(self):
+    if self._history_file is not None:
+      self.flush()
+      self._stats_file.close()
+      self._history_file.close()
+      self._history_file = None
+
+class QuestionChangeLog:
+  """
+  An append-only log of changes to a JSON questions file.
+
+  Each line is a JSON object holding a question ID and the fields that changed, so
+  toggling k questions writes O(k) bytes whatever the size of the questions file. The
+  first line names the questions file the changes apply to: once they have been folded
+  into a new questions file, the log no longer matches it and is ignored, even if a crash
+  left it behind.
+  """
+
+  def __init__(self, questions_file):
+    """
+    Initializes the change log of a questions file.
+
+    Args:
+      questions_file (str): Name of the JSON file holding the questions.
+    """
+    self._file_name = questions_file + ".changes"
+
+  @staticmethod
+  def base_version(stat):
+    """
+    Gets the version of a questions file, as named in the log.
+
+    New questions are appended to the questions file in place, which keeps the changes
+    valid, and it is otherwise only replaced by atomic writes, so its inode tells whether
+    the changes apply to it.
+
+    Args:
+      stat (os.stat_result): The status of the questions file, None if there is none.
+
+    Returns:
+      int: The version, or None if there is no questions file.
+    """
+    return None if stat is None else stat.st_ino
+
+  def signature(self):
+    """
+    Gets a value that changes whenever the log changes.
+
+    Returns:
+      tuple: The inode, modification time and size of the log, or None if there is none.
+    """
+    try:
+      stat = os.stat(self._file_name)
+    except FileNotFoundError:
+      return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+  def size(self):
+    """
+    Gets the size of the log in bytes.
+
+    Returns:
+      int: The size, 0 if there is no log.
+    """
+    try:
+      return os.path.getsize(self._file_name)
+    except FileNotFoundError:
+      return 0
+
+  @staticmethod
+  def _parse_header(line):
+    try:
+      return json.loads(line)["base"]
+    except (ValueError, KeyError, TypeError):
+      raise ValueError("invalid change log header")
+
+  def read(self):
+    """
+    Reads the log.
+
+    Returns:
+      tuple: The version of the questions file the changes apply to, and the changes
+        merged into one dictionary per question ID, in the order the questions were first
+        changed. None if there is no log.
+    """
+    try:
+      with open(self._file_name, 'r') as file:
+        count_file_read(file)
+        base_version = self._parse_header(file.readline())
+        lines = file.readlines()
+    except (FileNotFoundError, ValueError):
+      return None
+
+    changes = {}
+    for line in lines:
+      try:
+        change = json.loads(line)
+        question_id = change["id"]
+      except (ValueError, KeyError, TypeError):
+        # A crash mid-append can leave a torn last line behind
+        continue
+      if question_id in changes:
+        changes[question_id].update(change)
+      else:
+        changes[question_id] = change
+    return base_version, changes
+
+  def append(self, base_version, changes):
+    """
+    Appends changes to the log, starting a new one if it applies to another version of
+    the questions file. The caller must hold the questions file lock.
+
+    Args:
+      base_version (list): The version of the questions file, as given by base_version.
+      changes (iterable): Dictionaries holding a question ID and the fields that changed.
+    """
+    try:
+      with open(self._file_name, 'r') as file:
+        current = self._parse_header(file.readline()) == base_version
+    except (FileNotFoundError, ValueError):
+      current = False
+    if not current:
+      atomic_write_text(self._file_name, json.dumps({"base": base_version}) + "\n")
+
+    with open(self._file_name, 'a+b') as file:
+      file.seek(0, os.SEEK_END)
+      file.seek(file.tell() - 1)
+      # Start on a new line if the last append was torn
+      text = "" if file.read(1) == b"\n" else "\n"
+      text += "".join(json.dumps(change) + "\n" for change in changes)
+      file.write(text.encode())
+      file.flush()
+      os.fsync(file.fileno())
+    count_bytes(written=len(text))
+
+  def remove(self):
+    """
+    Removes the log, once its changes have been folded into the questions file.
+    """
+    try:
+      os.remove(self._file_name)
+    except FileNotFoundError:
+      pass
+
+class Storage(ABC):
+  """
+  A base class for the storage backends behind QuestionManager and ProfileManager.
+
+  Questions and profile snapshots are exchanged as the dictionaries used in the JSON
+  files, whatever the backend stores them as.
+  """
+
+  @abstractmethod
+  def questions_signature(self):
+    """
+    Gets a value that changes whenever the stored questions change.
+
+    Returns:
+      A hashable signature, or None if there are no stored questions.
+    """
+    pass
+
+  @abstractmethod
+  def load_questions(self):
+    """
+    Loads all questions.
+
+    Returns:
+      list: List of question dictionaries, in ID order.
+    """
+    pass
+
+  @abstractmethod
+  def iter_questions(self):
+    """
+    Yields all questions one at a time without loading them all into memory.
+
+    Yields:
+      dict: The question dictionaries, in ID order.
+    """
+    pass
+
+  @abstractmethod
+  def save_questions(self, questions, expected_signature=None):
+    """
+    Replaces all stored questions.
+
+    Args:
+      questions (list): List of question dictionaries.
+      expected_signature: The questions_signature() the questions were read at. If the
+        stored questions have changed since, ConflictError is raised and nothing is written.
+
+    Returns:
+      The questions_signature() of the written questions, read before anyone else can write.
+    """
+    pass
+
+  @abstractmethod
+  def add_questions(self, new_questions, expected_signature=None):
+    """
+    Stores new questions after the existing ones.
+
+    Args:
+      new_questions (list): List of question dictionaries to add.
+      expected_signature: The questions_signature() the caller's copy of the questions
+        was read at, None if unknown.
+
+    Returns:
+      The questions_signature() after the questions were added, read before anyone else
+      can write, or None if the stored questions no longer matched `expected_signature`,
+      so the caller's copy with the new questions added is out of date.
+    """
+    pass
+
+  @abstractmethod
+  def update_question_status(self, questions, question_ids, expected_signature=None):
+    """
+    Stores the status of some questions after it has been changed in memory.
+
+    Changes made by others since the questions were read are kept: if the stored
+    questions no longer match `expected_signature`, the new statuses are merged into
+    what is stored, and `questions` is updated in place to the result.
+
+    Args:
+      questions (list): All questions, with their current status.
+      question_ids (list): IDs of the questions whose status changed.
+      expected_signature: The questions_signature() the questions were read at, None if unknown.
+
+    Returns:
+      The questions_signature() of the stored questions, which `questions` now matches,
+      read before anyone else can write.
+    """
+    pass
+
+  @abstractmethod
+  def load_profiles(self):
+    """
+    Loads the snapshots of all profiles.
+
+    Returns:
+      list: A list of dictionaries, each containing profile data.
+    """
+    pass
+
+  @abstractmethod
+  def list_profiles(self):
+    """
+    Lists the ID and name of every profile without loading their statistics.
+
+    Returns:
+      list: {"id", "name"} dictionaries, ordered by ID.
+    """
+    pass
+
+  @abstractmethod
+  def read_profile(self, profile_id):
+    """
+    Reads the snapshot of one profile.
+
+    Args:
+      profile_id (int): The ID of the profile.
+
+    Returns:
+      dict: The profile snapshot, as taken by load_profile.
+    """
+    pass
+
+  @abstractmethod
+  def load_profile(self, profile_data):
+    """
+    Creates an up-to-date profile from its snapshot.
+
+    Args:
+      profile_data (dict): The profile snapshot, as returned by load_profiles.
+
+    Returns:
+      Profile: The profile.
+    """
+    pass
+
+  @abstractmethod
+  def save_profile(self, profile):
+    """
+    Stores a full snapshot of a profile.
+
+    Args:
+      profile (Profile): The profile to store.
+    """
+    pass
+
+  def save_profiles(self, profiles):
+    """
+    Stores full snapshots of many profiles.
+
+    Backends override this when saving in bulk is cheaper than one profile at a time.
+
+    Args:
+      profiles (iterable): The profiles to store.
+    """
+    for profile in profiles:
+      self.save_profile(profile)
+
+  @abstractmethod
+  def open_answer_log(self, profile):
+    """
+    Opens the log that practice answers of a profile are recorded to.
+
+    The returned log supports append(question_id, correct), flush(), close() and len(),
+    which is the number of answers that haven't been folded into the snapshot yet.
+
+    Args:
+      profile (Profile): The profile whose answers are recorded.
+
+    Returns:
+      The opened answer log.
+    """
+    pass
+
+  @abstractmethod
+  def get_answer_history(self, profile, limit):
+    """
+    Gets the most recent answers of a profile.
+
+    Args:
+      profile (Profile): The profile.
+      limit (int): The maximum number of answers to return, None for all of them.
+
+    Returns:
+      list: (question ID, correct, timestamp) records, oldest first.
+    """
+    pass
+
+# Name of the file in the profiles folder that indexes the profile files
+PROFILE_INDEX_NAME = "profiles.index"
+
+class JsonStorage(Storage):
+  """
+  Stores questions in one JSON file and each profile in its own JSON file, with
+  practice answers appended to a per-profile answer log.
+
+  New questions are appended to the questions file in place, and status changes to a
+  change log next to it, which is folded into it once the log has grown larger than the file.
+  """
+
+  def __init__(self, questions_file=QUESTIONS_FILE, profiles_folder=PROFILES_FOLDER, stats_format=PROFILE_STATS_FORMAT):
+    """
+    Initializes a new JsonStorage.
+
+    Args:
+      questions_file (str): Name of the JSON file holding the questions.
+      profiles_folder (str): The folder holding the profile files.
+      stats_format (str): "json" to keep profile statistics in the profile file, or
+        "binary" to keep them in a memory-mapped "<id>.stats" snapshot next to it.
+    """
+    if stats_format not in ("json", "binary"):
+      raise ValueError(f"Unknown profile stats format: {stats_format}")
+    self._questions_file = questions_file
+    self._change_log = QuestionChangeLog(questions_file)
+    self._profiles_folder = profiles_folder
+    self._stats_format = stats_format
+
+    # Versions of the profile files read by read_profile, until load_profile takes them
+    self._read_versions = {}
+
+  def questions_signature(self):
+    try:
+      stat = os.stat(self._questions_file)
+      # Atomic writes replace the file, so its inode changes even if the time and size don't
+      questions = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+      questions = None
+    changes = self._change_log.signature()
+    if questions is None and changes is None:
+      return None
+    return (questions, changes)
+
+  def _questions_version(self):
+    try:
+      return QuestionChangeLog.base_version(os.stat(self._questions_file))
+    except FileNotFoundError:
+      return None
+
+  def _open_questions(self):
+    """
+    Opens the questions file along with the changes logged since it was written.
+
+    Returns:
+      tuple: The open questions file, None if there is none, and the changes by question ID.
+    """
+    while True:
+      try:
+        file = open(self._questions_file, 'r')
+        version = QuestionChangeLog.base_version(os.fstat(file.fileno()))
+      except FileNotFoundError:
+        file, version = None, None
+
+      log = self._change_log.read()
+      if log is None:
+        return file, {}
+      log_version, changes = log
+      if log_version == version:
+        return file, changes
+      if self._questions_version() == version:
+        # The log was left behind after being folded into the questions file
+        return file, {}
+
+      # The questions file was replaced while it was being opened
+      if file is not None:
+        file.close()
+
+  @staticmethod
+  def _with_changes(questions, changes):
+    for question in questions:
+      change = changes.get(question["id"])
+      if change is not None:
+        question.update(change)
+      yield question
+
+  def load_questions(self):
+    file, changes = self._open_questions()
+    if file is None:
+      return []
+    with file:
+      count_file_read(file)
+      try:
+        questions = json.load(file)
+      except ValueError:
+        # An append to the array is being written, only read its complete items
+        file.seek(0)
+        questions = _iter_json_array_file(file, self._questions_file)
+      return list(self._with_changes(questions, changes))
+
+  def iter_questions(self):
+    file, changes = self._open_questions()
+    if file is None:
+      return
+    with file:
+      yield from self._with_changes(_iter_json_array_file(file, self._questions_file), changes)
+
+  def _log_question_changes(self, changes):
+    # Appending costs O(changes); the log is folded into the questions file once it is
+    # larger than it, so the cost of rewriting the file is amortized over as many bytes
+    self._change_log.append(self._questions_version(), changes)
+    try:
+      questions_size = os.path.getsize(self._questions_file)
+    except FileNotFoundError:
+      questions_size = 0
+    if self._change_log.size() > max(QUESTION_LOG_COMPACT_SIZE, questions_size):
+      atomic_write_json(self._questions_file, self.load_questions())
+      self._change_log.remove()
+
+  def save_questions(self, questions, expected_signature=None):
+    with file_lock(self._questions_file):
+      if expected_signature is not None and self.questions_signature() != expected_signature:
+        raise ConflictError(f"{self._questions_file} was changed by another process.")
+      atomic_write_json(self._questions_file, questions)
+      self._change_log.remove()
+      return self.questions_signature()
+
+  def add_questions(self, new_questions, expected_signature=None):
+    with file_lock(self._questions_file):
+      current = expected_signature is not None and self.questions_signature() == expected_signature
+      append_to_json_array(self._questions_file, new_questions)
+      return self.questions_signature() if current else None
+
+  def update_question_status(self, questions, question_ids, expected_signature=None):
+    changed_ids = set(question_ids)
+    changes = [{"id": question["id"], "status": question["status"]} for question in questions if question["id"] in changed_ids]
+    with file_lock(self._questions_file):
+      changed_by_others = expected_signature is None or self.questions_signature() != expected_signature
+      self._log_question_changes(changes)
+      if changed_by_others:
+        questions[:] = self.load_questions()
+      return self.questions_signature()
+
+  def _profile_file(self, profile_id):
+    return os.path.join(self._profiles_folder, f"{profile_id}.json")
+
+  def load_profiles(self):
+    profiles = []
+
+    for file_name in os.listdir(self._profiles_folder):
+      if file_name.endswith('.json'):
+        profile_file = os.path.join(self._profiles_folder, file_name)
+        with open(profile_file, 'r') as f:
+          count_file_read(f)
+          profile_data = json.load(f)
+          
+          profiles.append(profile_data) 
+          
+    return profiles
+
+  def _stats_file(self, profile_id):
+    return os.path.join(self._profiles_folder, f"{profile_id}.stats")
+
+  def _index_file(self):
+    return os.path.join(self._profiles_folder, PROFILE_INDEX_NAME)
+
+  def _read_profile_index(self):
+    try:
+      with open(self._index_file(), 'r') as file:
+        count_file_read(file)
+        entries = json.load(file)
+    except (FileNotFoundError, ValueError):
+      return {}
+    return {entry["file"]: entry for entry in entries}
+
+  def _write_profile_index(self, index):
+    # Compact JSON is written by the C encoder, which matters as the index is rewritten on every save.
+    atomic_write_text(self._index_file(), json.dumps(sorted(index.values(), key=lambda entry: entry["id"])))
+
+  def list_profiles(self):
+    """
+    Lists the profiles from the profile index.
+
+    The index keeps the ID, name, file and modification time of every profile file. The
+    folder is only scanned for modification times, so just the files that were added or
+    changed behind the index's back are parsed, and the index is rewritten if any were.
+    """
+    index = self._read_profile_index()
+    current = {}
+    changed = False
+
+    with os.scandir(self._profiles_folder) as entries:
+      for entry in entries:
+        if not entry.name.endswith('.json'):
+          continue
+        mtime = entry.stat().st_mtime_ns
+        index_entry = index.get(entry.name)
+        if index_entry is None or index_entry["mtime"] != mtime:
+          with open(entry.path, 'r') as file:
+            count_file_read(file)
+            profile_data = json.load(file)
+          index_entry = {"id": profile_data["id"], "name": profile_data["name"], "file": entry.name, "mtime": mtime}
+          changed = True
+        current[entry.name] = index_entry
+
+    if changed or len(current) != len(index):
+      with file_lock(self._index_file()):
+        self._write_profile_index(current)
+
+    return [{"id": entry["id"], "name": entry["name"]} for entry in sorted(current.values(), key=lambda entry: entry["id"])]
+
+  @staticmethod
+  def _file_version(stat):
+    # Atomic writes replace the file, so every snapshot gets a new inode
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+  def read_profile(self, profile_id):
+    with open(self._profile_file(profile_id), 'r') as file:
+      self._read_versions[profile_id] = self._file_version(os.fstat(file.fileno()))
+      count_file_read(file)
+      return json.load(file)
+
+  def _update_profile_index(self, profiles):
+    with file_lock(self._index_file()):
+      index = self._read_profile_index()
+      for profile in profiles:
+        profile_file = self._profile_file(profile._id)
+        index[os.path.basename(profile_file)] = {
+          "id": profile._id, "name": profile.name, "file": os.path.basename(profile_file), "mtime": os.stat(profile_file).st_mtime_ns
+        }
+      self._write_profile_index(index)
+
+  def load_profile(self, profile_data):
+    """
+    Creates a profile from its snapshot and replays the answers logged since.
+
+    Statistics come from the profile file if it holds them, and from the binary stats
+    snapshot otherwise, so profiles saved in either format can be loaded.
+    """
+    profile = Profile.from_dict(profile_data)
+    if "questions_stats" not in profile_data:
+      stats_file = self._stats_file(profile._id)
+      if os.path.exists(stats_file):
+        profile._stats = read_binary_stats(stats_file)
+
+    profile._snapshot_version = self._read_versions.pop(profile._id, None)
+
+    checkpoint, records = AnswerLog(self._profiles_folder, profile._id).read()
+    
+    if checkpoint == profile._log_checkpoint:
+      profile.stats.record_many((question_id, correct) for question_id, correct, _ in records)
+      profile._log_records = len(records)
+        
+    return profile
+
+  def _is_current(self, profile, answer_log):
+    """
+    Checks whether the stored profile is still the one the in-memory profile builds on:
+    the same snapshot, with no answers logged on top of it by other processes.
+    """
+    try:
+      version = self._file_version(os.stat(self._profile_file(profile._id)))
+    except FileNotFoundError:
+      version = None
+    if version != profile._snapshot_version:
+      return False
+
+    checkpoint, records = answer_log.read()
+    return (len(records) if checkpoint == profile._log_checkpoint else 0) == profile._log_records
+
+  def save_profile(self, profile):
+    """
+    Writes the profile snapshot, folding its answer log into it.
+
+    The profile's files are locked while it is saved. If another process has saved the
+    profile or logged answers to it since it was loaded, the answers this process hasn't
+    logged are added to the stored profile instead of overwriting it.
+    """
+    self._write_profile(profile)
+    self._update_profile_index([profile])
+
+  def save_profiles(self, profiles):
+    """
+    Writes many profile snapshots, updating the profile index once for all of them.
+    """
+    profiles = list(profiles)
+    for profile in profiles:
+      self._write_profile(profile)
+    if profiles:
+      self._update_profile_index(profiles)
+
+  def _write_profile(self, profile):
+    answer_log = AnswerLog(self._profiles_folder, profile._id)
+    with answer_log.lock():
+      if not self._is_current(profile, answer_log):
+        try:
+          profile.rebase(self.load_profile(self.read_profile(profile._id)))
+        except FileNotFoundError:
+          pass
+      self._write_snapshot(profile, answer_log)
+
+      profile._snapshot_version = self._file_version(os.stat(self._profile_file(profile._id)))
+      profile._log_records = 0
+      profile._unlogged.clear()
+
+  def _write_snapshot(self, profile, answer_log):
+    profile._log_checkpoint += 1
+
+    if self._stats_format == "binary":
+      atomic_write_bytes(self._stats_file(profile._id), pack_binary_stats(profile.stats))
+      atomic_write_json(self._profile_file(profile._id), profile.to_dict(include_stats=False))
+    else:
+      atomic_write_json(self._profile_file(profile._id), profile.to_dict())
+      try:
+        os.remove(self._stats_file(profile._id))
+      except FileNotFoundError:
+        pass
+    
+    if answer_log.exists():
+      answer_log.archive()
+      answer_log.reset(profile._log_checkpoint)
+
+  def open_answer_log(self, profile):
+    if self._stats_format == "binary":
+      stats_file = self._stats_file(profile._id)
+      if not os.path.exists(stats_file):
+        self.save_profile(profile)
+      history_file = os.path.join(self._profiles_folder, f"{profile._id}.history.log")
+      return BinaryAnswerLog(stats_file, history_file, profile)
+
+    answer_log = AnswerLog(self._profiles_folder, profile._id)
+    answer_log.open(profile._log_checkpoint)
+    return answer_log
+
+  def get_answer_history(self, profile, limit):
+    return AnswerLog(self._profiles_folder, profile._id).recent(limit)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+  id INTEGER PRIMARY KEY,
+  type TEXT NOT NULL,
+  question_text TEXT NOT NULL,
+  status INTEGER NOT NULL,
+  answer TEXT,
+  answer_index INTEGER,
+  options TEXT,
+  alternatives TEXT
+);
+CREATE INDEX IF NOT EXISTS questions_status ON questions (status);
+
+CREATE TABLE IF NOT EXISTS profiles (
+  id INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  scheduler TEXT
+);
+
+CREATE TABLE IF NOT EXISTS question_stats (
+  profile_id INTEGER NOT NULL REFERENCES profiles (id),
+  question_id INTEGER NOT NULL,
+  times_shown INTEGER NOT NULL DEFAULT 0,
+  correct_answers INTEGER NOT NULL DEFAULT 0,
+  selection_probability REAL NOT NULL DEFAULT 1,
+  PRIMARY KEY (profile_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS question_stats_question ON question_stats (question_id);
+
+CREATE TABLE IF NOT EXISTS answers (
+  profile_id INTEGER NOT NULL REFERENCES profiles (id),
+  question_id INTEGER NOT NULL,
+  correct INTEGER NOT NULL,
+  answered_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_profile ON answers (profile_id, answered_at);
+"""
+
+UPSERT_STATS = """
+INSERT INTO question_stats (profile_id, question_id, times_shown, correct_answers, selection_probability)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (profile_id, question_id) DO UPDATE SET
+  times_shown = excluded.times_shown,
+  correct_answers = excluded.correct_answers,
+  selection_probability = excluded.selection_probability
+"""
+
+class SqliteAnswerLog:
+  """
+  Records practice answers straight into the SQLite stats table.
+
+  Each answer is a single-row upsert of the question's stats plus one row in the answers
+  table. Answers are buffered in memory and written in one transaction when the log is
+  flushed, through the connection of the flushing thread, so no transaction stays open
+  between answers. Nothing ever needs folding, so its length is 0.
+  """
+
+  def __init__(self, storage, profile):
+    self._storage = storage
+    self._profile = profile
+    self._stats = []
+    self._answers = []
+
+  def __len__(self):
+    return 0
+
+  def append(self, question_id, correct, timestamp=None):
+    if timestamp is None:
+      timestamp = int(time.time())
+    stats = self._profile.stats
+    self._stats.append((
+      self._profile._id, question_id, stats.times_shown(question_id), stats.correct_answers(question_id), stats.selection_probability(question_id)
+    ))
+    self._answers.append((self._profile._id, question_id, int(correct), timestamp))
+
+  def flush(self):
+    if not self._answers:
+      return
+    connection = self._storage._connection
+    with connection:
+      connection.executemany(UPSERT_STATS, self._stats)
+      connection.executemany("INSERT INTO answers (profile_id, question_id, correct, answered_at) VALUES (?, ?, ?, ?)", self._answers)
+    self._stats.clear()
+    self._answers.clear()
+
+  def close(self):
+    self.flush()
+
+class SqliteStorage(Storage):
+  """
+  Stores questions, profiles and per-(profile, question) stats in a SQLite database in WAL mode.
+
+  Every thread that uses the storage gets its own connection, so one thread's statements
+  never run inside another's transaction, as happens when the quiz server reads on its
+  event loop while its storage thread writes.
+  """
+
+  def __init__(self, database_file=DATABASE_FILE):
+    """
+    Initializes a new SqliteStorage, creating the database if needed.
+
+    Args:
+      database_file (str): Name of the SQLite database file.
+    """
+    self._database_file = database_file
+    self._local = threading.local()
+    self._connections = []
+    self._connections_lock = threading.Lock()
+    self._connection.execute("PRAGMA journal_mode=WAL")
+    self._connection.executescript(SQLITE_SCHEMA)
+
+    # Databases created by earlier versions lack the columns added since.
+    for table, column in (("profiles", "scheduler"), ("questions", "alternatives")):
+      columns = [row[1] for row in self._connection.execute(f"PRAGMA table_info({table})")]
+      if column not in columns:
+        self._connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        self._connection.commit()
+
+  @property
+  def _connection(self):
+    """
+    sqlite3.Connection: The connection of the calling thread, opened on first use.
+    """
+    connection = getattr(self._local, "connection", None)
+    if connection is None:
+      # Only the opening thread uses it, the check is off so that close can close it
+      connection = sqlite3.connect(self._database_file, check_same_thread=False)
+      connection.execute("PRAGMA synchronous=NORMAL")
+      self._local.connection = connection
+      self._local.changes = 0
+      with self._connections_lock:
+        self._connections.append(connection)
+    return connection
+
+  def close(self):
+    """
+    Closes the database connections of all threads.
+    """
+    with self._connections_lock:
+      for connection in self._connections:
+        connection.close()
+      self._connections.clear()
+    self._local = threading.local()
+
+  def questions_signature(self):
+    # data_version only changes for commits made by other connections, so the commits of
+    # this thread's connection are counted too
+    data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+    return (data_version, self._local.changes)
+
+  @staticmethod
+  def _question_row(question):
+    is_quiz = question["type"] == "quiz"
+    return (
+      question["id"],
+      question["type"],
+      question["question_text"],
+      int(question["status"]),
+      None if is_quiz else question["answer"],
+      question["answer_index"] if is_quiz else None,
+      json.dumps(question["options"]) if is_quiz else None,
+      json.dumps(question["alternatives"]) if question.get("alternatives") else None
+    )
+
+  @staticmethod
+  def _question_dict(row):
+    question_id, question_type, question_text, status, answer, answer_index, options, alternatives = row
+    question = {
+      "type": question_type,
+      "id": question_id,
+      "question_text": question_text,
+      "status": bool(status)
+    }
+    if question_type == "quiz":
+      question["answer_index"] = answer_index
+      question["options"] = json.loads(options)
+    else:
+      question["answer"] = answer
+      if alternatives:
+        question["alternatives"] = json.loads(alternatives)
+    return question
+
+  def load_questions(self):
+    rows = self._connection.execute(
+      "SELECT id, type, question_text, status, answer, answer_index, options, alternatives FROM questions ORDER BY id"
+    )
+    return [self._question_dict(row) for row in rows]
+
+  def iter_questions(self):
+    rows = self._connection.execute(
+      "SELECT id, type, question_text, status, answer, answer_index, options, alternatives FROM questions ORDER BY id"
+    )
+    for row in rows:
+      yield self._question_dict(row)
+
+  def save_questions(self, questions, expected_signature=None):
+    with self._connection:
+      # Take the write lock before checking, so no one can commit in between
+      self._connection.execute("BEGIN IMMEDIATE")
+      signature = self.questions_signature()
+      if expected_signature is not None and signature != expected_signature:
+        raise ConflictError("The questions were changed by another connection.")
+      self._connection.execute("DELETE FROM questions")
+      self._insert_questions(questions)
+    return self._written_signature(signature)
+
+  def _written_signature(self, signature):
+    """
+    Gets the signature of the questions just committed, given the one read in the same
+    write transaction. The connection's own commits don't change data_version, so this
+    holds even if another connection has committed since.
+    """
+    self._local.changes += 1
+    return (signature[0], self._local.changes)
+
+  def _insert_questions(self, questions):
+    self._connection.executemany(
+      "INSERT INTO questions (id, type, question_text, status, answer, answer_index, options, alternatives) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+      (self._question_row(question) for question in questions)
+    )
+
+  def add_questions(self, new_questions, expected_signature=None):
+    with self._connection:
+      self._connection.execute("BEGIN IMMEDIATE")
+      signature = self.questions_signature()
+      self._insert_questions(new_questions)
+    current = signature == expected_signature
+    signature = self._written_signature(signature)
+    return signature if current else None
+
+  def update_question_status(self, questions, question_ids, expected_signature=None):
+    # Only the changed rows are written, so changes to the others are kept
+    questions_by_id = {question["id"]: question for question in questions}
+    with self._connection:
+      self._connection.execute("BEGIN IMMEDIATE")
+      signature = self.questions_signature()
+      self._connection.executemany(
+        "UPDATE questions SET status = ? WHERE id = ?",
+        ((int(questions_by_id[question_id]["status"]), question_id) for question_id in question_ids)
+      )
+      if expected_signature is None or signature != expected_signature:
+        questions[:] = self.load_questions()
+    return self._written_signature(signature)
+
+  def _load_stats(self, profile_id):
+    rows = self._connection.execute(
+      "SELECT question_id, times_shown, correct_answers, selection_probability FROM question_stats WHERE profile_id = ? ORDER BY question_id",
+      (profile_id,)
+    )
+    return [
+      {"id": question_id, "times_shown": times_shown, "correct_answers": correct_answers, "selection_probability": selection_probability}
+      for question_id, times_shown, correct_answers, selection_probability in rows
+    ]
+
+  def _profile_data(self, profile_id, name, scheduler):
+    profile_data = {"id": profile_id, "name": name, "questions_stats": self._load_stats(profile_id)}
+    if scheduler is not None:
+      profile_data["scheduler"] = scheduler
+    return profile_data
+
+  def load_profiles(self):
+    rows = self._connection.execute("SELECT id, name, scheduler FROM profiles ORDER BY id").fetchall()
+    return [self._profile_data(*row) for row in rows]
+
+  def list_profiles(self):
+    rows = self._connection.execute("SELECT id, name FROM profiles ORDER BY id").fetchall()
+    return [{"id": profile_id, "name": name} for profile_id, name in rows]
+
+  def read_profile(self, profile_id):
+    row = self._connection.execute("SELECT id, name, scheduler FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+    if row is None:
+      raise KeyError(f"No profile with ID {profile_id}")
+    return self._profile_data(*row)
+
+  def load_profile(self, profile_data):
+    return Profile.from_dict(profile_data)
+
+  def save_profile(self, profile):
+    with self._connection:
+      self._save_profile(profile)
+
+  def save_profiles(self, profiles):
+    with self._connection:
+      for profile in profiles:
+        self._save_profile(profile)
+
+  def _save_profile(self, profile):
+    self._connection.execute(
+      "INSERT INTO profiles (id, name, scheduler) VALUES (?, ?, ?) ON CONFLICT (id) DO UPDATE SET name = excluded.name, scheduler = excluded.scheduler",
+      (profile._id, profile.name, profile.scheduler)
+    )
+    self._connection.executemany(UPSERT_STATS, (
+      (profile._id, question_id, times_shown, correct_answers, selection_probability)
+      for question_id, times_shown, correct_answers, selection_probability in profile.stats.rows()
+    ))
+
+  def open_answer_log(self, profile):
+    return SqliteAnswerLog(self, profile)
+
+  def get_answer_history(self, profile, limit):
+    rows = self._connection.execute(
+      "SELECT question_id, correct, answered_at FROM answers WHERE profile_id = ? ORDER BY answered_at DESC, rowid DESC LIMIT ?",
+      # A negative limit is no limit in SQLite
+      (profile._id, -1 if limit is None else limit)
+    ).fetchall()
+    return [(question_id, bool(correct), answered_at) for question_id, correct, answered_at in reversed(rows)]
+
+  def import_answers(self, profile_id, records):
+    """
+    Adds past answers to the answer history of a profile.
+
+    Args:
+      profile_id (int): The ID of the profile.
+      records (iterable): (question ID, correct, timestamp) records.
+    """
+    with self._connection:
+      self._connection.executemany(
+        "INSERT INTO answers (profile_id, question_id, correct, answered_at) VALUES (?, ?, ?, ?)",
+        ((profile_id, question_id, int(correct), timestamp) for question_id, correct, timestamp in records)
+      )
+
+def create_storage(backend, data_root=None):
+  """
+  Creates the storage backend with the given name.
+
+  Args:
+    backend (str): "json" or "sqlite".
+    data_root (DataRoot): The data directory to store into, the default one if omitted.
+
+  Returns:
+    Storage: The storage backend.
+  """
+  if data_root is None:
+    data_root = DataRoot()
+  if backend == "json":
+    return JsonStorage(data_root.questions_file, data_root.profiles_folder)
+  if backend == "sqlite":
+    return SqliteStorage(data_root.database_file)
+  raise ValueError(f"Unknown storage backend: {backend}")
+
+def migrate_json_to_sqlite(source, target):
+  """
+  Imports questions, profiles and answer history from JSON storage into SQLite storage.
+
+  Args:
+    source (JsonStorage): The storage to read from.
+    target (SqliteStorage): The storage to write to.
+
+  Returns:
+    tuple: The number of questions and profiles imported.
+  """
+  questions = source.load_questions()
+  target.save_questions(questions)
+
+  profiles = source.load_profiles()
+  for profile_data in profiles:
+    profile = source.load_profile(profile_data)
+    target.save_profile(profile)
+    target.import_answers(profile._id, source.get_answer_history(profile, None))
+
+  return len(questions), len(profiles)
+
+def convert_profile_stats(profiles_folder, stats_format, questions_file=QUESTIONS_FILE):
+  """
+  Rewrites every profile in a folder with its statistics in the given format.
+
+  Args:
+    profiles_folder (str): The folder holding the profile files.
+    stats_format (str): "json" or "binary".
+    questions_file (str): Name of the JSON file holding the questions of the same data root.
+
+  Returns:
+    int: The number of converted profiles.
+  """
+  storage = JsonStorage(questions_file, profiles_folder, stats_format)
+  profiles = storage.load_profiles()
+  for profile_data in profiles:
+    storage.save_profile(storage.load_profile(profile_data))
+  return len(profiles)
@@ -1,10 +1,15 @@
 import random
+import time
 import datetime
-import re
-from controller import ProfileManager, QuestionManager
+from controller import ProfileManager, QuestionManager, ProfileSaver, ResultManager, StatisticsManager
 from user_profile import Profile
 from free_form_question import FreeFormQuestion
 from quiz_question import QuizQuestion
+from weighted_sampler import reservoir_sample
+from stats_engine import create_stats_engine
+from scheduler import SCHEDULERS
+from grading import grade_question
+from instrumentation import instrumented
 
 class TerminalUI:
   """
@@ -14,11 +19,11 @@ class TerminalUI:
   """
   def __init__(self):
     """
-    Initializes Terminal UI by loading profiles and questions.
+    Initializes Terminal UI by listing profiles.
     """
-    self._profiles = ProfileManager.load_profiles()
-    self._questions = QuestionManager.load_questions()
+    self._profiles = ProfileManager.list_profiles()
     self._profile = None
+    self._stats_engine = create_stats_engine()
 
   def print_main_menu(self):
     """
@@ -72,8 +77,9 @@ class TerminalUI:
     if int(choice) == len(profiles) + 1:
       profile_name = input("Enter the name for the new profile: ")
       self._profile = Profile(profile_name)
+      profiles.append({"id": self._profile._id, "name": self._profile.name})
     else:
-      self._profile = Profile.from_dict(profiles[int(choice) - 1])
+      self._profile = ProfileManager.open_profile(profiles[int(choice) - 1]["id"])
       print(self._profile.name)
 
   def run(self):
@@ -132,7 +138,8 @@ class TerminalUI:
           
         elif choice == 2:
           answer = input("Enter the correct answer: ").strip()
-          question = FreeFormQuestion(question_text, answer)
+          alternatives = [alternative.strip() for alternative in input("Enter other accepted answers separated by | (optional): ").split("|") if alternative.strip()]
+          question = FreeFormQuestion(question_text, answer, alternatives=alternatives)
           question_manager.add_question(question)
         else:
           print("Invalid choice. Please enter a valid number.")
@@ -142,29 +149,56 @@ class TerminalUI:
         break
     
     question_manager.save_to_json()
-    ProfileManager.add_new_questions_to_each_profile(question_manager.questions)
   
   def view_statistics(self):
     """
     Displays statistics for the questions, including how often they have been shown 
     and the percentage of correct answers.
     """
-    questions = QuestionManager.load_questions()
-    question_stats = self._profile._questions_stats
-
-    print(f"Question Statistics for {self._profile.name}:\n")
-    for question in questions:
-      for q_stat in question_stats:
-        if q_stat["id"] == question["id"]:
-          correct_percentage = (q_stat["correct_answers"] / q_stat["times_shown"]) * 100 if q_stat["times_shown"] > 0 else 0
-          print(f"ID: {question['id']} | Active: {question['status']} | Question: {question['question_text']}")
-          print(f"Times shown: {q_stat['times_shown']} | Correct answers: {q_stat['correct_answers']} ({correct_percentage:.2f}%)")
-          print("-" * 80)
-          break
-
+    self.print_statistics()
     print("\nPress Enter to continue...")
     input()
 
+  @instrumented("TerminalUI.print_statistics")
+  def print_statistics(self):
+    """
+    Prints the statistics shown by view_statistics.
+    """
+    stats = self._profile.stats
+    percentages = self._stats_engine.correct_percentages(stats)
+    question_types = []
+    cohort_totals = StatisticsManager.get_aggregates().question_totals()
+
+    print(f"Question Statistics for {self._profile.name}:\n")
+    for question in QuestionManager.iter_questions():
+      question_types.append((question["id"], question["type"]))
+      times_shown = stats.times_shown(question["id"])
+      correct_answers = stats.correct_answers(question["id"])
+      correct_percentage = percentages.get(question["id"], 0)
+      cohort_shown, cohort_correct, _ = cohort_totals.get(question["id"], (0, 0, None))
+      cohort_percentage = (cohort_correct / cohort_shown) * 100 if cohort_shown > 0 else 0
+      print(f"ID: {question['id']} | Active: {question['status']} | Question: {question['question_text']}")
+      print(f"Times shown: {times_shown} | Correct answers: {correct_answers} ({correct_percentage:.2f}%) | All learners: {cohort_correct} of {cohort_shown} ({cohort_percentage:.2f}%)")
+      print("-" * 80)
+
+    summary = self._stats_engine.summary(stats, question_types)
+    print(f"\nAnswered {summary['answered']} questions, {summary['correct_answers']} of {summary['times_shown']} answers correct ({summary['accuracy']:.2f}%)")
+    for question_type, totals in summary["by_type"].items():
+      print(f"{question_type}: {totals['correct_answers']} of {totals['times_shown']} correct ({totals['accuracy']:.2f}%)")
+    if summary["weakest"]:
+      print("Weakest questions: " + ", ".join(f"ID {row['id']} ({row['accuracy']:.2f}%)" for row in summary["weakest"]))
+    profile_totals = StatisticsManager.profile_totals(self._profile._id)
+    if profile_totals and profile_totals["last_seen"]:
+      last_practised = datetime.datetime.fromtimestamp(profile_totals["last_seen"]).strftime("%Y-%m-%d %H:%M:%S")
+      print(f"Last practised: {last_practised}")
+
+    answer_history = ProfileManager.get_answer_history(self._profile)
+    if answer_history:
+      print("\nRecent answers:")
+      for question_id, correct, timestamp in reversed(answer_history):
+        answered_at = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{answered_at} | ID: {question_id} | {'Correct' if correct else 'Incorrect'}")
+
   def enable_disable_question(self):
     """
     Allows the user to enable or disable questions for their profile.
@@ -175,21 +209,20 @@ class TerminalUI:
     while True: 
       try:
         question_id = self.get_menu_choice(1, QuestionManager.get_last_id(), "Enter the ID of the question you want to enable/disable: ")
-        questions = QuestionManager.load_questions()
-        
-        for question in questions:
-          if question_id == question["id"]:
-            if question['type'] == 'freeform':
-              question_answer = question['answer']
-            else: 
-              question_answer = question['options'][question['answer_index']]
-              
-            print(f"ID: {question['id']} | Question Answer: {question_answer} | Question: {question['question_text']}")
-            print("-" * 80)
+        question = QuestionManager.get_bank().get(question_id)
         
-            confirm = input(f"Do you want to {'disable' if question['status'] else 'enable'} this question? (y/n): ").lower()
-            if confirm.lower() == 'y':
-              question_ids_to_toggle.append(question["id"])
+        if question is not None:
+          if question['type'] == 'freeform':
+            question_answer = " | ".join([question['answer'], *question.get('alternatives', [])])
+          else: 
+            question_answer = question['options'][question['answer_index']]
+            
+          print(f"ID: {question['id']} | Question Answer: {question_answer} | Question: {question['question_text']}")
+          print("-" * 80)
+      
+          confirm = input(f"Do you want to {'disable' if question['status'] else 'enable'} this question? (y/n): ").lower()
+          if confirm.lower() == 'y':
+            question_ids_to_toggle.append(question["id"])
                   
       except EOFError: 
         break
@@ -226,7 +259,7 @@ class TerminalUI:
       print(f"{index + 1}. {option}")
 
     choice = self.get_menu_choice(1, len(question_json['options']), "Enter your answer: ")
-    return choice - 1 == question_json['answer_index']
+    return grade_question(question_json, choice - 1)
 
   def ask_freeform_question(self, question_json):
     """
@@ -239,58 +272,66 @@ class TerminalUI:
       A boolean indicating whether the user's answer was correct.
     """
     print(f"\n{question_json['question_text']}")
-    answer = input("Enter your answer: ").strip()
-    
-    # Use regular expressions to remove extra spaces
-    normalized_answer = re.sub(r'\s+', ' ', answer).lower()
-    normalized_correct_answer = re.sub(r'\s+', ' ', question_json['answer']).lower()
-    
-    return normalized_answer == normalized_correct_answer
-
-  def calculate_new_probability(self, question_stats):
-    """
-    Calculates a new selection probability for a question based on its statistics.
-
-    Args:
-      question_stats: A dictionary containing question statistics.
+    answer = input("Enter your answer: ")
+    return grade_question(question_json, answer)
 
-    Returns:
-      The new selection probability as a float.
-    """
-    times_shown = question_stats["times_shown"]
-    correct_answers = question_stats["correct_answers"]
-    incorrect_answers = times_shown - correct_answers
-    
-    new_probability = 1 - (incorrect_answers / (times_shown + 1))
-    return new_probability
-  
   def practice_mode(self):
     """
     Puts the user into practice mode, where they can answer questions without keeping score.
     """
     print("Practice mode (press Ctrl+D to quit the mode):\n")  
     
-    questions = QuestionManager.load_questions()
-    active_questions = [q for q in questions if q["status"]]
+    active_questions = self._profile.get_active_questions()
+
+    if not active_questions:
+      print("There are no active questions to practice.\n")
+      return
+
+    self.choose_scheduler()
+    scheduler = ProfileManager.create_scheduler(self._profile)
+
+    with ProfileSaver(self._profile) as profile_saver:
+      while True:
+        try:
+          question_id = scheduler.next_question()
+        except ValueError:
+          # Every active question has a selection probability of zero
+          print("There are no active questions to practice.\n")
+          break
+
+        try:
+          selected_question, _ = active_questions[question_id]
+          correct = self.ask_question(selected_question)
+
+          # Update the profile's question statistics and reschedule the question
+          self._profile.record_answer(selected_question["id"], correct)
+          scheduler.record(selected_question["id"], correct)
+          profile_saver.record(selected_question["id"], correct)
+          
+        except EOFError:
+          break
+
+  def choose_scheduler(self):
+    """
+    Lets the user change the scheduler that picks the profile's practice questions.
+    """
+    names = list(SCHEDULERS)
+    print(f"Questions are picked by the {self._profile.scheduler} scheduler.")
+    for i, name in enumerate(names, start=1):
+      print(f"{i}. {name}")
 
     while True:
-      try:
-        question_probabilities = self._profile.get_question_probabilities()
-        selected_question = random.choices(active_questions, weights=question_probabilities, k=1)[0]
-        correct = self.ask_question(selected_question)
-
-        # Update the profile's question statistics
-        question_stats = self._profile.get_question_stats(selected_question["id"])
-        question_stats["times_shown"] += 1
-        if correct:
-          question_stats["correct_answers"] += 1
-
-        # Update the selection probability for the question
-        question_stats["selection_probability"] = self.calculate_new_probability(question_stats)
-        ProfileManager.save_to_json(self._profile)
-        
-      except EOFError:
+      choice = input("Press Enter to keep it or enter the number of another one: ")
+      if choice == "":
+        return
+      if choice.isdigit() and 1 <= int(choice) <= len(names):
         break
+      print("Invalid choice. Please enter a valid number.")
+
+    if names[int(choice) - 1] != self._profile.scheduler:
+      self._profile.scheduler = names[int(choice) - 1]
+      ProfileManager.save_to_json(self._profile)
+    print()
       
   def test_mode(self):
     """
@@ -298,28 +339,28 @@ class TerminalUI:
     """
     print("Test mode (press Ctrl+D to quit the mode):\n")
 
-    questions = QuestionManager.load_questions()
-    active_questions = [q for q in questions if q["status"]]
+    active_count = sum(1 for question in QuestionManager.iter_questions() if question["status"])
+    if active_count == 0:
+      print("There are no active questions for a test.\n")
+      return
 
-    num_questions = self.get_menu_choice(1, len(active_questions), "Enter the number of questions for the test: ")
+    num_questions = self.get_menu_choice(1, active_count, "Enter the number of questions for the test: ")
 
-    random.shuffle(active_questions)
-    selected_questions = active_questions[:num_questions]
+    active_questions = (question for question in QuestionManager.iter_questions() if question["status"])
+    selected_questions = reservoir_sample(active_questions, num_questions)
+    random.shuffle(selected_questions)
 
-    correct_answers = 0
+    answers = []
+    test_start = time.monotonic()
 
     try:
       for question in selected_questions:
+        question_start = time.monotonic()
         is_correct = self.ask_question(question)
-        if is_correct:
-          correct_answers += 1
+        answers.append((question["id"], is_correct, time.monotonic() - question_start))
     except EOFError:
       print("Test mode aborted.\n")
       return
 
-    score = (correct_answers / num_questions) * 100
-    print(f"Your score: {score:.2f}%")
-
-    with open("results.txt", "a") as results_file:
-      timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-      results_file.write(f"{timestamp} - Score: {score:.2f}%\n")
\ No newline at end of file
+    result = ResultManager.record(self._profile._id, answers, time.monotonic() - test_start)
+    print(f"Your score: {result['score']:.2f}%")
\ No newline at end of file
@@ -0,0 +1,38 @@
+import atexit
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+# Every test run gets its own data directory, so tests never touch data/ and several runs,
+# such as pytest-xdist workers, can go at once. It must be set before config is imported.
+_data_dir = tempfile.mkdtemp(prefix="learning_tool_tests_")
+os.makedirs(os.path.join(_data_dir, "profiles"))
+os.environ["LEARNING_TOOL_DATA_DIR"] = _data_dir
+atexit.register(shutil.rmtree, _data_dir, True)
+
+def use_temporary_data_root(test_case, backend="json"):
+  """
+  Points the managers at a new, empty data directory until the end of a test.
+
+  Args:
+    test_case (unittest.TestCase): The test.
+    backend (str): The storage backend, "json" or "sqlite".
+
+  Returns:
+    DataRoot: The data directory.
+  """
+  import controller
+  from data_root import DataRoot
+
+  data_dir = tempfile.TemporaryDirectory()
+  test_case.addCleanup(data_dir.cleanup)
+  for name in ("data_root", "storage", "question_bank", "question_ids", "profile_ids", "results", "aggregates"):
+    patcher = mock.patch.object(controller, name, getattr(controller, name))
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+
+  controller.use_data_root(DataRoot(data_dir.name), backend)
+  if backend == "sqlite":
+    test_case.addCleanup(controller.storage.close)
+  return controller.data_root
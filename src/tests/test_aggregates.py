@@ -0,0 +1,131 @@
+import unittest
+import contextlib
+import io
+import os
+import tempfile
+from unittest import mock
+from aggregates import AggregateStore
+from controller import ProfileSaver, QuestionManager, StatisticsManager
+from free_form_question import FreeFormQuestion
+from terminal_ui import TerminalUI
+from user_profile import Profile
+from tests import use_temporary_data_root
+
+class TestAggregateStore(unittest.TestCase):
+
+  def setUp(self):
+    data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(data_dir.cleanup)
+    self.file_name = os.path.join(data_dir.name, "aggregates.json")
+    self.store = AggregateStore(self.file_name)
+    self.store.rebuild([])
+
+  def record(self, store, answers):
+    for profile_id, question_id, correct, timestamp in answers:
+      store.record(profile_id, question_id, 1, correct, timestamp)
+    store.flush()
+
+  def test_record(self):
+    self.record(self.store, [(1, 5, True, 100), (1, 5, False, 300), (2, 5, True, 200), (2, 6, False, 400)])
+
+    store = AggregateStore(self.file_name)
+    self.assertEqual(store.question(5), {"id": 5, "shown": 3, "correct": 2, "accuracy": 2 / 3 * 100, "last_seen": 300})
+    self.assertEqual(store.profile(2), {"id": 2, "shown": 2, "correct": 1, "accuracy": 50.0, "last_seen": 400})
+    self.assertIsNone(store.question(7))
+    self.assertIsNone(store.profile(3))
+
+  def test_reads_new_answers_only(self):
+    reader = AggregateStore(self.file_name)
+    self.assertIsNone(reader.question(5))
+    self.record(self.store, [(1, 5, True, 100)])
+    self.assertEqual(reader.question(5)["shown"], 1)
+
+    self.record(self.store, [(1, 5, False, 200)])
+    # The snapshot isn't read again while it is unchanged, only the end of the log is
+    with mock.patch.object(reader, "_load_snapshot", side_effect=AssertionError("the snapshot should be cached")):
+      self.assertEqual(reader.question(5)["shown"], 2)
+
+  def test_compaction(self):
+    store = AggregateStore(self.file_name, compact_size=100)
+    self.record(store, [(1, question_id, question_id % 2, 100) for question_id in range(20)])
+    self.assertLess(os.path.getsize(self.file_name + ".log"), 100)
+    self.record(store, [(2, 0, False, 200)])
+
+    reader = AggregateStore(self.file_name)
+    self.assertEqual(reader.question(0), {"id": 0, "shown": 2, "correct": 0, "accuracy": 0.0, "last_seen": 200})
+    self.assertEqual(reader.profile(1)["shown"], 20)
+
+  def test_ignores_folded_log(self):
+    self.record(self.store, [(1, 5, True, 100)])
+    with open(self.file_name + ".log") as file:
+      log = file.read()
+    # A crash after writing a new snapshot but before starting a new log
+    self.store.rebuild([(1, 5, 1, 1, 100)])
+    with open(self.file_name + ".log", 'w') as file:
+      file.write(log)
+
+    self.assertEqual(AggregateStore(self.file_name).question(5)["shown"], 1)
+    self.record(self.store, [(1, 5, True, 200)])
+    self.assertEqual(AggregateStore(self.file_name).question(5)["shown"], 2)
+
+  def test_reports(self):
+    answers = [(1, 1, True, 1), (1, 1, True, 1), (1, 2, False, 1), (2, 2, True, 1), (2, 3, False, 1), (3, 1, True, 1), (3, 1, True, 1), (3, 3, False, 1), (3, 1, True, 1)]
+    self.record(self.store, answers)
+
+    self.assertEqual([row["id"] for row in self.store.hardest_questions(2)], [3, 2])
+    self.assertEqual([row["id"] for row in self.store.hardest_questions(5, min_shown=3)], [1])
+    self.assertEqual([row["id"] for row in self.store.most_practised_questions(1)], [1])
+    self.assertEqual([row["id"] for row in self.store.leaderboard(3)], [3, 1, 2])
+
+class TestStatisticsManager(unittest.TestCase):
+  backend = "json"
+
+  def setUp(self):
+    self.data_root = use_temporary_data_root(self, self.backend)
+
+  def test_practice_answers_and_rebuild(self):
+    profile = Profile("Jane Doe")
+    with ProfileSaver(profile) as profile_saver:
+      for question_id, correct in ((1, True), (1, False), (2, True)):
+        profile.record_answer(question_id, correct)
+        profile_saver.record(question_id, correct)
+    # Statistics from before the aggregates existed are picked up when they are built
+    self.assertEqual(StatisticsManager.profile_totals(profile._id)["shown"], 3)
+
+    with ProfileSaver(profile) as profile_saver:
+      profile.record_answer(2, False)
+      profile_saver.record(2, False)
+    totals = StatisticsManager.question_totals(2)
+    self.assertEqual((totals["shown"], totals["correct"]), (2, 1))
+
+    rows = StatisticsManager.report("hardest")
+    StatisticsManager.rebuild()
+    self.assertEqual(StatisticsManager.report("hardest"), rows)
+    self.assertEqual(AggregateStore(self.data_root.aggregates_file).question(2), totals)
+    self.assertEqual([row["id"] for row in StatisticsManager.report("leaderboard")], [profile._id])
+    with self.assertRaises(ValueError):
+      StatisticsManager.report("easiest")
+
+  def test_print_statistics_builds_aggregates(self):
+    question_manager = QuestionManager()
+    question_manager.add_question(FreeFormQuestion("2 + 2?", "4"))
+    question_manager.save_to_json()
+    profile = Profile("Jane Doe")
+    with ProfileSaver(profile) as profile_saver:
+      profile.record_answer(1, True)
+      profile_saver.record(1, True)
+    self.assertFalse(os.path.exists(self.data_root.aggregates_file))
+
+    ui = TerminalUI()
+    ui._profile = profile
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      ui.print_statistics()
+    self.assertIn("All learners: 1 of 1 (100.00%)", output.getvalue())
+    self.assertIn("Last practised:", output.getvalue())
+
+class TestStatisticsManagerSqlite(TestStatisticsManager):
+  backend = "sqlite"
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import csv
+import json
+import os
+import tempfile
+from functools import partial
+from unittest import mock
+from aggregates import AggregateStore
+from batch_grading import grade_records, grade_submissions, index_questions, read_submissions
+from storage import JsonStorage
+from user_profile import Profile
+
+QUESTIONS = [
+  {"type": "quiz", "id": 1, "question_text": "Closest planet to the sun?", "status": True, "answer_index": 0, "options": ["Mercury", "Venus"]},
+  {"type": "freeform", "id": 2, "question_text": "2 + 2?", "status": True, "answer": "4", "alternatives": ["four"]}
+]
+
+SUBMISSIONS = [
+  {"profile_id": 1, "question_id": 1, "answer": 1},
+  {"profile_id": 1, "question_id": 2, "answer": "Four"},
+  {"profile_id": 2, "question_id": 1, "answer": "venus"},
+  {"profile_id": 2, "question_id": 1, "answer": "Mercury"},
+  {"profile_id": 2, "question_id": 9, "answer": "?"},
+  {"profile_id": 3, "question_id": 2, "answer": "4"},
+  {"profile_id": 2, "answer": "4"}
+]
+
+class TestBatchGrading(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    questions_file = os.path.join(self.data_dir.name, "questions.json")
+    with open(questions_file, 'w') as file:
+      json.dump(QUESTIONS, file)
+    self.storage_factory = partial(JsonStorage, questions_file, self.data_dir.name)
+
+    storage = self.storage_factory()
+    for profile_id in (1, 2):
+      storage.save_profile(Profile.from_dict({"id": profile_id, "name": f"Student {profile_id}", "questions_stats": []}))
+
+    self.submissions_file = os.path.join(self.data_dir.name, "submissions.jsonl")
+    with open(self.submissions_file, 'w') as file:
+      for submission in SUBMISSIONS:
+        file.write(json.dumps(submission) + "\n")
+
+  def load_stats(self, profile_id):
+    storage = self.storage_factory()
+    return storage.load_profile(storage.read_profile(profile_id)).stats
+
+  def check_results(self, profiles, errors):
+    self.assertEqual(profiles, {1: [2, 2], 2: [2, 1]})
+    self.assertEqual([line_number for line_number, _ in errors], [5, 7, None])
+    self.assertIn("unknown profile 3", errors[-1][1])
+
+    stats = self.load_stats(2)
+    self.assertEqual((stats.times_shown(1), stats.correct_answers(1)), (2, 1))
+    self.assertEqual(stats.selection_probability(1), 1 - 1 / 3)
+    self.assertEqual(self.load_stats(1).correct_answers(2), 1)
+
+  def test_grade_in_process(self):
+    self.check_results(*grade_submissions(self.submissions_file, self.storage_factory))
+
+  def test_grade_with_workers(self):
+    self.check_results(*grade_submissions(self.submissions_file, self.storage_factory, workers=2))
+
+  def test_updates_aggregates(self):
+    aggregates_factory = partial(AggregateStore, os.path.join(self.data_dir.name, "aggregates.json"))
+    aggregates_factory().rebuild([])
+    self.check_results(*grade_submissions(self.submissions_file, self.storage_factory, workers=2, aggregates_factory=aggregates_factory))
+
+    aggregates = aggregates_factory()
+    self.assertEqual((aggregates.question(1)["shown"], aggregates.question(1)["correct"]), (3, 2))
+    self.assertEqual((aggregates.profile(2)["shown"], aggregates.profile(2)["correct"]), (2, 1))
+    self.assertIsNone(aggregates.profile(3))
+
+  def test_saves_profiles_in_batches(self):
+    storage = self.storage_factory()
+    storage.save_profile(Profile.from_dict({"id": 3, "name": "Student 3", "questions_stats": []}))
+    with mock.patch.object(storage, "save_profiles", wraps=storage.save_profiles) as save_profiles:
+      profiles, errors = grade_records(read_submissions(self.submissions_file), index_questions(QUESTIONS), storage, batch_size=2)
+    self.assertEqual([len(call.args[0]) for call in save_profiles.call_args_list], [2, 1])
+    self.assertEqual(profiles, {1: [2, 2], 2: [2, 1], 3: [1, 1]})
+    self.assertEqual(self.load_stats(3).correct_answers(2), 1)
+
+  def test_read_csv(self):
+    csv_file = os.path.join(self.data_dir.name, "submissions.csv")
+    with open(csv_file, 'w', newline='') as file:
+      writer = csv.DictWriter(file, fieldnames=["profile_id", "question_id", "answer"])
+      writer.writeheader()
+      writer.writerows(SUBMISSIONS[:2])
+    self.assertEqual(list(read_submissions(csv_file)), [(2, 1, 1, "1"), (3, 1, 2, "Four")])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import mmap
+import os
+import tempfile
+from unittest import mock
+from binary_stats import BinaryStatsFile, pack_binary_stats, read_binary_stats
+from profile_stats import ProfileStats
+
+QUESTIONS_STATS = [
+  {"id": 4, "times_shown": 3, "correct_answers": 1, "selection_probability": 0.5},
+  {"id": 2, "times_shown": 1, "correct_answers": 1, "selection_probability": 1.0}
+]
+
+class TestBinaryStats(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.file_name = tempfile.mkstemp(suffix=".stats")
+    with os.fdopen(fd, 'wb') as file:
+      file.write(pack_binary_stats(ProfileStats.from_list(QUESTIONS_STATS)))
+    self.addCleanup(os.remove, self.file_name)
+
+  def test_round_trip(self):
+    self.assertEqual(read_binary_stats(self.file_name).to_list(), sorted(QUESTIONS_STATS, key=lambda stats: stats["id"]))
+
+  def test_get(self):
+    with BinaryStatsFile(self.file_name) as stats_file:
+      self.assertEqual(len(stats_file), 2)
+      self.assertEqual(stats_file.get(4), QUESTIONS_STATS[0])
+      self.assertIsNone(stats_file.get(3))
+
+  def test_set_in_place(self):
+    size = os.path.getsize(self.file_name)
+    with BinaryStatsFile(self.file_name) as stats_file:
+      stats_file.set(4, 4, 2, 0.6)
+    self.assertEqual(os.path.getsize(self.file_name), size)
+    self.assertEqual(read_binary_stats(self.file_name).times_shown(4), 4)
+
+  def test_set_inserts_in_order(self):
+    with BinaryStatsFile(self.file_name) as stats_file:
+      stats_file.set(3, 1, 0, 0.5)
+      stats_file.set(1, 1, 1, 1.0)
+      stats_file.set(9, 2, 2, 1.0)
+      self.assertEqual(stats_file.get(3)["selection_probability"], 0.5)
+    self.assertEqual(list(read_binary_stats(self.file_name)), [1, 2, 3, 4, 9])
+
+  def test_set_inserts_without_mremap(self):
+    class NoRemap(mmap.mmap):
+      def resize(self, size):
+        raise SystemError("mmap: resizing not available--no mremap()")
+
+    with mock.patch("binary_stats.mmap.mmap", NoRemap):
+      with BinaryStatsFile(self.file_name) as stats_file:
+        stats_file.set(3, 1, 0, 0.5)
+        stats_file.set(9, 2, 2, 1.0)
+        self.assertEqual(stats_file.get(4), QUESTIONS_STATS[0])
+    self.assertEqual(list(read_binary_stats(self.file_name)), [2, 3, 4, 9])
+
+  def test_rejects_other_files(self):
+    with open(self.file_name, 'wb') as file:
+      file.write(b"[]")
+    with self.assertRaises(ValueError):
+      read_binary_stats(self.file_name)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import multiprocessing
+import os
+import tempfile
+import controller
+from controller import ProfileSaver
+from storage import AnswerLog, ConflictError, JsonStorage, fcntl
+from user_profile import Profile
+
+PROCESSES = 4
+
+ANSWERS = 60
+
+QUESTIONS_ADDED = 15
+
+def practice(questions_file, profiles_folder, worker):
+  storage = JsonStorage(questions_file, profiles_folder)
+  controller.use_storage(storage)
+  profile = storage.load_profile(storage.read_profile(1))
+  with ProfileSaver(profile, interval=3600, save_every=3, compact_every=7) as profile_saver:
+    for answer in range(ANSWERS):
+      question_id = answer % 5 + 1
+      profile.record_answer(question_id, worker % 2 == 0)
+      profile_saver.record(question_id, worker % 2 == 0)
+
+def grade(questions_file, profiles_folder, worker):
+  storage = JsonStorage(questions_file, profiles_folder)
+  for _ in range(ANSWERS // 10):
+    profile = storage.load_profile(storage.read_profile(1))
+    profile.add_counts({100 + worker: (10, 5)})
+    storage.save_profile(profile)
+
+def add_and_disable_questions(questions_file, profiles_folder, worker):
+  storage = JsonStorage(questions_file, profiles_folder)
+  first_id = 1000 * (worker + 1)
+  for question_id in range(first_id, first_id + QUESTIONS_ADDED):
+    storage.add_questions([{"type": "freeform", "id": question_id, "question_text": "?", "status": True, "answer": "!"}])
+
+  signature = storage.questions_signature()
+  questions = storage.load_questions()
+  mine = [question["id"] for question in questions if first_id <= question["id"] < first_id + QUESTIONS_ADDED]
+  for question in questions:
+    if question["id"] in mine:
+      question["status"] = False
+  storage.update_question_status(questions, mine, signature)
+
+@unittest.skipIf(fcntl is None, "file locking needs fcntl")
+class TestConcurrentWrites(unittest.TestCase):
+  """
+  Stress tests with several processes writing the same files at once.
+  """
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.questions_file = os.path.join(self.data_dir.name, "questions.json")
+    self.profiles_folder = os.path.join(self.data_dir.name, "profiles")
+    os.mkdir(self.profiles_folder)
+    self.storage = JsonStorage(self.questions_file, self.profiles_folder)
+    self.storage.save_questions([{"type": "freeform", "id": 1, "question_text": "?", "status": True, "answer": "!"}])
+    self.storage.save_profile(Profile.from_dict({"id": 1, "name": "Jane Doe"}))
+
+  def run_workers(self, *targets):
+    context = multiprocessing.get_context("fork")
+    processes = [
+      context.Process(target=target, args=(self.questions_file, self.profiles_folder, worker))
+      for worker, target in enumerate(targets)
+    ]
+    for process in processes:
+      process.start()
+    for process in processes:
+      process.join(60)
+      self.assertEqual(process.exitcode, 0)
+
+  def test_no_answers_are_lost(self):
+    self.run_workers(*[practice] * PROCESSES, *[grade] * 2)
+
+    profile = self.storage.load_profile(self.storage.read_profile(1))
+    practiced = PROCESSES * ANSWERS
+    graded = 2 * (ANSWERS // 10) * 10
+    self.assertEqual(sum(profile.stats.times_shown(question_id) for question_id in profile.stats), practiced + graded)
+    self.assertEqual(sum(profile.stats.correct_answers(question_id) for question_id in range(1, 6)), practiced // 2)
+    self.assertEqual(len(AnswerLog(self.profiles_folder, 1).recent(None)), practiced)
+
+  def test_no_questions_are_lost(self):
+    self.run_workers(*[add_and_disable_questions] * PROCESSES)
+
+    questions = self.storage.load_questions()
+    self.assertEqual(len(questions), 1 + PROCESSES * QUESTIONS_ADDED)
+    self.assertEqual([question["id"] for question in questions if question["status"]], [1])
+
+  def test_stale_save_conflicts(self):
+    signature = self.storage.questions_signature()
+    questions = self.storage.load_questions()
+    self.storage.add_questions([{"type": "freeform", "id": 2, "question_text": "?", "status": True, "answer": "!"}])
+    with self.assertRaises(ConflictError):
+      self.storage.save_questions(questions, signature)
+    self.assertEqual(len(self.storage.load_questions()), 2)
@@ -0,0 +1,74 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import contextlib
+import io
+from unittest import mock
+import controller
+from controller import ProfileManager, QuestionManager, ResultManager
+from data_root import DataRoot
+from free_form_question import FreeFormQuestion
+from storage import JsonStorage, SqliteStorage, create_storage
+from user_profile import Profile
+from tests import use_temporary_data_root
+
+class TestDataRoot(unittest.TestCase):
+
+  def setUp(self):
+    self.data_root = use_temporary_data_root(self)
+
+  def test_managers_use_data_root(self):
+    profile = Profile("Jane Doe")
+    question_manager = QuestionManager()
+    question_manager.add_question(FreeFormQuestion("2 + 2?", "4"))
+    question_manager.save_to_json()
+    ResultManager.record(profile._id, [(1, True, 2.0), (2, False, 3.0)], 5.0)
+
+    self.assertEqual(profile._id, 1)
+    self.assertEqual([profile["name"] for profile in ProfileManager.list_profiles()], ["Jane Doe"])
+    self.assertTrue(os.path.exists(os.path.join(self.data_root.profiles_folder, "1.json")))
+    self.assertEqual([question["id"] for question in JsonStorage(self.data_root.questions_file).load_questions()], [1])
+    self.assertEqual(QuestionManager.get_last_id(), controller.question_ids._block_end)
+    self.assertTrue(os.path.exists(self.data_root.results_file))
+    self.assertEqual([record["score"] for record in ResultManager.recent(profile._id)], [50.0])
+
+  def test_toggle_unknown_question_writes_nothing(self):
+    question_manager = QuestionManager()
+    question_manager.add_question(FreeFormQuestion("2 + 2?", "4"))
+    question_manager.save_to_json()
+    with mock.patch.object(controller.storage, "update_question_status") as update_question_status:
+      QuestionManager.toggle_question_status([99])
+    update_question_status.assert_not_called()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+      QuestionManager.toggle_question_status([1])
+    self.assertFalse(JsonStorage(self.data_root.questions_file).load_questions()[0]["status"])
+
+  def test_data_roots_are_isolated(self):
+    Profile("Jane Doe")
+    other = use_temporary_data_root(self)
+    self.assertNotEqual(other.path, self.data_root.path)
+    self.assertEqual(ProfileManager.list_profiles(), [])
+    self.assertEqual(Profile("John Doe")._id, 1)
+
+  def test_create_storage(self):
+    self.assertIsInstance(create_storage("json", self.data_root), JsonStorage)
+    storage = create_storage("sqlite", self.data_root)
+    self.addCleanup(storage.close)
+    self.assertIsInstance(storage, SqliteStorage)
+    self.assertTrue(os.path.exists(self.data_root.database_file))
+
+  def test_environment_variable(self):
+    with tempfile.TemporaryDirectory() as data_dir:
+      environment = dict(os.environ, LEARNING_TOOL_DATA_DIR=data_dir)
+      output = subprocess.run(
+        [sys.executable, "-c", "from data_root import DataRoot; print(DataRoot().path)"],
+        env=environment, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+      ).stdout
+    self.assertEqual(output.strip(), os.path.abspath(data_dir))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -28,5 +28,14 @@ class TestFreeFormQuestion(unittest.TestCase):
     self.assertTrue(self.free_form_question.check_answer("Paris"))
     self.assertFalse(self.free_form_question.check_answer("Berlin"))
 
+  def test_check_answer_normalizes(self):
+    self.assertTrue(self.free_form_question.check_answer("  paris "))
+
+  def test_check_answer_alternatives(self):
+    question = FreeFormQuestion("What is 2 + 2?", "4", alternatives=["four"])
+    self.assertTrue(question.check_answer("Four"))
+    self.assertFalse(question.check_answer("5"))
+    self.assertEqual(question.to_dict()["alternatives"], ["four"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import unittest
+from grading import accepted_answers, grade_answer, grade_many, grade_question, normalize_answer, within_edit_distance
+
+def edit_distance(first, second):
+  previous = list(range(len(second) + 1))
+  for i, first_character in enumerate(first, start=1):
+    current = [i]
+    for j, second_character in enumerate(second, start=1):
+      current.append(min(previous[j - 1] + (first_character != second_character), previous[j] + 1, current[j - 1] + 1))
+    previous = current
+  return previous[-1]
+
+class TestGrading(unittest.TestCase):
+
+  def test_normalize_answer(self):
+    self.assertEqual(normalize_answer("  The\tEiffel   TOWER \n"), "the eiffel tower")
+    self.assertEqual(normalize_answer("Straße"), normalize_answer("STRASSE"))
+
+  def test_accepted_answers_are_cached(self):
+    self.assertIs(accepted_answers("Paris", ("City of Light",)), accepted_answers("Paris", ("City of Light",)))
+
+  def test_within_edit_distance(self):
+    words = ["", "a", "ab", "ba", "abc", "acb", "kitten", "sitting", "mercury", "mecrury"]
+    for first in words:
+      for second in words:
+        for limit in range(4):
+          with self.subTest(first=first, second=second, limit=limit):
+            self.assertEqual(within_edit_distance(first, second, limit), edit_distance(first, second) <= limit)
+
+  def test_grade_answer(self):
+    self.assertTrue(grade_answer("mercury", "Mercury"))
+    self.assertTrue(grade_answer("Mercuri", "Mercury"))
+    self.assertFalse(grade_answer("Mercuri", "Mercury", max_distance=0))
+    self.assertFalse(grade_answer("Mrcuri", "Mercury"))
+    self.assertFalse(grade_answer("5", "4"))
+    self.assertTrue(grade_answer("four", "4", ["four"]))
+
+  def test_grade_question(self):
+    quiz = {"type": "quiz", "answer_index": 1, "options": ["A", "B"]}
+    freeform = {"type": "freeform", "answer": "Paris"}
+    self.assertTrue(grade_question(quiz, 1))
+    self.assertFalse(grade_question(quiz, 0))
+    self.assertEqual(grade_many([(freeform, "paris"), (freeform, "Rome"), (quiz, 1)]), [True, False, True])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+import tempfile
+from controller import IdAllocator
+from quiz_question import QuizQuestion
+from free_form_question import FreeFormQuestion
+
+class TestIdAllocator(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.file_name = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    self.addCleanup(os.remove, self.file_name)
+
+  def read_last_id(self):
+    with open(self.file_name) as f:
+      return int(f.read())
+
+  def test_allocates_sequential_ids(self):
+    allocator = IdAllocator(self.file_name, block_size=4)
+    self.assertEqual([allocator.allocate() for _ in range(6)], [1, 2, 3, 4, 5, 6])
+
+  def test_reserves_in_blocks(self):
+    allocator = IdAllocator(self.file_name, block_size=4)
+    allocator.allocate()
+    self.assertEqual(self.read_last_id(), 4)
+    allocator.allocate()
+    allocator.allocate()
+    self.assertEqual(self.read_last_id(), 4)
+
+  def test_allocate_many(self):
+    allocator = IdAllocator(self.file_name, block_size=4)
+    self.assertEqual(allocator.allocate_many(10), 1)
+    self.assertEqual(allocator.allocate(), 11)
+    self.assertEqual(self.read_last_id(), 14)
+
+  def test_allocators_sharing_a_file_never_collide(self):
+    first = IdAllocator(self.file_name, block_size=3)
+    second = IdAllocator(self.file_name, block_size=3)
+    ids = []
+    for _ in range(10):
+      ids.append(first.allocate())
+      ids.append(second.allocate())
+    self.assertEqual(len(set(ids)), len(ids))
+
+  def test_deserialization_keeps_stored_id(self):
+    quiz_question = QuizQuestion.from_json('{"id": 42, "question_text": "Q?", "answer_index": 0, "options": ["A", "B"], "status": true}')
+    free_form_question = FreeFormQuestion.from_json('{"id": 43, "question_text": "Q?", "answer": "A", "status": false}')
+    self.assertEqual(quiz_question._id, 42)
+    self.assertEqual(free_form_question._id, 43)
+
+if __name__ == '__main__':
+  unittest.main()
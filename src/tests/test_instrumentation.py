@@ -0,0 +1,94 @@
+import unittest
+import io
+import os
+import pstats
+import tempfile
+from unittest import mock
+import instrumentation
+from instrumentation import instrumented, measure, count_bytes
+from storage import JsonStorage
+
+@instrumented("double")
+def double(value):
+  count_bytes(read=10)
+  return value * 2
+
+@instrumented("outer")
+def outer(value):
+  count_bytes(written=5)
+  return double(value)
+
+class TestInstrumentation(unittest.TestCase):
+
+  def setUp(self):
+    instrumentation.reset()
+    self.addCleanup(instrumentation.reset)
+    self.addCleanup(instrumentation.disable)
+
+  def test_disabled_records_nothing(self):
+    self.assertEqual(outer(2), 4)
+    with measure("block"):
+      count_bytes(read=1)
+    self.assertEqual(instrumentation.summary(), {"operations": {}, "bytes_read": 0, "bytes_written": 0})
+
+  def test_records_calls_and_inclusive_bytes(self):
+    instrumentation.enable()
+    for value in range(3):
+      self.assertEqual(outer(value), value * 2)
+    double(1)
+
+    summary = instrumentation.summary()
+    self.assertEqual(summary["operations"]["outer"]["calls"], 3)
+    self.assertEqual(summary["operations"]["double"]["calls"], 4)
+    self.assertEqual(sum(summary["operations"]["double"]["histogram"]), 4)
+    self.assertEqual((summary["operations"]["outer"]["bytes_read"], summary["operations"]["outer"]["bytes_written"]), (30, 15))
+    self.assertEqual((summary["operations"]["double"]["bytes_read"], summary["operations"]["double"]["bytes_written"]), (40, 0))
+    self.assertEqual((summary["bytes_read"], summary["bytes_written"]), (40, 15))
+
+  def test_measure_and_percentiles(self):
+    instrumentation.enable()
+    with mock.patch("instrumentation.time.perf_counter", side_effect=[0.0, 0.001, 0.0, 0.1]):
+      with measure("block"):
+        pass
+      with measure("block"):
+        pass
+
+    stats = instrumentation.summary()["operations"]["block"]
+    self.assertEqual(stats["calls"], 2)
+    self.assertAlmostEqual(stats["max_time"], 0.1)
+    self.assertLessEqual(stats["p50"], 0.002)
+    self.assertAlmostEqual(stats["p99"], 0.1)
+    self.assertIn("block", instrumentation.format_summary())
+
+  def test_counts_storage_io(self):
+    with tempfile.TemporaryDirectory() as data_dir:
+      questions_file = os.path.join(data_dir, "questions.json")
+      storage = JsonStorage(questions_file, data_dir)
+      instrumentation.enable()
+      with measure("save"):
+        storage.save_questions([{"type": "freeform", "id": 1, "question_text": "2 + 2?", "status": True, "answer": "4"}])
+      with measure("load"):
+        storage.load_questions()
+      size = os.path.getsize(questions_file)
+
+    operations = instrumentation.summary()["operations"]
+    self.assertEqual(operations["save"]["bytes_written"], size)
+    self.assertEqual(operations["load"]["bytes_read"], size)
+
+  def test_profile_session(self):
+    with tempfile.TemporaryDirectory() as data_dir:
+      pstats_file = os.path.join(data_dir, "session.pstats")
+      output = io.StringIO()
+      with mock.patch("instrumentation.atexit.register") as register:
+        instrumentation.profile_session(pstats_file, output)
+      self.assertTrue(instrumentation.is_enabled())
+      double(1)
+
+      report, = register.call_args.args
+      report()
+      self.assertFalse(instrumentation.is_enabled())
+      self.assertIn("double", output.getvalue())
+      self.assertTrue(pstats.Stats(pstats_file).total_calls > 0)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest import mock
+from controller import ProfileManager, ProfileSaver
+from storage import AnswerLog, JsonStorage
+from user_profile import Profile
+
+class TestProfileSaver(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    patcher = mock.patch("controller.storage", JsonStorage(profiles_folder=self.data_dir.name))
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+    self.profile_data = {
+      "id": 7,
+      "name": "Jane Doe",
+      "questions_stats": [{"id": 1, "times_shown": 0, "correct_answers": 0, "selection_probability": 1}]
+    }
+    self.profile = Profile.from_dict(self.profile_data)
+    self.file_name = os.path.join(self.data_dir.name, "7.json")
+
+  def answer(self, profile_saver, correct=True):
+    self.profile.record_answer(1, correct)
+    profile_saver.record(1, correct)
+
+  def logged_answers(self):
+    return len(AnswerLog(self.data_dir.name, 7).read()[1])
+
+  def load_saved_profile(self):
+    with open(self.file_name) as file:
+      return ProfileManager.load_profile(json.load(file))
+
+  def test_flushes_every_n_answers(self):
+    with ProfileSaver(self.profile, interval=3600, save_every=3) as profile_saver:
+      self.answer(profile_saver)
+      self.answer(profile_saver)
+      self.assertEqual(self.logged_answers(), 0)
+      self.answer(profile_saver)
+      self.assertEqual(self.logged_answers(), 3)
+      self.assertEqual(profile_saver.pending, 0)
+    self.assertFalse(os.path.exists(self.file_name))
+
+  def test_flushes_after_interval(self):
+    with ProfileSaver(self.profile, interval=0, save_every=100) as profile_saver:
+      self.answer(profile_saver)
+      self.assertEqual(self.logged_answers(), 1)
+
+  def test_flushes_on_close(self):
+    with ProfileSaver(self.profile, interval=3600, save_every=100) as profile_saver:
+      self.answer(profile_saver)
+    self.assertEqual(self.logged_answers(), 1)
+
+  def test_compacts_log_into_snapshot(self):
+    with ProfileSaver(self.profile, interval=3600, save_every=1, compact_every=2) as profile_saver:
+      self.answer(profile_saver)
+      self.answer(profile_saver, correct=False)
+      self.answer(profile_saver)
+
+    self.assertEqual(self.logged_answers(), 1)
+    profile = self.load_saved_profile()
+    self.assertEqual(profile.get_question_stats(1)["times_shown"], 3)
+    self.assertEqual(profile.get_question_stats(1)["correct_answers"], 2)
+    self.assertEqual(len(ProfileManager.get_answer_history(profile)), 3)
+
+  def test_replays_log_on_load(self):
+    ProfileManager.save_to_json(self.profile)
+    with ProfileSaver(self.profile, interval=3600, save_every=1) as profile_saver:
+      self.answer(profile_saver, correct=False)
+      self.answer(profile_saver)
+
+    profile = self.load_saved_profile()
+    self.assertEqual(profile.get_question_stats(1), self.profile.get_question_stats(1))
+
+  def test_ignores_log_already_folded(self):
+    ProfileManager.save_to_json(self.profile)
+    with ProfileSaver(self.profile, interval=3600, save_every=1) as profile_saver:
+      self.answer(profile_saver)
+    # Simulate a crash after the snapshot was written but before the log was reset
+    self.profile._log_checkpoint += 1
+    with open(self.file_name, 'w') as file:
+      json.dump(self.profile.to_dict(), file)
+
+    profile = self.load_saved_profile()
+    self.assertEqual(profile.get_question_stats(1)["times_shown"], 1)
+
+if __name__ == '__main__':
+  unittest.main()
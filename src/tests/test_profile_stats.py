@@ -0,0 +1,62 @@
+import unittest
+from profile_stats import ProfileStats, calculate_new_probability
+
+QUESTIONS_STATS = [
+  {"id": 4, "times_shown": 3, "correct_answers": 1, "selection_probability": 0.5},
+  {"id": 2, "times_shown": 1, "correct_answers": 1, "selection_probability": 1.0}
+]
+
+class TestProfileStats(unittest.TestCase):
+
+  def setUp(self):
+    self.stats = ProfileStats.from_list(QUESTIONS_STATS)
+
+  def test_round_trip(self):
+    self.assertEqual(self.stats.to_list(), QUESTIONS_STATS)
+
+  def test_from_rows(self):
+    rows = [(stats["id"], stats["times_shown"], stats["correct_answers"], stats["selection_probability"]) for stats in QUESTIONS_STATS]
+    self.assertEqual(ProfileStats.from_rows(rows).to_list(), QUESTIONS_STATS)
+    self.assertEqual(len(ProfileStats.from_rows([])), 0)
+
+  def test_lookup(self):
+    self.assertEqual(self.stats.times_shown(4), 3)
+    self.assertEqual(self.stats.correct_answers(4), 1)
+    self.assertEqual(self.stats.selection_probability(2), 1.0)
+    self.assertIn(4, self.stats)
+
+  def test_defaults_for_unanswered(self):
+    self.assertNotIn(9, self.stats)
+    self.assertEqual(self.stats.times_shown(9), 0)
+    self.assertEqual(self.stats.selection_probability(9), 1)
+    self.assertEqual(dict(self.stats.view(9)), {"id": 9, "times_shown": 0, "correct_answers": 0, "selection_probability": 1})
+
+  def test_record(self):
+    view = self.stats.view(9)
+    probability = self.stats.record(9, False)
+    self.assertEqual(view["times_shown"], 1)
+    self.assertEqual(probability, calculate_new_probability(view))
+    self.assertEqual(len(self.stats), 3)
+
+  def test_record_many_matches_record(self):
+    answers = [(4, True), (9, False), (4, False), (2, True), (9, True)]
+    one_by_one = ProfileStats.from_list(QUESTIONS_STATS)
+    for question_id, correct in answers:
+      one_by_one.record(question_id, correct)
+    self.stats.record_many(answers)
+    self.assertEqual(self.stats.to_list(), one_by_one.to_list())
+
+  def test_add_counts_matches_record_many(self):
+    answers = [(4, True), (9, False), (4, False), (2, True), (9, True)]
+    expected = ProfileStats.from_list(QUESTIONS_STATS)
+    expected.record_many(answers)
+    self.stats.add_counts({4: (2, 1), 9: (2, 1), 2: (1, 1)})
+    self.assertEqual(sorted(self.stats.to_list(), key=lambda stats: stats["id"]), sorted(expected.to_list(), key=lambda stats: stats["id"]))
+
+  def test_recalculate_probabilities(self):
+    self.stats.set_selection_probability(4, 0.9)
+    self.stats.recalculate_probabilities()
+    self.assertEqual(self.stats.selection_probability(4), calculate_new_probability(self.stats.view(4)))
+
+if __name__ == '__main__':
+  unittest.main()
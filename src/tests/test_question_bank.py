@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest import mock
+from controller import QuestionBank
+from storage import JsonStorage
+
+class TestQuestionBank(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.file_name = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    self.write_questions([
+      {"type": "freeform", "id": 1, "question_text": "2 + 2?", "status": True, "answer": "4"},
+      {"type": "freeform", "id": 2, "question_text": "3 + 3?", "status": False, "answer": "6"}
+    ])
+    self.storage = JsonStorage(questions_file=self.file_name)
+    self.bank = QuestionBank(self.storage)
+
+  def tearDown(self):
+    os.remove(self.file_name)
+
+  def write_questions(self, questions):
+    with open(self.file_name, 'w') as file:
+      json.dump(questions, file)
+
+  def test_get(self):
+    self.assertEqual(self.bank.get(1)["answer"], "4")
+    self.assertIsNone(self.bank.get(3))
+
+  def test_active_index(self):
+    self.assertEqual(list(self.bank.active_ids), [1])
+    self.assertTrue(self.bank.is_active(1))
+    self.assertFalse(self.bank.is_active(2))
+    self.assertFalse(self.bank.is_active(3))
+
+  def test_loads_once(self):
+    questions = self.bank.questions
+    self.assertIs(self.bank.questions, questions)
+
+  def test_reloads_when_file_changes(self):
+    version = self.bank.version
+    self.write_questions([
+      {"type": "freeform", "id": 1, "question_text": "2 + 2?", "status": True, "answer": "4"},
+      {"type": "freeform", "id": 2, "question_text": "3 + 3?", "status": True, "answer": "6"},
+      {"type": "freeform", "id": 3, "question_text": "4 + 4?", "status": True, "answer": "8"}
+    ])
+    self.assertEqual(list(self.bank.active_ids), [1, 2, 3])
+    self.assertGreater(self.bank.version, version)
+
+  def test_extend_after_add(self):
+    self.bank.questions
+    new_question = {"type": "freeform", "id": 3, "question_text": "4 + 4?", "status": True, "answer": "8"}
+    self.addCleanup(os.remove, self.file_name + ".lock")
+    self.bank.extend([new_question], self.storage.add_questions([new_question], self.bank.signature))
+    with mock.patch.object(self.storage, "load_questions") as load_questions:
+      self.assertEqual(list(self.bank.active_ids), [1, 3])
+      self.assertIs(self.bank.get(3), new_question)
+    load_questions.assert_not_called()
+
+  def test_reloads_after_others_append(self):
+    self.bank.questions
+    self.addCleanup(os.remove, self.file_name + ".lock")
+    other = JsonStorage(questions_file=self.file_name)
+    other.add_questions([{"type": "freeform", "id": 3, "question_text": "4 + 4?", "status": True, "answer": "8"}])
+    new_question = {"type": "freeform", "id": 4, "question_text": "5 + 5?", "status": True, "answer": "10"}
+    self.bank.extend([new_question], self.storage.add_questions([new_question], self.bank.signature))
+    self.assertEqual(list(self.bank.active_ids), [1, 3, 4])
+
+  def test_reloads_changes_committed_after_write(self):
+    questions = self.bank.questions
+    self.addCleanup(os.remove, self.file_name + ".lock")
+    questions[1]["status"] = True
+    signature = self.storage.update_question_status(questions, [2], self.bank.signature)
+    # Another writer appends before the bank is told about the write
+    JsonStorage(questions_file=self.file_name).add_questions([{"type": "freeform", "id": 3, "question_text": "4 + 4?", "status": True, "answer": "8"}])
+    self.bank.replace(questions, signature)
+    self.assertEqual(list(self.bank.active_ids), [1, 2, 3])
+
+if __name__ == '__main__':
+  unittest.main()
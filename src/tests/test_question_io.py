@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+import tempfile
+from controller import IdAllocator
+from question_io import import_questions, export_questions, validate_question_data
+from storage import JsonStorage
+
+QUESTIONS = [
+  {"type": "quiz", "question_text": "Closest planet to the sun?", "status": True, "answer_index": 0, "options": ["Mercury", "Venus"]},
+  {"type": "freeform", "question_text": "2 + 2?", "status": False, "answer": "4"},
+  {"type": "freeform", "question_text": "3 + 3?", "status": True, "answer": "6", "alternatives": ["six", "VI"]}
+]
+
+class TestQuestionIO(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.questions_file = self.path("questions.json")
+    self.storage = JsonStorage(self.questions_file, self.data_dir.name)
+    self.id_allocator = IdAllocator(self.path("last_id.txt"), block_size=1)
+
+  def path(self, file_name):
+    return os.path.join(self.data_dir.name, file_name)
+
+  def stored_questions(self):
+    with open(self.questions_file) as file:
+      return json.load(file)
+
+  def test_round_trip(self):
+    for file_format in ("jsonl", "csv"):
+      with self.subTest(file_format=file_format):
+        file_name = self.path(f"questions.{file_format}")
+        self.assertEqual(export_questions(file_name, QUESTIONS), 3)
+        if os.path.exists(self.questions_file):
+          os.remove(self.questions_file)
+
+        imported, existing, errors = import_questions(file_name, self.storage, self.id_allocator, batch_size=2)
+        self.assertEqual((imported, existing, errors), (3, 0, []))
+        stored = self.stored_questions()
+        self.assertEqual([{k: v for k, v in q.items() if k != "id"} for q in stored], QUESTIONS)
+        self.assertEqual(len({q["id"] for q in stored}), 3)
+
+  def test_reimport_of_export_skips_existing_questions(self):
+    for file_format in ("jsonl", "csv"):
+      with self.subTest(file_format=file_format):
+        if os.path.exists(self.questions_file):
+          os.remove(self.questions_file)
+        source_file = self.path("source.jsonl")
+        export_questions(source_file, QUESTIONS)
+        import_questions(source_file, self.storage, self.id_allocator)
+        stored = self.stored_questions()
+
+        export_file = self.path(f"export.{file_format}")
+        export_questions(export_file, self.storage.load_questions())
+        with open(export_file, 'a') as file:
+          if file_format == "jsonl":
+            file.write(json.dumps(dict(QUESTIONS[1], id=999)) + "\n")
+          else:
+            file.write('freeform,999,4 + 4?,True,8,,,\n')
+
+        imported, existing, errors = import_questions(export_file, self.storage, self.id_allocator)
+        self.assertEqual((imported, existing, errors), (1, 3, []))
+        self.assertEqual(self.stored_questions()[:3], stored)
+        self.assertEqual(len(self.stored_questions()), 4)
+
+  def test_skips_invalid_rows(self):
+    file_name = self.path("questions.jsonl")
+    with open(file_name, 'w') as file:
+      file.write(json.dumps(QUESTIONS[0]) + "\n")
+      file.write("not json\n")
+      file.write(json.dumps({"type": "quiz", "question_text": "Q?", "answer_index": 3, "options": ["A", "B"]}) + "\n")
+      file.write(json.dumps(QUESTIONS[2]) + "\n")
+
+    imported, _, errors = import_questions(file_name, self.storage, self.id_allocator)
+    self.assertEqual(imported, 2)
+    self.assertEqual([line_number for line_number, _ in errors], [2, 3])
+    self.assertEqual(len(self.stored_questions()), 2)
+
+  def test_validate_question_data(self):
+    with self.assertRaises(ValueError):
+      validate_question_data({"type": "freeform", "question_text": "Q?"})
+    with self.assertRaises(ValueError):
+      validate_question_data({"type": "essay", "question_text": "Q?", "answer": "A"})
+    self.assertTrue(validate_question_data({"type": "freeform", "question_text": "Q?", "answer": "A"})["status"])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,213 @@
+import unittest
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+from aggregates import AggregateStore
+import controller
+from controller import IdAllocator, ProfileManager, QuestionBank, QuestionManager
+from quiz_server import QuizServer, StorageWriter
+from storage import AnswerLog, JsonStorage
+from user_profile import Profile
+from tests import use_temporary_data_root
+
+QUESTIONS = [
+  {"type": "quiz", "id": 1, "question_text": "Closest planet to the sun?", "status": True, "answer_index": 0, "options": ["Mercury", "Venus"]},
+  {"type": "freeform", "id": 2, "question_text": "2 + 2?", "status": True, "answer": "4", "alternatives": ["four"]}
+]
+
+ANSWERS = {1: 1, 2: "four"}
+
+class TestQuizServer(unittest.IsolatedAsyncioTestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    questions_file = os.path.join(self.data_dir.name, "questions.json")
+    with open(questions_file, 'w') as file:
+      json.dump(QUESTIONS, file)
+    self.profiles_folder = os.path.join(self.data_dir.name, "profiles")
+    os.mkdir(self.profiles_folder)
+    storage = JsonStorage(questions_file, self.profiles_folder)
+    storage.save_profile(Profile.from_dict({"id": 1, "name": "Jane Doe", "questions_stats": []}))
+
+    last_id_file = os.path.join(self.data_dir.name, "last_id_profiles.txt")
+    with open(last_id_file, 'w') as file:
+      file.write("1")
+
+    self.aggregates = AggregateStore(os.path.join(self.data_dir.name, "aggregates.json"))
+    self.aggregates.rebuild([])
+    self.results = []
+    for target, value in (
+      ("controller.aggregates", self.aggregates),
+      ("controller.storage", storage),
+      ("controller.question_bank", QuestionBank(storage)),
+      ("controller.profile_ids", IdAllocator(last_id_file)),
+      ("controller.ResultManager.record", lambda profile_id, answers, duration: self.results.append((profile_id, answers)))
+    ):
+      patcher = mock.patch(target, value)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+  async def asyncSetUp(self):
+    self.server = QuizServer("127.0.0.1", 0, StorageWriter(save_every=2, compact_every=3))
+    await self.server.start()
+
+  async def asyncTearDown(self):
+    await self.server.close()
+
+  async def connect(self):
+    reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+    self.addAsyncCleanup(self.disconnect, writer)
+
+    async def request(**fields):
+      writer.write(json.dumps(fields).encode() + b"\n")
+      await writer.drain()
+      return json.loads(await reader.readline())
+    return request
+
+  async def disconnect(self, writer):
+    writer.close()
+    await writer.wait_closed()
+
+  async def test_practice_updates_shared_profile(self):
+    first, second = await self.connect(), await self.connect()
+    self.assertEqual((await first(op="open", profile_id=1))["profile"]["name"], "Jane Doe")
+    await second(op="open", profile_id=1)
+
+    questions = {first: (await first(op="practice"))["question"], second: (await second(op="practice"))["question"]}
+    self.assertNotIn("answer_index", questions[first])
+    self.assertNotIn("answer", questions[first])
+    for request in (first, second, first, second):
+      response = await request(op="answer", answer=ANSWERS[questions[request]["id"]])
+      self.assertTrue(response["correct"])
+      questions[request] = response["question"]
+
+    profile = self.server._profiles[1][0]
+    self.assertEqual(sum(profile.stats.times_shown(question_id) for question_id in ANSWERS), 4)
+
+    await self.server.close()
+    profile = ProfileManager.open_profile(1)
+    self.assertEqual(sum(profile.stats.times_shown(question_id) for question_id in ANSWERS), 4)
+    self.assertEqual(len(AnswerLog(self.profiles_folder, 1).recent(10)), 4)
+    self.assertEqual(self.aggregates.profile(1)["shown"], 4)
+
+  async def test_test_mode_scores(self):
+    request = await self.connect()
+    await request(op="open", profile_id=1)
+    response = await request(op="test", count=2)
+    self.assertEqual(response["remaining"], 2)
+    response = await request(op="answer", answer=ANSWERS[response["question"]["id"]])
+    response = await request(op="answer", answer="wrong")
+    self.assertEqual(response, {"correct": False, "score": 50.0})
+    (profile_id, answers), = self.results
+    self.assertEqual(profile_id, 1)
+    self.assertEqual([correct for _, correct, _ in answers], [True, False])
+
+  async def test_create_profile(self):
+    request = await self.connect()
+    profile = (await request(op="create", name="John Doe"))["profile"]
+    self.assertEqual(profile["name"], "John Doe")
+    self.assertEqual(await request(op="scheduler", name="leitner"), {"scheduler": "leitner"})
+    self.assertEqual(ProfileManager.open_profile(profile["id"]).scheduler, "leitner")
+    self.assertEqual(len((await request(op="profiles"))["profiles"]), 2)
+
+  async def test_errors(self):
+    request = await self.connect()
+    self.assertIn("error", await request(op="practice"))
+    self.assertIn("error", await request(op="open", profile_id=99))
+    self.assertIn("error", await request(op="fly"))
+    self.assertIn("error", await request(op="open"))
+    await request(op="open", profile_id=1)
+    self.assertIn("error", await request(op="answer", answer=1))
+    self.assertIn("error", await request(op="test", count=3))
+    self.assertIn("error", await request(op="scheduler", name="cram"))
+
+  async def test_profile_unloaded_when_last_session_closes(self):
+    request = await self.connect()
+    await request(op="open", profile_id=1)
+    self.assertIn(1, self.server._profiles)
+    await request(op="create", name="John Doe")
+    self.assertNotIn(1, self.server._profiles)
+
+class TestStorageWriter(unittest.IsolatedAsyncioTestCase):
+  setUp = TestQuizServer.setUp
+
+  async def asyncSetUp(self):
+    self.writer = StorageWriter()
+    self.writer.start()
+
+  async def asyncTearDown(self):
+    await self.writer.close()
+
+  async def test_snapshot_includes_queued_answers_once(self):
+    profile = ProfileManager.open_profile(1)
+    profile.record_answer(1, True)
+    self.writer.record(profile, 1, True)
+    saved = self.writer.save(profile)
+    # An answer given after the save was queued but before it runs
+    profile.record_answer(2, True)
+    self.writer.record(profile, 2, True)
+    await saved
+    await self.writer.close()
+
+    profile = ProfileManager.open_profile(1)
+    self.assertEqual((profile.stats.times_shown(1), profile.stats.times_shown(2)), (1, 1))
+    self.assertEqual(self.aggregates.profile(1)["shown"], 2)
+
+  async def test_waits_for_snapshot(self):
+    profile = ProfileManager.open_profile(1)
+    release = threading.Event()
+    save_to_json = ProfileManager.save_to_json
+    def save(profile):
+      release.wait()
+      save_to_json(profile)
+    with mock.patch.object(ProfileManager, "save_to_json", save):
+      saved = self.writer.save(profile)
+      try:
+        while 1 not in self.writer._saving:
+          await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(self.writer.wait_until_saved(profile))
+        await asyncio.sleep(0.05)
+        self.assertFalse(waiting.done())
+      finally:
+        release.set()
+      await waiting
+    self.assertTrue(saved.done())
+
+  async def test_writes_off_event_loop(self):
+    threads = []
+    save_to_json = ProfileManager.save_to_json
+    def save(profile):
+      threads.append(threading.current_thread())
+      save_to_json(profile)
+    with mock.patch.object(ProfileManager, "save_to_json", save):
+      await self.writer.save(ProfileManager.open_profile(1))
+    self.assertEqual(len(threads), 1)
+    self.assertIsNot(threads[0], threading.main_thread())
+
+class TestStorageWriterSqlite(unittest.IsolatedAsyncioTestCase):
+
+  def setUp(self):
+    use_temporary_data_root(self, "sqlite")
+    controller.storage.save_questions(QUESTIONS)
+
+  async def test_loop_and_writer_use_own_connections(self):
+    profile = Profile("Jane Doe")
+    writer = StorageWriter(save_every=100)
+    writer.start()
+    profile.record_answer(1, True)
+    writer.record(profile, 1, True)
+    await asyncio.sleep(0.05)
+
+    # Written on the event loop while the writer has an answer buffered
+    with contextlib.redirect_stdout(io.StringIO()):
+      QuestionManager.toggle_question_status([2])
+    await writer.close()
+
+    self.assertEqual(ProfileManager.open_profile(profile._id).stats.times_shown(1), 1)
+    self.assertFalse(controller.storage.load_questions()[1]["status"])
@@ -0,0 +1,87 @@
+import unittest
+import datetime
+import os
+import tempfile
+from unittest import mock
+from results_store import ResultStore
+from storage import atomic_write_text
+
+DAY = 24 * 60 * 60
+
+class TestResultStore(unittest.TestCase):
+
+  def setUp(self):
+    data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(data_dir.cleanup)
+    self.file_name = os.path.join(data_dir.name, "results.jsonl")
+    self.store = ResultStore(self.file_name)
+    self.start = int(datetime.datetime(2024, 3, 1, 12).timestamp())
+
+  def test_append(self):
+    record = self.store.append(1, [(5, True, 1.25), (6, False, 3.5)], 4.75, self.start)
+    self.assertEqual(record, {"profile_id": 1, "timestamp": self.start, "duration": 4.75, "score": 50.0, "answers": [[5, True, 1.25], [6, False, 3.5]]})
+    self.assertEqual(ResultStore(self.file_name).recent(1), [record])
+
+  def test_recent(self):
+    for test in range(30):
+      self.store.append(test % 2, [(test, True, 1.0)], 1.0, self.start + test)
+
+    recent = ResultStore(self.file_name).recent(1, limit=3)
+    self.assertEqual([record["answers"][0][0] for record in recent], [25, 27, 29])
+    self.assertEqual(self.store.recent(2), [])
+    self.assertEqual(self.store.recent(1, limit=0), [])
+
+  def test_between(self):
+    for day in range(5):
+      self.store.append(1, [(day, True, 1.0)], 1.0, self.start + day * DAY)
+
+    first_day = datetime.date(2024, 3, 2)
+    records = self.store.between(first_day, first_day + datetime.timedelta(days=2))
+    self.assertEqual([record["answers"][0][0] for record in records], [1, 2, 3])
+
+  def test_question_stats(self):
+    self.store.append(1, [(5, True, 1.0), (6, False, 1.0)], 2.0, self.start)
+    self.store.append(2, [(5, False, 1.0), (6, False, 1.0)], 2.0, self.start)
+
+    with mock.patch("builtins.open", side_effect=AssertionError("the index should be cached")):
+      stats = self.store.question_stats()
+    self.assertEqual(stats, {
+      5: {"asked": 2, "failed": 1, "failure_rate": 0.5},
+      6: {"asked": 2, "failed": 2, "failure_rate": 1.0}
+    })
+
+  def test_picks_up_other_writers(self):
+    self.store.question_stats()
+    ResultStore(self.file_name).append(3, [(7, False, 1.0)], 1.0, self.start)
+    self.assertEqual(self.store.question_stats()[7]["failed"], 1)
+    self.assertEqual(len(self.store.recent(3)), 1)
+
+  def test_indexes_records_missing_from_index(self):
+    store = ResultStore(self.file_name, compact_size=0)
+    store.append(1, [(5, True, 1.0)], 1.0, self.start)
+    with open(self.file_name + ".index", 'rb') as file:
+      index = file.read()
+    store.append(1, [(5, False, 1.0)], 1.0, self.start)
+    # A crash between appending a record and writing the index, then a torn append
+    with open(self.file_name + ".index", 'wb') as file:
+      file.write(index)
+    with open(self.file_name, 'a') as file:
+      file.write('{"profile_id": 1, "timest')
+
+    store = ResultStore(self.file_name)
+    self.assertEqual(store.question_stats()[5], {"asked": 2, "failed": 1, "failure_rate": 0.5})
+    store.append(1, [(6, True, 1.0)], 1.0, self.start)
+    self.assertEqual([record["score"] for record in ResultStore(self.file_name).recent(1)], [100.0, 0.0, 100.0])
+
+  def test_index_rewritten_once_outgrown(self):
+    store = ResultStore(self.file_name, compact_size=1000)
+    with mock.patch("results_store.atomic_write_text", wraps=atomic_write_text) as write:
+      for test in range(100):
+        store.append(1, [(test, True, 1.0)], 1.0, self.start)
+    # The index is only rewritten once the records missing from it are larger than it
+    self.assertLess(write.call_count, 10)
+    self.assertLess(self.store._size() - ResultStore(self.file_name)._read_index()["size"], os.path.getsize(self.file_name + ".index"))
+    self.assertEqual(len(ResultStore(self.file_name).recent(1, limit=100)), 100)
+
+if __name__ == '__main__':
+  unittest.main()
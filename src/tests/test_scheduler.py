@@ -0,0 +1,107 @@
+import unittest
+import random
+from profile_stats import ProfileStats
+from scheduler import DAY, LeitnerScheduler, SM2Scheduler, create_scheduler
+from controller import ProfileManager, ProfileSaver, QuestionManager
+from free_form_question import FreeFormQuestion
+from user_profile import Profile
+from tests import use_temporary_data_root
+
+class TestProbabilityScheduler(unittest.TestCase):
+
+  def test_follows_selection_probabilities(self):
+    stats = ProfileStats()
+    stats.set_selection_probability(1, 0.0)
+    scheduler = create_scheduler("probability", [1, 2], stats, rng=random.Random(0))
+    self.assertEqual({scheduler.next_question() for _ in range(20)}, {2})
+
+    stats.set_selection_probability(1, 1.0)
+    stats.set_selection_probability(2, 0.0)
+    scheduler.record(1, True)
+    scheduler.record(2, False)
+    self.assertEqual({scheduler.next_question() for _ in range(20)}, {1})
+
+class TestLeitnerScheduler(unittest.TestCase):
+
+  def setUp(self):
+    self.scheduler = create_scheduler("leitner", [3, 1, 2], ProfileStats())
+
+  def test_new_questions_in_order(self):
+    self.assertEqual(self.scheduler.next_question(), 3)
+    self.scheduler.record(3, True, now=1000)
+    self.assertEqual(self.scheduler.next_question(), 1)
+
+  def test_boxes(self):
+    for now, question_id, correct in ((1000, 3, True), (1001, 1, True), (1002, 2, True), (1100, 3, True), (1101, 1, False)):
+      self.scheduler.record(question_id, correct, now=now)
+    # Question 1 went back to the first box, question 3 moved up to the third.
+    self.assertEqual(self.scheduler.next_question(), 1)
+    self.scheduler.record(1, True, now=1200)
+    self.assertEqual(self.scheduler.next_question(), 2)
+    self.assertEqual(self.scheduler._state[3], (2, 1100 + LeitnerScheduler.INTERVALS[2]))
+
+  def test_load_replays_history(self):
+    history = [(3, True, 1000), (1, True, 1001), (2, False, 1002), (9, True, 1003)]
+    for question_id, correct, timestamp in history[:3]:
+      self.scheduler.record(question_id, correct, now=timestamp)
+    replayed = create_scheduler("leitner", [3, 1, 2], ProfileStats(), history)
+    self.assertEqual(replayed.next_question(), self.scheduler.next_question())
+    self.assertEqual({question_id: replayed._state[question_id] for question_id in (1, 2, 3)}, self.scheduler._state)
+
+  def test_heap_stays_bounded(self):
+    for now in range(1000):
+      question_id = self.scheduler.next_question()
+      self.scheduler.record(question_id, now % 3 == 0, now=now)
+    self.assertLessEqual(len(self.scheduler._heap), 2 * 3 + 17)
+
+class TestSM2Scheduler(unittest.TestCase):
+
+  def test_intervals(self):
+    scheduler = create_scheduler("sm2", [1], ProfileStats())
+    scheduler.record(1, True, now=0)
+    scheduler.record(1, True, now=DAY)
+    scheduler.record(1, True, now=7 * DAY)
+    self.assertEqual(scheduler._state[1], (3, 2.5, 15, 22 * DAY))
+
+  def test_wrong_answer_comes_back_soon(self):
+    scheduler = create_scheduler("sm2", [1, 2], ProfileStats())
+    scheduler.record(1, True, now=0)
+    scheduler.record(2, True, now=0)
+    scheduler.record(2, False, now=10)
+    repetitions, easiness, _, due = scheduler._state[2]
+    self.assertEqual((repetitions, due), (0, 10 + SM2Scheduler.RETRY_DELAY))
+    self.assertAlmostEqual(easiness, 1.96)
+    self.assertEqual(scheduler.next_question(), 2)
+
+class TestSchedulerHistory(unittest.TestCase):
+
+  def test_replays_sqlite_history(self):
+    use_temporary_data_root(self, "sqlite")
+    question_manager = QuestionManager()
+    for number in range(3):
+      question_manager.add_question(FreeFormQuestion(f"{number} + 1?", str(number + 1)))
+    question_manager.save_to_json()
+
+    profile = Profile("Jane Doe")
+    profile.scheduler = "leitner"
+    ProfileManager.save_to_json(profile)
+    with ProfileSaver(profile) as profile_saver:
+      for question_id, correct in ((1, True), (2, False), (3, True)):
+        profile.record_answer(question_id, correct)
+        profile_saver.record(question_id, correct)
+
+    history = ProfileManager.get_answer_history(profile, None)
+    self.assertEqual([(question_id, correct) for question_id, correct, _ in history], [(1, True), (2, False), (3, True)])
+    scheduler = ProfileManager.create_scheduler(ProfileManager.open_profile(profile._id))
+    self.assertIsInstance(scheduler, LeitnerScheduler)
+    self.assertEqual(scheduler._state, create_scheduler("leitner", [1, 2, 3], ProfileStats(), history)._state)
+    self.assertEqual(scheduler.next_question(), 2)
+
+class TestCreateScheduler(unittest.TestCase):
+
+  def test_unknown_scheduler(self):
+    with self.assertRaises(ValueError):
+      create_scheduler("random", [1], ProfileStats())
+
+if __name__ == '__main__':
+  unittest.main()
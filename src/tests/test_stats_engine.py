@@ -0,0 +1,81 @@
+import unittest
+import random
+from profile_stats import ProfileStats
+from stats_engine import NumpyStatsEngine, PythonStatsEngine, create_stats_engine, np
+
+QUESTIONS_STATS = [
+  {"id": 4, "times_shown": 3, "correct_answers": 1, "selection_probability": 0.5},
+  {"id": 2, "times_shown": 4, "correct_answers": 4, "selection_probability": 1.0},
+  {"id": 7, "times_shown": 2, "correct_answers": 0, "selection_probability": 1.0},
+  {"id": 9, "times_shown": 6, "correct_answers": 2, "selection_probability": 1.0}
+]
+
+QUESTION_TYPES = [(2, "quiz"), (4, "freeform"), (7, "quiz"), (8, "freeform")]
+
+def random_profile(rng, num_questions):
+  stats = ProfileStats()
+  for question_id in rng.sample(range(1, num_questions * 2), num_questions):
+    for _ in range(rng.randrange(5)):
+      stats.record(question_id, rng.random() < 0.6)
+    if question_id not in stats:
+      stats.set_selection_probability(question_id, 1.0)
+  question_types = [(question_id, rng.choice(["quiz", "freeform"])) for question_id in range(1, num_questions * 2)]
+  return stats, question_types
+
+class TestPythonStatsEngine(unittest.TestCase):
+
+  def setUp(self):
+    self.engine = PythonStatsEngine()
+    self.stats = ProfileStats.from_list(QUESTIONS_STATS)
+
+  def test_recalculate_probabilities(self):
+    self.engine.recalculate_probabilities(self.stats)
+    self.assertEqual(self.stats.selection_probability(4), 0.5)
+    self.assertAlmostEqual(self.stats.selection_probability(7), 1 / 3)
+
+  def test_add_counts(self):
+    counts = {4: (2, 2), 5: (1, 0)}
+    expected = ProfileStats.from_list(QUESTIONS_STATS)
+    expected.add_counts(counts)
+    self.stats.add_counts(counts, self.engine)
+    self.assertEqual(self.stats.selection_probability(4), expected.selection_probability(4))
+    self.assertEqual(self.stats.selection_probability(5), expected.selection_probability(5))
+    self.assertAlmostEqual(self.stats.selection_probability(7), 1 / 3)
+
+  def test_correct_percentages(self):
+    percentages = self.engine.correct_percentages(self.stats)
+    self.assertAlmostEqual(percentages[4], 100 / 3)
+    self.assertEqual(percentages[2], 100)
+
+  def test_summary(self):
+    summary = self.engine.summary(self.stats, QUESTION_TYPES, weakest=2)
+    self.assertEqual(summary["answered"], 3)
+    self.assertEqual((summary["times_shown"], summary["correct_answers"]), (9, 5))
+    self.assertEqual(summary["by_type"]["quiz"]["times_shown"], 6)
+    self.assertEqual(summary["by_type"]["freeform"]["correct_answers"], 1)
+    self.assertEqual([row["id"] for row in summary["weakest"]], [7, 4])
+
+  def test_create_stats_engine(self):
+    self.assertIsInstance(create_stats_engine("python"), PythonStatsEngine)
+    with self.assertRaises(ValueError):
+      create_stats_engine("fortran")
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestNumpyStatsEngine(unittest.TestCase):
+
+  def test_matches_python_engine(self):
+    rng = random.Random(0)
+    python_engine, numpy_engine = PythonStatsEngine(), NumpyStatsEngine()
+
+    for num_questions in (0, 1, 50, 500):
+      stats, question_types = random_profile(rng, num_questions)
+      self.assertEqual(numpy_engine.summary(stats, question_types, 10), python_engine.summary(stats, question_types, 10))
+      self.assertEqual(numpy_engine.correct_percentages(stats), python_engine.correct_percentages(stats))
+
+      expected = ProfileStats.from_list(stats.to_list())
+      python_engine.recalculate_probabilities(expected)
+      numpy_engine.recalculate_probabilities(stats)
+      self.assertEqual(stats.to_list(), expected.to_list())
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,368 @@
+import unittest
+import json
+import os
+import stat
+import tempfile
+import threading
+from unittest import mock
+from storage import JsonStorage, SqliteStorage, atomic_write_json, iter_json_array, migrate_json_to_sqlite, convert_profile_stats
+from user_profile import Profile
+
+QUESTIONS = [
+  {"type": "quiz", "id": 1, "question_text": "Closest planet to the sun?", "status": True, "answer_index": 0, "options": ["Mercury", "Venus"]},
+  {"type": "freeform", "id": 2, "question_text": "2 + 2?", "status": False, "answer": "4", "alternatives": ["four"]}
+]
+
+class TestIterJsonArray(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.file_name = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    self.addCleanup(os.remove, self.file_name)
+
+  def test_matches_json_load(self):
+    with open(self.file_name, 'w') as file:
+      json.dump(QUESTIONS, file, indent=2)
+    for chunk_size in (1, 7, 4096):
+      self.assertEqual(list(iter_json_array(self.file_name, chunk_size)), QUESTIONS)
+
+  def test_empty_array(self):
+    with open(self.file_name, 'w') as file:
+      file.write(" [ ]\n")
+    self.assertEqual(list(iter_json_array(self.file_name)), [])
+
+  def test_missing_file(self):
+    self.assertEqual(list(iter_json_array(self.file_name + ".missing")), [])
+
+  def test_not_an_array(self):
+    with open(self.file_name, 'w') as file:
+      file.write('{"id": 1}')
+    with self.assertRaises(ValueError):
+      list(iter_json_array(self.file_name))
+
+class TestAtomicWrite(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.file_name = os.path.join(self.data_dir.name, "data.json")
+
+  def mode(self):
+    return stat.S_IMODE(os.stat(self.file_name).st_mode)
+
+  @unittest.skipUnless(hasattr(os, "fchmod"), "file modes can't be set")
+  def test_new_file_follows_umask(self):
+    umask = os.umask(0o022)
+    self.addCleanup(os.umask, umask)
+    with mock.patch("storage._UMASK", 0o022):
+      atomic_write_json(self.file_name, QUESTIONS)
+    self.assertEqual(self.mode(), 0o644)
+
+  @unittest.skipUnless(hasattr(os, "fchmod"), "file modes can't be set")
+  def test_keeps_existing_mode(self):
+    atomic_write_json(self.file_name, [])
+    os.chmod(self.file_name, 0o640)
+    atomic_write_json(self.file_name, QUESTIONS)
+    self.assertEqual(self.mode(), 0o640)
+    with open(self.file_name) as file:
+      self.assertEqual(json.load(file), QUESTIONS)
+
+class TestJsonQuestions(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.questions_file = os.path.join(self.data_dir.name, "questions.json")
+    with open(self.questions_file, 'w') as file:
+      json.dump(QUESTIONS, file)
+    self.storage = JsonStorage(self.questions_file, self.data_dir.name)
+
+  def stored_array(self):
+    with open(self.questions_file) as file:
+      return json.load(file)
+
+  def test_reads_plain_array(self):
+    self.assertEqual(self.storage.load_questions(), QUESTIONS)
+    self.assertEqual(list(self.storage.iter_questions()), QUESTIONS)
+
+  def toggle(self, question_id):
+    questions = self.storage.load_questions()
+    question = next(question for question in questions if question["id"] == question_id)
+    question["status"] = not question["status"]
+    self.storage.update_question_status(questions, [question_id], self.storage.questions_signature())
+
+  def test_status_changes_are_logged(self):
+    self.toggle(2)
+    self.assertEqual(self.stored_array(), QUESTIONS)
+    with open(self.questions_file + ".changes") as file:
+      self.assertEqual(len(file.readlines()), 2)
+    expected = [QUESTIONS[0], dict(QUESTIONS[1], status=True)]
+    self.assertEqual(self.storage.load_questions(), expected)
+    self.assertEqual(list(self.storage.iter_questions()), expected)
+
+  def test_added_questions_keep_logged_changes(self):
+    self.toggle(2)
+    new_question = {"type": "freeform", "id": 3, "question_text": "3 + 3?", "status": True, "answer": "6"}
+    self.storage.add_questions([new_question])
+    self.assertEqual(self.storage.load_questions(), [QUESTIONS[0], dict(QUESTIONS[1], status=True), new_question])
+
+  def test_merges_changes_made_by_others(self):
+    signature = self.storage.questions_signature()
+    questions = self.storage.load_questions()
+    self.storage.add_questions([{"type": "freeform", "id": 3, "question_text": "3 + 3?", "status": True, "answer": "6"}])
+    questions[0]["status"] = False
+    self.storage.update_question_status(questions, [1], signature)
+    self.assertEqual([(question["id"], question["status"]) for question in questions], [(1, False), (2, False), (3, True)])
+
+  def test_log_is_folded_into_questions_file(self):
+    inode = os.stat(self.questions_file).st_ino
+    with mock.patch("storage.QUESTION_LOG_COMPACT_SIZE", 0):
+      for _ in range(21):
+        self.toggle(2)
+    self.assertNotEqual(os.stat(self.questions_file).st_ino, inode)
+    self.assertEqual(self.storage.load_questions(), [QUESTIONS[0], dict(QUESTIONS[1], status=True)])
+
+  def test_ignores_log_of_replaced_questions_file(self):
+    self.toggle(2)
+    # A crash between replacing the questions file and removing the log leaves it behind
+    with mock.patch.object(self.storage._change_log, "remove"):
+      self.storage.save_questions(QUESTIONS)
+    self.assertEqual(self.storage.load_questions(), QUESTIONS)
+
+  def test_skips_torn_change(self):
+    self.toggle(1)
+    with open(self.questions_file + ".changes", 'a') as file:
+      file.write('{"id": 2, "sta')
+    self.toggle(2)
+    self.assertEqual([question["status"] for question in self.storage.load_questions()], [False, True])
+
+  def test_readers_during_appends(self):
+    new_questions = [{"type": "freeform", "id": question_id, "question_text": f"{question_id}?", "status": True, "answer": "x" * 100} for question_id in range(3, 203)]
+    def append():
+      for question in new_questions:
+        self.storage.add_questions([question])
+    writer = threading.Thread(target=append)
+    writer.start()
+    try:
+      expected = QUESTIONS + new_questions
+      while writer.is_alive():
+        for questions in (self.storage.load_questions(), list(self.storage.iter_questions())):
+          self.assertGreaterEqual(len(questions), 2)
+          self.assertEqual(questions, expected[:len(questions)])
+    finally:
+      writer.join()
+    self.assertEqual(self.storage.load_questions(), expected)
+
+  def test_repairs_torn_append(self):
+    new_question = {"type": "freeform", "id": 3, "question_text": "3 + 3?", "status": True, "answer": "6"}
+    self.storage.add_questions([new_question])
+    with open(self.questions_file, 'rb') as file:
+      content = file.read()
+    for torn in (b',\n  {"type": "free', b',\n', b',]'):
+      with open(self.questions_file, 'wb') as file:
+        file.write(content[:-2] + torn)
+      self.assertEqual(self.storage.load_questions(), QUESTIONS + [new_question])
+      self.assertEqual(list(self.storage.iter_questions()), QUESTIONS + [new_question])
+
+      self.storage.add_questions([dict(new_question, id=4)])
+      self.assertEqual(self.stored_array(), QUESTIONS + [new_question, dict(new_question, id=4)])
+
+class TestSqliteStorage(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.storage = SqliteStorage(os.path.join(self.data_dir.name, "test.db"))
+    self.addCleanup(self.storage.close)
+    self.storage.save_questions(QUESTIONS)
+
+  def make_profile(self):
+    stats = [{"id": 1, "times_shown": 0, "correct_answers": 0, "selection_probability": 1}]
+    return Profile.from_dict({"id": 3, "name": "Jane Doe", "questions_stats": stats})
+
+  def test_questions_round_trip(self):
+    self.assertEqual(self.storage.load_questions(), QUESTIONS)
+
+  def test_update_question_status(self):
+    signature = self.storage.questions_signature()
+    questions = self.storage.load_questions()
+    questions[1]["status"] = True
+    self.storage.update_question_status(questions, [2])
+    self.assertTrue(self.storage.load_questions()[1]["status"])
+    self.assertNotEqual(self.storage.questions_signature(), signature)
+
+  def test_merges_changes_made_by_others(self):
+    other = SqliteStorage(os.path.join(self.data_dir.name, "test.db"))
+    self.addCleanup(other.close)
+    signature = self.storage.questions_signature()
+    questions = self.storage.load_questions()
+    new_question = {"type": "freeform", "id": 3, "question_text": "3 + 3?", "status": True, "answer": "6"}
+    other.add_questions([new_question])
+
+    questions[0]["status"] = False
+    written = self.storage.update_question_status(questions, [1], signature)
+    self.assertEqual([(question["id"], question["status"]) for question in questions], [(1, False), (2, False), (3, True)])
+    self.assertEqual(written, self.storage.questions_signature())
+
+    other.add_questions([dict(new_question, id=4)])
+    self.assertIsNone(self.storage.add_questions([dict(new_question, id=5)], written))
+
+  def test_profile_round_trip(self):
+    profile = self.make_profile()
+    self.storage.save_profile(profile)
+    profiles = self.storage.load_profiles()
+    self.assertEqual(len(profiles), 1)
+    loaded = self.storage.load_profile(profiles[0])
+    self.assertEqual(loaded.name, "Jane Doe")
+    self.assertEqual(loaded.stats.to_list(), profile.stats.to_list())
+
+  def test_profile_scheduler(self):
+    profile = self.make_profile()
+    profile.scheduler = "leitner"
+    self.storage.save_profile(profile)
+    self.assertEqual(self.storage.load_profile(self.storage.read_profile(3)).scheduler, "leitner")
+
+  def test_list_and_read_profile(self):
+    self.storage.save_profile(self.make_profile())
+    self.assertEqual(self.storage.list_profiles(), [{"id": 3, "name": "Jane Doe"}])
+    self.assertEqual(self.storage.read_profile(3)["questions_stats"], self.make_profile().stats.to_list())
+
+  def test_answer_log_updates_stats(self):
+    profile = self.make_profile()
+    self.storage.save_profile(profile)
+    answer_log = self.storage.open_answer_log(profile)
+    profile.record_answer(1, False)
+    answer_log.append(1, False, timestamp=100)
+    profile.record_answer(2, True)
+    answer_log.append(2, True, timestamp=101)
+    answer_log.close()
+
+    loaded = self.storage.load_profile(self.storage.load_profiles()[0])
+    self.assertEqual(loaded.get_question_stats(1), profile.get_question_stats(1))
+    self.assertEqual(loaded.get_question_stats(2), profile.get_question_stats(2))
+    self.assertEqual(self.storage.get_answer_history(profile, 10), [(1, False, 100), (2, True, 101)])
+    self.assertEqual(len(answer_log), 0)
+
+class TestProfileIndex(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.storage = JsonStorage(profiles_folder=self.data_dir.name)
+    for profile_id, name in ((2, "Jane Doe"), (1, "John Doe")):
+      self.storage.save_profile(Profile.from_dict({"id": profile_id, "name": name, "questions_stats": []}))
+
+  def write_profile(self, profile_id, name):
+    with open(os.path.join(self.data_dir.name, f"{profile_id}.json"), 'w') as file:
+      json.dump({"id": profile_id, "name": name, "questions_stats": []}, file)
+
+  def test_list_profiles(self):
+    self.assertEqual(self.storage.list_profiles(), [{"id": 1, "name": "John Doe"}, {"id": 2, "name": "Jane Doe"}])
+
+  def test_saved_profiles_are_not_parsed(self):
+    with mock.patch("storage.json.load", wraps=json.load) as load:
+      self.storage.list_profiles()
+    self.assertEqual(load.call_count, 1)
+
+  def test_picks_up_changed_files(self):
+    self.write_profile(3, "New")
+    self.write_profile(1, "Renamed")
+    os.utime(os.path.join(self.data_dir.name, "1.json"), ns=(0, 0))
+    os.remove(os.path.join(self.data_dir.name, "2.json"))
+    self.assertEqual(self.storage.list_profiles(), [{"id": 1, "name": "Renamed"}, {"id": 3, "name": "New"}])
+
+  def test_rebuilds_missing_index(self):
+    os.remove(os.path.join(self.data_dir.name, "profiles.index"))
+    self.assertEqual(len(self.storage.list_profiles()), 2)
+    self.assertTrue(os.path.exists(os.path.join(self.data_dir.name, "profiles.index")))
+
+  def test_read_profile(self):
+    self.assertEqual(self.storage.load_profile(self.storage.read_profile(2)).name, "Jane Doe")
+
+  def test_save_profiles_updates_index_once(self):
+    profiles = [Profile.from_dict({"id": profile_id, "name": f"Profile {profile_id}", "questions_stats": []}) for profile_id in (3, 4)]
+    with mock.patch.object(JsonStorage, "_write_profile_index", wraps=self.storage._write_profile_index) as write_index:
+      self.storage.save_profiles(profiles)
+    self.assertEqual(write_index.call_count, 1)
+    with mock.patch("storage.json.load", wraps=json.load) as load:
+      self.assertEqual([profile["id"] for profile in self.storage.list_profiles()], [1, 2, 3, 4])
+    self.assertEqual(load.call_count, 1)
+
+class TestBinaryProfileStats(unittest.TestCase):
+
+  def setUp(self):
+    self.data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.data_dir.cleanup)
+    self.storage = JsonStorage(profiles_folder=self.data_dir.name, stats_format="binary")
+    stats = [{"id": 1, "times_shown": 2, "correct_answers": 1, "selection_probability": 0.6666666666666667}]
+    self.profile = Profile.from_dict({"id": 3, "name": "Jane Doe", "questions_stats": stats})
+
+  def test_profile_round_trip(self):
+    self.storage.save_profile(self.profile)
+    profile_data = self.storage.load_profiles()[0]
+    self.assertNotIn("questions_stats", profile_data)
+    loaded = self.storage.load_profile(profile_data)
+    self.assertEqual(loaded.name, "Jane Doe")
+    self.assertEqual(loaded.stats.to_list(), self.profile.stats.to_list())
+
+  def test_answer_log_updates_stats_in_place(self):
+    self.storage.save_profile(self.profile)
+    answer_log = self.storage.open_answer_log(self.profile)
+    self.profile.record_answer(1, True)
+    answer_log.append(1, True, timestamp=100)
+    self.profile.record_answer(2, False)
+    answer_log.append(2, False, timestamp=101)
+    answer_log.close()
+
+    loaded = self.storage.load_profile(self.storage.load_profiles()[0])
+    self.assertEqual(loaded.get_question_stats(1), self.profile.get_question_stats(1))
+    self.assertEqual(loaded.get_question_stats(2), self.profile.get_question_stats(2))
+    self.assertEqual(self.storage.get_answer_history(self.profile, 10), [(1, True, 100), (2, False, 101)])
+
+  def test_convert_between_formats(self):
+    JsonStorage(profiles_folder=self.data_dir.name).save_profile(self.profile)
+    self.assertEqual(convert_profile_stats(self.data_dir.name, "binary"), 1)
+    self.assertTrue(os.path.exists(os.path.join(self.data_dir.name, "3.stats")))
+
+    self.assertEqual(convert_profile_stats(self.data_dir.name, "json"), 1)
+    self.assertFalse(os.path.exists(os.path.join(self.data_dir.name, "3.stats")))
+    profile_data = JsonStorage(profiles_folder=self.data_dir.name).load_profiles()[0]
+    self.assertEqual(profile_data["questions_stats"], self.profile.stats.to_list())
+
+  def test_convert_uses_given_questions_file(self):
+    questions_file = os.path.join(self.data_dir.name, "questions.json")
+    JsonStorage(questions_file, self.data_dir.name).save_profile(self.profile)
+    with mock.patch("storage.JsonStorage", wraps=JsonStorage) as storage_class:
+      convert_profile_stats(self.data_dir.name, "binary", questions_file)
+    self.assertEqual(storage_class.call_args.args[0], questions_file)
+
+class TestMigration(unittest.TestCase):
+
+  def test_migrate_json_to_sqlite(self):
+    data_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(data_dir.cleanup)
+    questions_file = os.path.join(data_dir.name, "questions.json")
+    profiles_folder = os.path.join(data_dir.name, "profiles")
+    os.mkdir(profiles_folder)
+    with open(questions_file, 'w') as file:
+      json.dump(QUESTIONS, file)
+
+    source = JsonStorage(questions_file, profiles_folder)
+    stats = [{"id": 1, "times_shown": 0, "correct_answers": 0, "selection_probability": 1}]
+    profile = Profile.from_dict({"id": 3, "name": "Jane Doe", "questions_stats": stats})
+    source.save_profile(profile)
+    answer_log = source.open_answer_log(profile)
+    profile.record_answer(1, True)
+    answer_log.append(1, True, timestamp=100)
+    answer_log.close()
+
+    target = SqliteStorage(os.path.join(data_dir.name, "test.db"))
+    self.addCleanup(target.close)
+    self.assertEqual(migrate_json_to_sqlite(source, target), (2, 1))
+    self.assertEqual(target.load_questions(), QUESTIONS)
+    migrated = target.load_profile(target.load_profiles()[0])
+    self.assertEqual(migrated.get_question_stats(1)["times_shown"], 1)
+    self.assertEqual(target.get_answer_history(migrated, 10), [(1, True, 100)])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,11 +1,24 @@
 import unittest
+import json
+from collections.abc import Mapping
+import os
+import random
+import tempfile
+from unittest import mock
+from controller import QuestionBank
+from storage import JsonStorage
 from user_profile import Profile
+from tests import use_temporary_data_root
 
 class TestProfile(unittest.TestCase):
     
   def setUp(self):
+    self.data_root = use_temporary_data_root(self)
     self.name = "John Doe"
     self.profile = Profile(self.name)
+
+  def test_saved_to_data_root(self):
+    self.assertTrue(os.path.exists(os.path.join(self.data_root.profiles_folder, f"{self.profile._id}.json")))
       
   def test_to_dict(self):
     profile_dict = self.profile.to_dict()
@@ -18,17 +31,94 @@ class TestProfile(unittest.TestCase):
     profile_from_dict = Profile.from_dict(profile_dict)
     self.assertEqual(profile_from_dict.to_dict(), profile_dict)
 
+  def test_scheduler(self):
+    self.assertEqual(self.profile.scheduler, "probability")
+    self.profile.scheduler = "sm2"
+    self.assertEqual(Profile.from_dict(self.profile.to_dict()).scheduler, "sm2")
+    with self.assertRaises(ValueError):
+      self.profile.scheduler = "random"
+
   def test_get_question_probabilities(self):
     probabilities = self.profile.get_question_probabilities()
     self.assertIsInstance(probabilities, list)
     for prob in probabilities:
       self.assertIsInstance(prob, float)
 
+  def test_new_profile_has_no_stats(self):
+    self.assertEqual(len(self.profile.stats), 0)
+
   def test_get_question_stats(self):
-    question_id = self.profile._questions_stats[0]['id']
+    question_id = 1
+    self.assertIsNone(self.profile.get_question_stats(question_id))
+    self.profile.record_answer(question_id, True)
     question_stats = self.profile.get_question_stats(question_id)
-    self.assertIsInstance(question_stats, dict)
+    self.assertIsInstance(question_stats, Mapping)
     self.assertEqual(question_stats['id'], question_id)
+    self.assertEqual(question_stats['times_shown'], 1)
+
+class TestProfileActiveQuestions(unittest.TestCase):
+
+  def setUp(self):
+    rng = random.Random(42)
+    self.questions = [
+      {"type": "freeform", "id": i, "question_text": f"Question {i}", "status": rng.random() < 0.7, "answer": str(i)}
+      for i in range(1, 51)
+    ]
+    self.stats = [
+      {"id": i, "times_shown": i, "correct_answers": 0, "selection_probability": i / 100}
+      for i in range(1, 51)
+    ]
+    # Stats for a question that has since been deleted from the questions file
+    self.stats.append({"id": 99, "times_shown": 1, "correct_answers": 1, "selection_probability": 1.0})
+    rng.shuffle(self.questions)
+    rng.shuffle(self.stats)
+
+    fd, self.file_name = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    with open(self.file_name, 'w') as file:
+      json.dump(self.questions, file)
+    self.storage = JsonStorage(questions_file=self.file_name)
+    self.bank = QuestionBank(self.storage)
+    patcher = mock.patch("controller.question_bank", self.bank)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+    self.profile = Profile.from_dict({"id": 1, "name": "Jane Doe", "questions_stats": self.stats})
+
+  def tearDown(self):
+    os.remove(self.file_name)
+
+  def test_pairs_are_joined_by_id(self):
+    active_questions = self.profile.get_active_questions()
+    self.assertEqual(list(active_questions), [q["id"] for q in self.questions if q["status"]])
+    for question_id, (question, stats) in active_questions.items():
+      self.assertEqual(question["id"], question_id)
+      self.assertEqual(stats["id"], question_id)
+
+  def test_probabilities_align_with_active_questions(self):
+    probabilities = self.profile.get_question_probabilities()
+    expected = [q["id"] / 100 for q in self.bank.active_questions()]
+    self.assertEqual(probabilities, expected)
+
+  def test_toggle_updates_view(self):
+    disabled = next(q for q in self.questions if not q["status"])
+    self.profile.get_active_questions()
+    disabled["status"] = True
+    self.bank.replace(self.questions, self.storage.questions_signature())
+    self.assertIn(disabled["id"], self.profile.get_active_questions())
+
+  def test_added_question_gets_default_stats_until_answered(self):
+    self.bank.replace(self.questions + [{"type": "freeform", "id": 51, "question_text": "New", "status": True, "answer": "51"}], self.storage.questions_signature())
+    _, stats = self.profile.get_active_questions()[51]
+    self.assertEqual(stats["times_shown"], 0)
+    self.assertEqual(stats["selection_probability"], 1.0)
+    self.assertIsNone(self.profile.get_question_stats(51))
+    self.assertNotIn(51, [s["id"] for s in self.profile.to_dict()["questions_stats"]])
+
+    self.profile.record_answer(51, False)
+    self.assertEqual(self.profile.get_question_stats(51), stats)
+    self.assertEqual(stats["times_shown"], 1)
+    self.assertEqual(stats["selection_probability"], 0.5)
 
 if __name__ == '__main__':
     unittest.main()
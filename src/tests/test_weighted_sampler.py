@@ -0,0 +1,85 @@
+import unittest
+import random
+from weighted_sampler import WeightedSampler, reservoir_sample
+
+class TestWeightedSampler(unittest.TestCase):
+
+  def setUp(self):
+    self.sampler = WeightedSampler([(10, 1.0), (20, 2.0), (30, 0.0), (40, 1.0)])
+
+  def test_total(self):
+    self.assertAlmostEqual(self.sampler.total, 4.0)
+
+  def test_update(self):
+    self.sampler.update(20, 0.5)
+    self.assertAlmostEqual(self.sampler.weight(20), 0.5)
+    self.assertAlmostEqual(self.sampler.total, 2.5)
+
+  def test_add(self):
+    for key in range(50, 60):
+      self.sampler.add(key, 1.0)
+    self.assertEqual(len(self.sampler), 14)
+    self.assertAlmostEqual(self.sampler.total, 14.0)
+
+  def test_sample_skips_zero_weights(self):
+    rng = random.Random(1)
+    self.sampler.remove(10)
+    samples = {self.sampler.sample(rng) for _ in range(200)}
+    self.assertEqual(samples, {20, 40})
+
+  def test_sample_distribution(self):
+    rng = random.Random(2)
+    counts = {10: 0, 20: 0, 40: 0}
+    for _ in range(20000):
+      counts[self.sampler.sample(rng)] += 1
+    self.assertAlmostEqual(counts[20] / 20000, 0.5, delta=0.02)
+    self.assertAlmostEqual(counts[10] / 20000, 0.25, delta=0.02)
+
+  def test_sample_empty(self):
+    with self.assertRaises(ValueError):
+      WeightedSampler().sample()
+
+  def test_sample_after_all_weights_removed(self):
+    sampler = WeightedSampler((key, 0.1) for key in range(10))
+    for key in range(10):
+      sampler.update(key, 0.7)
+      sampler.update(key, 0.3)
+    for key in range(10):
+      sampler.remove(key)
+    self.assertEqual(sampler.total, 0.0)
+    with self.assertRaises(ValueError):
+      sampler.sample()
+
+    sampler.update(3, 1.0)
+    self.assertEqual(sampler.sample(random.Random(5)), 3)
+
+  def test_sample_rebuilds_after_rounding_errors(self):
+    sampler = WeightedSampler([(1, 1e16), (2, 1e-300), (3, 0.0)])
+    sampler.update(1, 0.0)
+    self.assertEqual(sampler.sample(random.Random(6)), 2)
+
+  def test_negative_weight(self):
+    with self.assertRaises(ValueError):
+      self.sampler.update(10, -1)
+
+class TestReservoirSample(unittest.TestCase):
+
+  def test_picks_k_distinct_items(self):
+    sample = reservoir_sample(iter(range(100)), 10, random.Random(3))
+    self.assertEqual(len(set(sample)), 10)
+    self.assertTrue(all(0 <= item < 100 for item in sample))
+
+  def test_short_stream(self):
+    self.assertEqual(sorted(reservoir_sample(range(3), 10)), [0, 1, 2])
+
+  def test_uniform(self):
+    rng = random.Random(4)
+    counts = [0] * 10
+    for _ in range(5000):
+      for item in reservoir_sample(range(10), 3, rng):
+        counts[item] += 1
+    for count in counts:
+      self.assertAlmostEqual(count / 5000, 0.3, delta=0.03)
+
+if __name__ == '__main__':
+  unittest.main()
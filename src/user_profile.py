@@ -1,3 +1,8 @@
+from config import DEFAULT_SCHEDULER
+from profile_stats import ProfileStats
+from scheduler import SCHEDULERS, create_scheduler
+from instrumentation import instrumented
+
 class Profile: 
   """
     A class representing a user profile.
@@ -15,44 +20,190 @@ class Profile:
         from_dict (bool): True if the profile is being initialized from a dictionary, False otherwise.
     """
     self._name = name
+    self._log_checkpoint = 0
+    self._scheduler = DEFAULT_SCHEDULER
+    self._active_questions = None
+    self._active_version = None
+
+    # Answer counts by question ID that are in the statistics but not in storage yet
+    self._unlogged = {}
+
+    # Number of answers read from or written to the answer log since the last snapshot
+    self._log_records = 0
+
+    # The version of the stored snapshot the statistics build on, as set by the storage
+    self._snapshot_version = None
     
     if not from_dict:
       from controller import ProfileManager  # Import ProfileManager here
       self._id = ProfileManager.generate_id()
-      self._questions_stats = ProfileManager.initialize_all_stats_to_zero()
+      self._stats = ProfileStats()
       ProfileManager.save_to_json(self)
   
-  def to_dict(self):
+  def to_dict(self, include_stats=True):
     """
     Returns the profile as a dictionary.
     
+    Args:
+        include_stats (bool): False to leave out the question statistics.
+
     Returns:
         dict: The profile as a dictionary.
     """
-    return {
+    profile_dict = {
       "id": self._id,
       "name": self._name,
-      "questions_stats": self._questions_stats
+      "log_checkpoint": self._log_checkpoint,
+      "scheduler": self._scheduler
     }
+    if include_stats:
+      profile_dict["questions_stats"] = self._stats.to_list()
+    return profile_dict
+
+  @property
+  def stats(self):
+    """
+    ProfileStats: The per-question statistics of the profile.
+    """
+    return self._stats
+
+  def _sync_active_questions(self):
+    """
+    Rebuilds the joined view of active questions and their statistics when the question
+    bank has changed since the last build.
+    """
+    from controller import QuestionManager
+    question_bank = QuestionManager.get_bank()
+
+    if self._active_questions is not None and self._active_version == question_bank.version:
+      return
+
+    active_questions = {
+      question["id"]: (question, self._stats.view(question["id"]))
+      for question in question_bank.active_questions()
+    }
+
+    self._active_questions = active_questions
+    self._active_version = question_bank.version
+
+  @instrumented("Profile.get_active_questions")
+  def get_active_questions(self):
+    """
+    Gets the active questions joined with the profile's statistics for them.
     
+    The view is keyed by question ID and follows the order of the questions file. It is
+    computed once and only rebuilt when questions are toggled or added. Statistics for
+    questions that no longer exist are ignored, and questions that haven't been answered
+    yet get default statistics, which are only stored once they are answered.
+    
+    Returns:
+        dict: A mapping of question ID to a (question, stats) tuple.
+    """
+    self._sync_active_questions()
+    return self._active_questions
+
+  @instrumented("Profile.get_question_probabilities")
   def get_question_probabilities(self):
     """
-    Gets the probabilities for all questions in the profile.
+    Gets the probabilities for all active questions in the profile.
     
     Returns:
-        list: A list of probabilities.
+        list: A list of probabilities, in the same order as the active questions.
     """
-    from controller import QuestionManager
-    probabilities = []
-    questions = QuestionManager.load_questions()
-    question_status = {q["id"]: q["status"] for q in questions}
+    return [float(self._stats.selection_probability(question_id)) for question_id in self.get_active_questions()]
+  
+  @property
+  def scheduler(self):
+    """
+    str: The name of the scheduler that picks the profile's questions in practice mode.
+    """
+    return self._scheduler
 
-    for stats in self._questions_stats:
-      if question_status[stats['id']]:
-        probabilities.append(float(stats['selection_probability']))
+  @scheduler.setter
+  def scheduler(self, name):
+    if name not in SCHEDULERS:
+      raise ValueError(f"Unknown scheduler: {name}")
+    self._scheduler = name
+
+  def create_scheduler(self, history=()):
+    """
+    Creates the profile's scheduler over its active questions.
+    
+    Args:
+        history (iterable): The profile's (question ID, correct, timestamp) answer records,
+          oldest first, for schedulers that replay them.
+
+    Returns:
+        Scheduler: The loaded scheduler.
+    """
+    return create_scheduler(self._scheduler, self.get_active_questions(), self._stats, history)
+
+  def record_answer(self, question_id, correct):
+    """
+    Records an answer to a question, updating its statistics and selection probability.
+    
+    Args:
+        question_id (int): The ID of the question.
+        correct (bool): True if the answer was correct.
+
+    Returns:
+        QuestionStats: The updated statistics for the question.
+    """
+    self._stats.record(question_id, correct)
+    counts = self._unlogged.setdefault(question_id, [0, 0])
+    counts[0] += 1
+    counts[1] += correct
+    return self._stats.view(question_id)
+
+  def answer_logged(self, question_id, correct):
+    """
+    Notes that a recorded answer has been appended to the profile's answer log.
+
+    Answers that aren't logged yet are added on top of the stored profile when another
+    process has saved it in the meantime, and logged ones are read back from the log.
+    
+    Args:
+        question_id (int): The ID of the question.
+        correct (bool): True if the answer was correct.
+    """
+    counts = self._unlogged.get(question_id)
+    if counts is not None:
+      counts[0] -= 1
+      counts[1] -= correct
+      if counts[0] <= 0:
+        del self._unlogged[question_id]
+    self._log_records += 1
+
+  def add_counts(self, counts, engine=None):
+    """
+    Adds aggregated answers that aren't logged, recalculating the affected probabilities once.
+    
+    Args:
+        counts (dict): (times shown, correct answers) to add, by question ID.
+        engine: The stats engine to recalculate the probabilities with, if any.
+    """
+    self._stats.add_counts(counts, engine)
+    for question_id, (times_shown, correct_answers) in counts.items():
+      unlogged = self._unlogged.setdefault(question_id, [0, 0])
+      unlogged[0] += times_shown
+      unlogged[1] += correct_answers
+
+  def rebase(self, stored):
+    """
+    Moves the profile's unstored answers on top of a newer stored version of it.
+
+    The statistics are replaced in place, so views and schedulers holding them see the
+    result. The name and scheduler are kept.
+    
+    Args:
+        stored (Profile): The profile as it is stored now.
+    """
+    stored._stats.add_counts(self._unlogged)
+    self._stats.replace(stored._stats)
+    self._log_checkpoint = stored._log_checkpoint
+    self._log_records = stored._log_records
+    self._snapshot_version = stored._snapshot_version
 
-    return probabilities
-  
   def get_question_stats(self, question_id):
     """
     Gets the statistics for a specific question in the profile.
@@ -61,11 +212,12 @@ class Profile:
         question_id (str): The ID of the question.
 
     Returns:
-        dict: The statistics for the question.
+        QuestionStats: A live view of the statistics for the question, or None if it
+        hasn't been answered yet.
     """
-    for question_stat in self._questions_stats:
-      if question_stat["id"] == question_id:
-        return question_stat
+    if question_id not in self._stats:
+      return None
+    return self._stats.view(question_id)
     
   @classmethod
   def from_dict(cls, data):
@@ -78,8 +230,10 @@ class Profile:
         Profile: A new profile instance.
     """
     profile = cls(data["name"], from_dict=True)
-    profile._questions_stats = data["questions_stats"]
+    profile._stats = ProfileStats.from_list(data.get("questions_stats", []))
     profile._id = data["id"]
+    profile._log_checkpoint = data.get("log_checkpoint", 0)
+    profile._scheduler = data.get("scheduler", DEFAULT_SCHEDULER)
     return profile
     
   @property
@@ -0,0 +1,189 @@
+import random
+
+def reservoir_sample(items, k, rng=random):
+  """
+  Picks k items uniformly at random from an iterable in a single pass.
+
+  Only the k picked items are kept in memory, so the iterable can be a stream.
+
+  Args:
+    items (iterable): The items to pick from.
+    k (int): The number of items to pick.
+    rng: The random number generator to use.
+
+  Returns:
+    list: The picked items, in no particular order.
+  """
+  reservoir = []
+  for index, item in enumerate(items):
+    if index < k:
+      reservoir.append(item)
+    else:
+      slot = rng.randrange(index + 1)
+      if slot < k:
+        reservoir[slot] = item
+  return reservoir
+
+class WeightedSampler:
+  """
+  A weighted random sampler backed by a Fenwick (binary indexed) tree.
+
+  Each key gets a slot in the tree, so changing one weight and drawing a key both cost
+  O(log n) instead of rebuilding the whole weight list for every draw. Updates leave
+  rounding errors in the tree's partial sums, so the tree is rebuilt from the weights
+  when they all drop to zero or a draw lands on an empty slot.
+  """
+
+  def __init__(self, items=()):
+    """
+    Initializes a new sampler in O(n).
+
+    Args:
+      items (iterable): (key, weight) pairs to start with.
+    """
+    self._keys = []
+    self._slots = {}
+    self._weights = []
+
+    for key, weight in items:
+      self._check_weight(weight)
+      self._slots[key] = len(self._keys)
+      self._keys.append(key)
+      self._weights.append(weight)
+
+    # Number of keys with a positive weight
+    self._positive = sum(weight > 0 for weight in self._weights)
+    self._build()
+
+  def _build(self):
+    size = len(self._weights)
+    self._tree = [0.0] + self._weights
+    for index in range(1, size + 1):
+      parent = index + (index & -index)
+      if parent <= size:
+        self._tree[parent] += self._tree[index]
+
+  @staticmethod
+  def _check_weight(weight):
+    if weight < 0:
+      raise ValueError("Weights must not be negative.")
+
+  def __len__(self):
+    return len(self._keys)
+
+  def __contains__(self, key):
+    return key in self._slots
+
+  def _prefix_sum(self, index):
+    total = 0.0
+    while index > 0:
+      total += self._tree[index]
+      index -= index & -index
+    return total
+
+  @property
+  def total(self):
+    """
+    float: The sum of all weights.
+    """
+    return max(0.0, self._prefix_sum(len(self._keys)))
+
+  def weight(self, key):
+    """
+    Gets the current weight of a key.
+
+    Args:
+      key: The key to look up.
+
+    Returns:
+      float: The weight of the key.
+    """
+    return self._weights[self._slots[key]]
+
+  def add(self, key, weight):
+    """
+    Adds a new key, or updates it if it is already present.
+
+    Args:
+      key: The key to add.
+      weight (float): The weight of the key.
+    """
+    if key in self._slots:
+      self.update(key, weight)
+      return
+
+    self._check_weight(weight)
+    index = len(self._keys) + 1
+    lowest = index - (index & -index)
+    self._tree.append(weight + self._prefix_sum(index - 1) - self._prefix_sum(lowest))
+    self._slots[key] = len(self._keys)
+    self._keys.append(key)
+    self._weights.append(weight)
+    self._positive += weight > 0
+
+  def update(self, key, weight):
+    """
+    Changes the weight of an existing key.
+
+    Args:
+      key: The key to update.
+      weight (float): The new weight of the key.
+    """
+    self._check_weight(weight)
+    slot = self._slots[key]
+    delta = weight - self._weights[slot]
+    self._positive += (weight > 0) - (self._weights[slot] > 0)
+    self._weights[slot] = weight
+    if not self._positive:
+      # Drop the rounding errors left behind, so the total is exactly zero
+      self._tree = [0.0] * len(self._tree)
+      return
+
+    index = slot + 1
+    size = len(self._keys)
+    while index <= size:
+      self._tree[index] += delta
+      index += index & -index
+
+  def remove(self, key):
+    """
+    Stops a key from being sampled. Its slot is kept with a weight of zero.
+
+    Args:
+      key: The key to remove.
+    """
+    if key in self._slots:
+      self.update(key, 0.0)
+
+  def sample(self, rng=random):
+    """
+    Draws a key with probability proportional to its weight.
+
+    Args:
+      rng: The random number generator to use.
+
+    Returns:
+      The selected key.
+
+    Raises:
+      ValueError: If no key has a positive weight.
+    """
+    size = len(self._keys)
+    if not self._positive:
+      raise ValueError("Total of weights must be greater than zero.")
+
+    while True:
+      target = rng.random() * self.total
+      position = 0
+      step = 1 << size.bit_length()
+      while step:
+        next_position = position + step
+        if next_position <= size and self._tree[next_position] <= target:
+          position = next_position
+          target -= self._tree[next_position]
+        step >>= 1
+
+      # Rounding errors can push the search past the last slot or onto an empty one.
+      if position < size and self._weights[position] > 0:
+        return self._keys[position]
+      self._build()